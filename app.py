@@ -1,20 +1,36 @@
 import streamlit as st
 from streamlit_option_menu import option_menu
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from io import BytesIO
-import json
-
-from utils.mock_interview import MockInterview
-from utils.job_post_summarizer import JobScraper
-from utils.career_coach import CareerBoost
-from utils.resume_analyzer import ResumeAnalyzer
+import hashlib
+import time
+
+# The agents and their heavy dependencies (LangChain, the OpenAI SDK, PDF/DOCX readers, BeautifulSoup,
+# pyarrow, scipy) are imported where a feature first needs them, so the sidebar renders without them
+from utils.job_cache import JobListingCache
+from utils.resume_cache import ResumeAnalysisCache
+from utils.report_cache import ReportCache, report_cache_key
+from utils.prefetch import PrefetchCancelled, PrefetchScheduler
+from utils.object_cache import ObjectCache
+from utils.llm_pool import key_fingerprint
+from utils.resume_profile import parse_resume_profile
+from utils.telemetry import set_session, telemetry, usage_tracker
+from utils.rate_limiter import admission
 from decouple import config
 
 # Setting up the page configuration
 st.set_page_config(page_title="Noela's JobBuddy", page_icon="💼", layout="wide")
 
+# Tag every LLM and HTTP call made during this run with the Streamlit session
+script_run_ctx = get_script_run_ctx()
+session_id = script_run_ctx.session_id if script_run_ctx else None
+set_session(session_id)
+
 # Sidebar input for API Key and resume upload
 api_key_input = st.sidebar.text_input("Enter your OpenAI API Key:", type="password")
 uploaded_file = st.sidebar.file_uploader("Upload your Resume:")
+sidebar_greeting = st.sidebar.empty()
 
 # Check if the input is the special keyword to load the API key from the environment
 if api_key_input == config("USERNAME_SECRET"):
@@ -28,24 +44,167 @@ else:
 with st.sidebar:
     page = option_menu(
         "JobBuddy",
-        ["Home", "About Me", "Talk to a Career Coach", "Career Growth Recommendation", "Interview Questions", "Mock Interview"],
-        icons=['house', 'person-circle', 'chat', 'briefcase', 'paperclip', 'mic'],
+        ["Home", "About Me", "Talk to a Career Coach", "Career Growth Recommendation", "Job Recommender", "Interview Questions", "Mock Interview"],
+        icons=['house', 'person-circle', 'chat', 'briefcase', 'search', 'paperclip', 'mic'],
         menu_icon="list",
         default_index=0,
     )
 
+# Persistent resume analysis cache, keyed on the file bytes so it survives restarts and is shared by this replica's processes
+@st.cache_resource
+def get_resume_analysis_cache():
+    return ResumeAnalysisCache()
+
+# Render one section of the resume analysis as soon as it is streamed
+def render_resume_section(section, value):
+    if isinstance(value, dict):
+        lines = [f"- **{key}:** {', '.join(map(str, item)) if isinstance(item, list) else item}" for key, item in value.items()]
+        st.markdown(f"**{section}**\n" + "\n".join(lines))
+    elif isinstance(value, list):
+        lines = [f"- {' | '.join(str(v) for v in item.values() if v) if isinstance(item, dict) else item}" for item in value]
+        st.markdown(f"**{section}**\n" + "\n".join(lines))
+    else:
+        st.markdown(f"**{section}:** {value}")
+
 # Function to initialize the ResumeAnalyzer and return the resume details
-@st.cache_data
 def analyze_resume(api_key, uploaded_file):
-    uploaded_file_bytes = BytesIO(uploaded_file.read())
-    resume_analyzer = ResumeAnalyzer(api_key=api_key, resume_path=uploaded_file)
-    resume_details = resume_analyzer.analyze_resume(file_name=uploaded_file, uploaded_file=uploaded_file_bytes)
+    # The analysis is streamed once per uploaded file; later reruns reuse it from the session
+    file_digest = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+    if st.session_state.get("resume_details_file") == file_digest:
+        return st.session_state.resume_details
+
+    from utils.resume_analyzer import ResumeAnalyzer
+    uploaded_file_bytes = BytesIO(uploaded_file.getvalue())
+    resume_analyzer = ResumeAnalyzer(
+        api_key=api_key,
+        resume_path=uploaded_file,
+        cache=get_resume_analysis_cache(),
+        mode=config("RESUME_ANALYSIS_MODE", default="single"),
+        part_timeout=config("RESUME_ANALYSIS_PART_TIMEOUT", default=60.0, cast=float),
+    )
+    with st.status("Analyzing your resume...", expanded=True) as analysis_status:
+        for section, value in resume_analyzer.stream_analysis(file_name=uploaded_file, uploaded_file=uploaded_file_bytes):
+            render_resume_section(section, value)
+            # Greet the user as soon as the contact details are known
+            if section == "Contact Information" and isinstance(value, dict) and value.get("Name"):
+                sidebar_greeting.markdown(f"👋 Hi **{value['Name']}**!")
+        analysis_status.update(label="Resume analysis", state="complete", expanded=False)
+
+    resume_details = resume_analyzer.last_analysis
+    st.session_state.resume_details_file = file_digest
+    st.session_state.resume_details = resume_details
+    # Skills matched on the raw resume text (matched again on the cached text when the analysis is reused)
+    st.session_state.resume_skills = resume_analyzer.last_resume_skills
     return resume_details
 
-# Function to initialize the CareerBoost instance
+# Parse the analysis into a ResumeProfile once per session (re-parsed only when another resume is analysed)
+def get_resume_profile(resume_details):
+    if st.session_state.get("resume_profile_source") != resume_details:
+        st.session_state.resume_profile = parse_resume_profile(resume_details)
+        st.session_state.resume_profile_source = resume_details
+    return st.session_state.resume_profile
+
+# Generated reports (career recommendations, interview questions), kept in memory and on disk
 @st.cache_resource
-def initialize_career_coach(api_key, resume_details):
-    return CareerBoost(api_key=api_key, candidate_profile=resume_details)
+def get_report_cache():
+    return ReportCache(
+        max_memory_entries=config("REPORT_CACHE_MEMORY_ENTRIES", default=128, cast=int),
+        max_disk_entries=config("REPORT_CACHE_DISK_ENTRIES", default=5000, cast=int),
+        max_age_seconds=config("REPORT_CACHE_MAX_AGE_SECONDS", default=30 * 24 * 60 * 60, cast=float),
+    )
+
+# Agents reused across reruns, bounded in entries and resident bytes and released with their sessions
+@st.cache_resource
+def get_object_cache():
+    return ObjectCache(
+        max_entries=config("JOBBUDDY_OBJECT_CACHE_ENTRIES", default=256, cast=int),
+        max_bytes=config("JOBBUDDY_OBJECT_CACHE_MB", default=64, cast=int) * 1024 * 1024,
+        ttl_seconds=config("JOBBUDDY_OBJECT_CACHE_TTL", default=3600, cast=float) or None,
+    )
+
+# Function to initialize the CareerBoost instance (cached per API key and analysis text; the parsed profile and skills derive from it)
+def initialize_career_coach(api_key, resume_details, resume_profile, resume_skills=None):
+    from utils.career_coach import CareerBoost
+    coach_key = ("career_coach", key_fingerprint(api_key), hashlib.sha256(resume_details.encode("utf-8")).hexdigest())
+    return get_object_cache().get_or_create(
+        coach_key,
+        lambda: CareerBoost(api_key=api_key, candidate_profile=resume_profile, cache=get_report_cache(), resume_skills=resume_skills),
+        session=session_id,
+    )
+
+# Shared on-disk cache of parsed job listings (one per process, backed by SQLite)
+@st.cache_resource
+def get_job_listing_cache():
+    return JobListingCache(ttl_seconds=config("JOB_CACHE_TTL_SECONDS", default=6 * 60 * 60, cast=int))
+
+# Columnar corpus of every listing parsed by this deployment; each live parse is written immediately
+@st.cache_resource
+def get_job_store():
+    from utils.job_store import JobStore
+    return JobStore(flush_rows=1)
+
+# BM25 index of every parsed job listing, shared by all sessions and extended as new listings are parsed
+@st.cache_resource
+def get_job_recommender():
+    from utils.job_recommender import JobRecommender, load_jsonl_listings
+    recommender = JobRecommender()
+    corpus_path = config("JOBBUDDY_JOB_CORPUS", default=None)
+    if corpus_path:
+        recommender.add_many(load_jsonl_listings(corpus_path))
+    return recommender
+
+def sync_job_recommender():
+    # Only listings that are new or were re-parsed since the last visit are indexed
+    recommender = get_job_recommender()
+    for url_key, page_hash, result in get_job_listing_cache().iter_results():
+        if not recommender.is_current(url_key, page_hash):
+            recommender.add(url_key, result, version=page_hash)
+    return recommender
+
+# Background generations started as soon as their inputs exist, shared by all sessions of this process
+@st.cache_resource
+def get_prefetcher():
+    return PrefetchScheduler(
+        max_workers=config("JOBBUDDY_PREFETCH_WORKERS", default=4, cast=int),
+        max_per_user=config("JOBBUDDY_PREFETCH_PER_USER", default=2, cast=int),
+    )
+
+prefetch_enabled = config("JOBBUDDY_PREFETCH", default=True, cast=bool)
+
+# Streamlit has no disconnect hook, so each run releases what sessions that have since disconnected still hold
+def release_disconnected_sessions():
+    if not Runtime.exists():
+        return
+    runtime = Runtime.instance()
+    for gone_session in [user for user in get_object_cache().sessions() if not runtime.is_active_session(user)]:
+        get_object_cache().release_session(gone_session)
+        get_prefetcher().discard(gone_session)
+
+release_disconnected_sessions()
+
+def recommendation_key(career_coach):
+    return report_cache_key("career_recommendation", str(career_coach.candidate_profile) + career_coach.skill_hints, "", career_coach.PROMPT_VERSION, career_coach.model)
+
+def interview_opener_key(mock_int):
+    return report_cache_key("interview_opener", str(mock_int.candidate_details) + mock_int.skill_hints, str(mock_int.job_listing_data), mock_int.PROMPT_VERSION, mock_int.model)
+
+# Latency and token metrics panel, shown with JOBBUDDY_DEBUG=True or ?debug=1
+def render_debug_panel():
+    from utils.structured_job_data import fast_path_stats
+    with st.sidebar.expander("Performance debug"):
+        latency_rows = telemetry.latency_summary()
+        if latency_rows:
+            st.dataframe(latency_rows, hide_index=True)
+        else:
+            st.caption("No calls recorded yet.")
+        st.json(usage_tracker.summary(), expanded=False)
+        admission_stats = admission.stats()
+        st.caption(f"LLM admission queue: {admission_stats['queue_depth']} waiting")
+        st.json(admission_stats, expanded=False)
+        st.json({"report_cache": get_report_cache().stats(), "object_cache": get_object_cache().stats(), "prefetch": get_prefetcher().stats(),
+                 "job_fast_path": fast_path_stats.stats()}, expanded=False)
+        st.download_button("Prometheus metrics", telemetry.prometheus_text(), file_name="jobbuddy_metrics.prom")
+        st.download_button("Recent calls (JSONL)", telemetry.recent_jsonl(), file_name="jobbuddy_calls.jsonl")
 
 # Check if uploaded file are available
 if not api_key:
@@ -55,7 +214,14 @@ elif not uploaded_file:
 elif uploaded_file:
     # Initialize resume details and career coach (this will only run once per session)
     resume_details = analyze_resume(api_key, uploaded_file)
-    career_coach = initialize_career_coach(api_key, resume_details)
+    resume_profile = get_resume_profile(resume_details)
+    if resume_profile.name:
+        sidebar_greeting.markdown(f"👋 Hi **{resume_profile.name}**!")
+    career_coach = initialize_career_coach(api_key, resume_details, resume_profile, st.session_state.get("resume_skills"))
+
+    # Start the career report in the background so the recommendation page can attach to it
+    if prefetch_enabled:
+        get_prefetcher().prefetch(session_id, recommendation_key(career_coach), career_coach.generate_career_recommendation)
 
     # Home page content
     if page == "Home":
@@ -123,13 +289,14 @@ elif uploaded_file:
         """)
 
     elif page == "Talk to a Career Coach":
+        from utils.chat_history import ConversationWindow
         # Initialize chat history if not present
         if "messages" not in st.session_state:
             st.session_state.messages = []
+            st.session_state.coach_history = ConversationWindow()
 
-            # Extract user's name from resume details (ensure it's available)
-            resume_details =  json.loads(resume_details)
-            user_name = resume_details.get("Contact Information", {}).get('Name', 'there')   # Default to "there" if no name found
+            # User's name from the parsed resume profile ("there" if no name found)
+            user_name = resume_profile.display_name
 
             # Define multiple initial personalized messages for Career Coach
             initial_messages = [
@@ -163,7 +330,7 @@ elif uploaded_file:
 
             # Display assistant's response
             with st.chat_message("assistant"):
-                response = st.write_stream(career_coach.career_coach_chat(st.session_state.messages))
+                response = st.write_stream(career_coach.career_coach_chat(st.session_state.messages, history=st.session_state.coach_history))
 
 
             # Add assistant response to chat history
@@ -171,19 +338,81 @@ elif uploaded_file:
     
     elif page == "Career Growth Recommendation":
         #career_recommend =  career_coach.generate_career_recommendation()
-        st.write_stream(career_coach.generate_career_recommendation())
+        regenerate = st.button("Regenerate")
+        if regenerate:
+            get_prefetcher().discard(session_id, recommendation_key(career_coach))
+        prefetched = get_prefetcher().attach(session_id, recommendation_key(career_coach))
+        if prefetched is not None:
+            try:
+                st.write_stream(prefetched.attach())
+            except PrefetchCancelled:
+                # Cancelled between the lookup and the first read: generate it now instead
+                prefetched = None
+        if prefetched is None:
+            st.write_stream(career_coach.generate_career_recommendation(regenerate=regenerate))
     
+    elif page == "Job Recommender":
+        st.header("Job Recommender")
+        from utils.job_recommender import LEVELS
+        recommender = sync_job_recommender()
+        if not len(recommender):
+            st.info("No job listings indexed yet. Listings parsed on the interview pages or with bulk ingestion show up here.")
+        else:
+            location_col, level_col, count_col = st.columns([3, 3, 2])
+            location = location_col.text_input("Location (or \"remote\")")
+            levels = level_col.multiselect("Level", LEVELS)
+            top_k = count_col.number_input("Results", min_value=1, max_value=50, value=10)
+
+            started = time.perf_counter()
+            matches = recommender.recommend(resume_profile.for_interview(), k=int(top_k), location=location, levels=levels)
+            st.caption(f"Ranked {len(recommender)} listings in {(time.perf_counter() - started) * 1000:.0f} ms")
+            if not matches:
+                st.write("No listing matches your profile with these filters.")
+            for match in matches:
+                details = " · ".join(part for part in (match.level.title(), match.location) if part)
+                with st.expander(f"**{match.title or match.job_id}** — {details}"):
+                    if match.job_id.startswith("http"):
+                        st.markdown(f"[Open listing]({match.job_id})")
+                    st.json(match.listing, expanded=False)
+
+        with st.expander("Job market overview"):
+            store = get_job_store()
+            if not len(store):
+                st.caption("No listings stored yet.")
+            else:
+                skills_col, levels_col = st.columns(2)
+                skills_col.write("Most requested skills")
+                skills_col.bar_chart(store.top_skills(15))
+                levels_col.write("Listings per level")
+                levels_col.dataframe(store.count_by("level"))
+
     elif page == "Interview Questions":
         st.header("Interview Questions Guide")
+        from utils.job_post_summarizer import JobScraper
+        from utils.mock_interview import MockInterview
         job_list_url = st.text_input("Enter the url of the job_listing:")
-        if st.button("Generate"):
-            job_scraper=JobScraper(api_key=api_key)
+        generate_col, regenerate_col = st.columns([1, 8])
+        generate = generate_col.button("Generate")
+        regenerate = regenerate_col.button("Regenerate")
+        if generate or regenerate:
+            job_scraper=JobScraper(api_key=api_key, cache=get_job_listing_cache(), store=get_job_store())
             job_post_data = job_scraper.parse_job_listing(job_list_url=job_list_url)
-            mock_int = MockInterview(api_key=api_key, candidate_details=resume_details, job_listing_data=job_post_data)
-            st.write_stream(mock_int.generate_interview_questions())
+            mock_int = MockInterview(api_key=api_key, candidate_details=resume_profile, job_listing_data=job_post_data, cache=get_report_cache(),
+                                     resume_skills=st.session_state.get("resume_skills"), job_skills=job_scraper.last_job_skills)
+            if mock_int.skill_gap.coverage is not None:
+                missing = ", ".join(skill.name for skill in mock_int.skill_gap.missing[:5])
+                st.caption(f"Skill coverage: {mock_int.skill_gap.coverage:.0%}" + (f" · missing: {missing}" if missing else ""))
+
+            # The job is parsed now, so the mock interview opener for it can be prepared while the questions stream
+            if prefetch_enabled:
+                get_prefetcher().prefetch(session_id, interview_opener_key(mock_int), mock_int.stream_start_interview)
+            st.write_stream(mock_int.generate_interview_questions(regenerate=regenerate))
 
     elif page == "Mock Interview":
         st.header("Mock Interview")
+        from utils.chat_history import ConversationWindow
+        from utils.job_post_summarizer import JobScraper
+        from utils.mock_interview import MockInterview
         st.write('To start, please enter the job listing URL to begin the interview.')
 
         # Check if job listing data is already stored in session state
@@ -194,7 +423,7 @@ elif uploaded_file:
                 # If the button is pressed and job listing is not yet parsed
                 if job_list_url:
                     # Parse job listing and store it in session state
-                    job_scraper = JobScraper(api_key=api_key)
+                    job_scraper = JobScraper(api_key=api_key, cache=get_job_listing_cache(), store=get_job_store())
                     job_post_data = job_scraper.parse_job_listing(job_list_url=job_list_url)
                     st.session_state.job_post_data = job_post_data
                 else:
@@ -205,13 +434,20 @@ elif uploaded_file:
 
         if "job_post_data" in st.session_state:
             # Now, initiate the mock interview with the parsed job data and resume details
-            mock_int = MockInterview(api_key=api_key, candidate_details=resume_details, job_listing_data=job_post_data)
+            mock_int = MockInterview(api_key=api_key, candidate_details=resume_profile, job_listing_data=job_post_data,
+                                     resume_skills=st.session_state.get("resume_skills"))
 
             # Initialize chat history if not present
             if "interview" not in st.session_state:
                 st.session_state.interview = []
-
-                response = mock_int.start_interview()
+                st.session_state.interview_history = ConversationWindow()
+
+                # Reuse the opener prefetched when this job was parsed on another page
+                prefetched = get_prefetcher().attach(session_id, interview_opener_key(mock_int))
+                try:
+                    response = prefetched.result() if prefetched is not None else mock_int.start_interview()
+                except PrefetchCancelled:
+                    response = mock_int.start_interview()
                 st.session_state.interview.append({"role": "assistant", "content": response})
 
             # Display previous chat messages
@@ -230,7 +466,13 @@ elif uploaded_file:
 
                 # Display assistant's response
                 with st.chat_message("assistant"):
-                    response = st.write_stream(mock_int.mock_interview_chat(st.session_state.interview))
+                    response = st.write_stream(mock_int.mock_interview_chat(st.session_state.interview, history=st.session_state.interview_history))
 
                 # Add assistant response to chat history
                 st.session_state.interview.append({"role": "assistant", "content": response})
+
+# Metrics are rendered last so they include the calls made during this run
+if config("JOBBUDDY_DEBUG", default=False, cast=bool) or st.query_params.get("debug") == "1":
+    render_debug_panel()
+if config("JOBBUDDY_PROMETHEUS_FILE", default=None):
+    telemetry.write_prometheus(config("JOBBUDDY_PROMETHEUS_FILE"))
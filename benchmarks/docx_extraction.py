@@ -0,0 +1,56 @@
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+import docx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.resume_fixtures import build_docx  # noqa: E402
+from utils.docx_extract import extract_docx_text  # noqa: E402
+
+
+def python_docx_paragraphs(data: bytes) -> str:
+    # The previous ResumeAnalyzer path: full object model, body paragraphs only
+    text = ""
+    for paragraph in docx.Document(io.BytesIO(data)).paragraphs:
+        text += paragraph.text + "\n"
+    return text
+
+
+def streaming_xml(data: bytes) -> str:
+    return extract_docx_text(data).text
+
+
+def measure(extract, data: bytes, repeat: int):
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        text = extract(data)
+        durations.append(time.perf_counter() - started)
+    tracemalloc.start()
+    extract(data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return sorted(durations)[len(durations) // 2], peak, len(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare python-docx and streaming XML extraction of DOCX resumes.")
+    parser.add_argument("--pages", type=int, nargs="*", default=[1, 10, 100], help="Resume copies per document")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement")
+    args = parser.parse_args(argv)
+
+    print(f"{'pages':>6}{'size KiB':>10}  {'extractor':<22}{'p50 ms':>9}{'peak KiB':>10}{'chars':>9}")
+    for pages in args.pages:
+        data = build_docx(pages)
+        for name, extract in (("python-docx paragraphs", python_docx_paragraphs), ("streaming xml", streaming_xml)):
+            p50, peak, chars = measure(extract, data, args.repeat)
+            print(f"{pages:>6}{len(data) / 1024:>10.0f}  {name:<22}{p50 * 1000:>9.1f}{peak / 1024:>10.0f}{chars:>9}")
+
+
+if __name__ == "__main__":
+    main()
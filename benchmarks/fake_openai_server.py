@@ -0,0 +1,161 @@
+import argparse
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RESPONSES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "responses")
+
+# Recorded responses, chosen by a phrase of the system or user prompt
+RECORDED_RESPONSES = [
+    ("expert resume analyzer", "resume_analysis.json"),
+    ("Job Description Analyzer", "job_listing.json"),
+]
+
+SYNTHETIC_WORDS = (
+    "focus on building depth in cloud architecture while keeping your python skills sharp and "
+    "take ownership of a cross team project to show leadership and measurable business impact "
+).split()
+
+
+# Prompts that ask for a subset of a recorded object, e.g. the parts of a fan-out resume analysis
+REQUESTED_KEYS = re.compile(r"Return a JSON object with exactly these keys: (\[.*?\])")
+
+
+def _load_recorded(filename: str) -> str:
+    with open(os.path.join(RESPONSES_DIR, filename), encoding="utf-8") as response_file:
+        return response_file.read()
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+    server_version = "FakeOpenAI/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _choose_response(self, messages: list) -> str:
+        prompt = "\n".join(str(message.get("content", "")) for message in messages)
+        for phrase, filename in RECORDED_RESPONSES:
+            if phrase in prompt:
+                recorded = _load_recorded(filename)
+                requested = REQUESTED_KEYS.search(prompt)
+                if requested:
+                    data = json.loads(recorded)
+                    keys = json.loads(requested.group(1))
+                    return json.dumps({key: data[key] for key in keys if key in data}, indent=4)
+                return recorded
+        words = [SYNTHETIC_WORDS[index % len(SYNTHETIC_WORDS)] for index in range(self.server.completion_tokens)]
+        return " ".join(words)
+
+    def _usage(self, body: dict, completion: str) -> dict:
+        prompt_tokens = max(1, len(json.dumps(body.get("messages", []))) // 4)
+        completion_tokens = len(re.findall(r"\S+\s*", completion))
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": 0},
+        }
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        completion = self._choose_response(body.get("messages", []))
+        usage = self._usage(body, completion)
+        model = body.get("model", "gpt-4o-mini")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+
+        # Time to first token, then a steady token rate
+        time.sleep(self.server.ttft)
+        token_delay = 1.0 / self.server.tokens_per_second if self.server.tokens_per_second else 0.0
+        tokens = re.findall(r"\S+\s*|\s+", completion)
+
+        if not body.get("stream"):
+            time.sleep(token_delay * len(tokens))
+            payload = json.dumps({
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": completion}, "finish_reason": "stop"}],
+                "usage": usage,
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def event(choices, **extra):
+            data = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                    "model": model, "choices": choices, **extra}
+            self._write_chunk(f"data: {json.dumps(data)}\n\n".encode("utf-8"))
+
+        for index, token in enumerate(tokens):
+            delta = {"content": token} if index else {"role": "assistant", "content": token}
+            event([{"index": 0, "delta": delta, "finish_reason": None}])
+            if token_delay:
+                time.sleep(token_delay)
+        event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if (body.get("stream_options") or {}).get("include_usage"):
+            event([], usage=usage)
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), ttft: float = 0.2, tokens_per_second: float = 200.0,
+                 completion_tokens: int = 300):
+        """
+        Local stand-in for the OpenAI chat completions API (streaming and non-streaming).
+
+        :param address: Host and port to listen on (port 0 picks a free port)
+        :param ttft: Seconds before the first token is sent
+        :param tokens_per_second: Streaming rate after the first token (0 for no delay)
+        :param completion_tokens: Length of synthetic responses, in words
+        """
+        super().__init__(address, FakeOpenAIHandler)
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start_in_thread(self) -> "FakeOpenAIServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake OpenAI-compatible chat completions server.")
+    parser.add_argument("--port", type=int, default=8555)
+    parser.add_argument("--ttft", type=float, default=0.2, help="Seconds to first token")
+    parser.add_argument("--tps", type=float, default=200.0, help="Streamed tokens per second")
+    parser.add_argument("--completion-tokens", type=int, default=300, help="Length of synthetic responses")
+    args = parser.parse_args()
+    server = FakeOpenAIServer(("127.0.0.1", args.port), args.ttft, args.tps, args.completion_tokens)
+    print(f"Fake OpenAI API on {server.base_url} (set OPENAI_BASE_URL to use it)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import argparse
+import functools
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+JOBS_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "jobs")
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), directory: str = JOBS_DIR):
+        """
+        Local HTTP server for the fixture job listing pages (with Last-Modified revalidation).
+
+        :param address: Host and port to listen on (port 0 picks a free port)
+        :param directory: Directory with the HTML pages to serve
+        """
+        super().__init__(address, functools.partial(QuietHandler, directory=directory))
+
+    def url(self, filename: str) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/{filename}"
+
+    def start_in_thread(self) -> "FixtureServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the fixture job listing pages.")
+    parser.add_argument("--port", type=int, default=8556)
+    args = parser.parse_args()
+    server = FixtureServer(("127.0.0.1", args.port))
+    print(f"Serving {JOBS_DIR} on {server.url('')}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What the app imports before the first page renders, then what each feature loads on first use
+TARGETS = {
+    "app_cold_start": "import app",
+    "resume_analyzer": "import utils.resume_analyzer",
+    "career_coach": "import utils.career_coach",
+    "mock_interview": "import utils.mock_interview",
+    "job_scraper": "import utils.job_post_summarizer",
+    "job_recommender": "import utils.job_recommender",
+    "job_store": "import utils.job_store",
+}
+
+# Packages that must stay out of the cold start: each one is only needed by some features. pandas and
+# pyarrow are not listed because Streamlit's custom component bridge (the sidebar menu) loads them anyway
+DEFERRED_PACKAGES = ("langchain", "langchain_core", "langchain_openai", "openai", "tiktoken", "PyPDF2", "pypdf",
+                     "fitz", "docx", "bs4", "requests", "scipy")
+
+
+def parse_importtime(stderr: str) -> Tuple[float, Dict[str, float], List[str]]:
+    """
+    Parse the output of python -X importtime.
+
+    :return: Total seconds, self seconds per top-level package and the imported module names
+    """
+    total_us = 0
+    by_package: Dict[str, float] = defaultdict(float)
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        module = name.strip()
+        modules.append(module)
+        by_package[module.split(".")[0]] += int(self_us) / 1e6
+        # Modules printed without indentation were imported directly by the measured statement
+        if not name[1:].startswith(" "):
+            total_us += int(cumulative_us)
+    return total_us / 1e6, dict(by_package), modules
+
+
+def measure(statement: str, repeat: int, env: Dict[str, str]) -> Dict:
+    runs = []
+    for _ in range(repeat + 1):
+        completed = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=ROOT, env=env,
+                                   capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(f"{statement!r} failed:\n{completed.stderr[-2000:]}")
+        runs.append(parse_importtime(completed.stderr))
+    runs = runs[1:]  # The first run also compiles bytecode
+    median_run = sorted(runs, key=lambda run: run[0])[len(runs) // 2]
+    return {
+        "total_s": round(statistics.median(run[0] for run in runs), 4),
+        "packages": {name: round(seconds, 4) for name, seconds in sorted(median_run[1].items(), key=lambda item: -item[1])},
+        "modules": median_run[2],
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Import-time breakdown of the app's cold start and of each feature.")
+    parser.add_argument("--repeat", type=int, default=3, help="Measured runs per target (the median is reported)")
+    parser.add_argument("--top", type=int, default=8, help="Packages listed per target")
+    parser.add_argument("--targets", nargs="*", help="Only measure these targets")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--max-cold-start", type=float, default=None,
+                        help="Fail when the app's cold start imports take longer than this many seconds")
+    args = parser.parse_args(argv)
+
+    # The app runs in bare mode up to the API key prompt; caches go to a throwaway directory
+    env = dict(os.environ, USERNAME_SECRET="import-time-benchmark", JOBBUDDY_CACHE_DIR=tempfile.mkdtemp(prefix="jobbuddy-import-"))
+    env.pop("OPENAI_API_KEY", None)
+
+    results = {}
+    for name, statement in TARGETS.items():
+        if args.targets and name not in args.targets:
+            continue
+        results[name] = measure(statement, args.repeat, env)
+        row = results[name]
+        top = ", ".join(f"{package} {seconds * 1000:.0f}" for package, seconds in list(row["packages"].items())[:args.top])
+        print(f"{name:<18}{row['total_s'] * 1000:>8.0f} ms   {top}")
+
+    failures = []
+    if "app_cold_start" in results:
+        cold_start = results["app_cold_start"]
+        loaded = {module.split(".")[0] for module in cold_start["modules"]}
+        failures += [f"{package} is imported before the first page renders" for package in DEFERRED_PACKAGES if package in loaded]
+        if args.max_cold_start is not None and cold_start["total_s"] > args.max_cold_start:
+            failures.append(f"cold start imports took {cold_start['total_s']:.3f}s (limit {args.max_cold_start:.3f}s)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump({"settings": vars(args), "results": results}, output_file, indent=2)
+
+    for failure in failures:
+        print(f"IMPORT REGRESSION {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
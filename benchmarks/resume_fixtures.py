@@ -0,0 +1,103 @@
+import io
+
+import docx
+
+RESUME_SECTIONS = [
+    ("Jordan Rivera", ["jordan.rivera@example.com | +1 555 0100 | linkedin.com/in/jordan-rivera"]),
+    ("Professional Summary", [
+        "Backend engineer with 6 years of experience building Python services and data pipelines on AWS.",
+    ]),
+    ("Work Experience", [
+        "Backend Engineer, DataCorp (2021 - Present)",
+        "- Cut API p95 latency by 40% by introducing caching and query tuning in PostgreSQL",
+        "- Led the migration of nightly batch jobs to Kafka streaming pipelines",
+        "Software Engineer, WebWorks (2018 - 2021)",
+        "- Built the billing service in Django and introduced CI/CD with GitHub Actions",
+    ]),
+    ("Education", ["BSc Computer Science, State University (2018)"]),
+    ("Certifications", ["AWS Certified Developer - Associate"]),
+    ("Projects", ["Open-source FastAPI rate limiter with Redis backend"]),
+]
+
+SKILLS_TABLE = [
+    ("Languages", "Python, SQL, Go"),
+    ("Frameworks", "FastAPI, Django, Flask"),
+    ("Cloud & DevOps", "AWS, Docker, Kubernetes, Terraform"),
+    ("Data", "PostgreSQL, Kafka, Redis"),
+]
+
+
+def resume_lines(pages: int = 1) -> list:
+    """
+    Plain-text lines of the fixture resume, repeated to fill the requested number of pages.
+    """
+    lines = []
+    for page in range(pages):
+        for heading, body in RESUME_SECTIONS:
+            lines.append(heading if page == 0 else f"{heading} (continued {page})")
+            lines.extend(body)
+        lines.extend(f"{area}: {skills}" for area, skills in SKILLS_TABLE)
+    return lines
+
+
+def build_docx(pages: int = 1) -> bytes:
+    """
+    Fixture resume as DOCX, with the skills matrix in a table like many real resumes.
+    """
+    document = docx.Document()
+    for page in range(pages):
+        for heading, body in RESUME_SECTIONS:
+            document.add_heading(heading, level=1)
+            for line in body:
+                document.add_paragraph(line)
+        table = document.add_table(rows=0, cols=2)
+        for area, skills in SKILLS_TABLE:
+            cells = table.add_row().cells
+            cells[0].text, cells[1].text = area, skills
+        if page < pages - 1:
+            document.add_page_break()
+    output = io.BytesIO()
+    document.save(output)
+    return output.getvalue()
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def build_pdf(pages: int = 1) -> bytes:
+    """
+    Fixture resume as a minimal text PDF (one resume copy per page), without extra dependencies.
+    """
+    page_lines = [resume_lines(1) for _ in range(pages)]
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for lines in page_lines:
+        stream = "BT /F1 10 Tf 14 TL 50 780 Td " + " ".join(f"({_pdf_escape(line)}) '" for line in lines) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        content_id = len(objects)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>")
+        page_ids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{page_id} 0 R' for page_id in page_ids)}] /Count {len(page_ids)} >>"
+
+    output = io.BytesIO()
+    output.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref_offset = output.tell()
+    output.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("ascii"))
+    for offset in offsets:
+        output.write(f"{offset:010d} 00000 n \n".encode("ascii"))
+    output.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("ascii"))
+    return output.getvalue()
+
+
+class NamedBytesIO(io.BytesIO):
+    """BytesIO with a file name, standing in for Streamlit's UploadedFile."""
+
+    def __init__(self, data: bytes, name: str):
+        super().__init__(data)
+        self.name = name
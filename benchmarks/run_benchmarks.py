@@ -0,0 +1,197 @@
+import argparse
+import json
+import math
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterable, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_openai_server import FakeOpenAIServer  # noqa: E402
+from benchmarks.fixture_server import FixtureServer  # noqa: E402
+from benchmarks.resume_fixtures import NamedBytesIO, build_docx, build_pdf  # noqa: E402
+
+API_KEY = "sk-benchmark"
+JOB_PAGE = "senior_backend_engineer.html"
+JSON_LD_JOB_PAGE = "data_engineer_jsonld.html"
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+def _consume(chunks: Iterable[str], started: float, first_chunk: List[float]) -> str:
+    parts = []
+    for chunk in chunks:
+        if not first_chunk:
+            first_chunk.append(time.perf_counter() - started)
+        parts.append(chunk)
+    return "".join(parts)
+
+
+def measure(name: str, flow: Callable[[List[float]], str], repeat: int) -> Dict:
+    """
+    Run one flow several times and summarise latency, time to first chunk, throughput and memory.
+
+    :param flow: Callable running the flow once; it appends the time to first chunk when it streams
+    """
+    durations, ttfts, output_chars, peaks = [], [], 0, []
+    for _ in range(repeat):
+        first_chunk = []
+        tracemalloc.start()
+        started = time.perf_counter()
+        output = flow(first_chunk)
+        durations.append(time.perf_counter() - started)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        ttfts.extend(first_chunk)
+        output_chars += len(output)
+
+    total = sum(durations)
+    result = {
+        "flow": name,
+        "runs": repeat,
+        "mean_s": statistics.mean(durations),
+        "p50_s": _percentile(durations, 0.50),
+        "p95_s": _percentile(durations, 0.95),
+        "runs_per_s": repeat / total if total else 0.0,
+        "output_chars_per_s": output_chars / total if total else 0.0,
+        "peak_python_kib": max(peaks) / 1024,
+    }
+    if ttfts:
+        result["ttft_p50_s"] = _percentile(ttfts, 0.50)
+    return result
+
+
+def build_flows(job_url: str, json_ld_job_url: str, chat_turns: int) -> Dict[str, Callable[[List[float]], str]]:
+    from utils.career_coach import CareerBoost
+    from utils.chat_history import ConversationWindow
+    from utils.job_post_summarizer import JobScraper
+    from utils.mock_interview import MockInterview
+    from utils.resume_analyzer import ResumeAnalyzer
+    from utils.resume_profile import parse_resume_profile
+
+    pdf_bytes, docx_bytes = build_pdf(pages=2), build_docx(pages=2)
+    profile = parse_resume_profile(open(os.path.join(os.path.dirname(__file__), "fixtures", "responses", "resume_analysis.json")).read())
+    job = open(os.path.join(os.path.dirname(__file__), "fixtures", "responses", "job_listing.json")).read()
+
+    def resume_analysis(data: bytes, name: str, mode: str = "single"):
+        def flow(first_chunk):
+            upload = NamedBytesIO(data, name)
+            analyzer = ResumeAnalyzer(api_key=API_KEY, resume_path=upload, mode=mode)
+            return analyzer.analyze_resume(file_name=upload, uploaded_file=NamedBytesIO(data, name))
+        return flow
+
+    def resume_analysis_stream(first_chunk):
+        # Time to the first complete section is reported as the TTFT of this flow
+        upload = NamedBytesIO(pdf_bytes, "resume.pdf")
+        analyzer = ResumeAnalyzer(api_key=API_KEY, resume_path=upload)
+        started = time.perf_counter()
+        for _ in analyzer.stream_analysis(file_name=upload, uploaded_file=NamedBytesIO(pdf_bytes, "resume.pdf")):
+            if not first_chunk:
+                first_chunk.append(time.perf_counter() - started)
+        return analyzer.last_analysis
+
+    def job_parsing(first_chunk):
+        return JobScraper(api_key=API_KEY).parse_job_listing(job_list_url=job_url)
+
+    def job_parsing_json_ld(first_chunk):
+        return JobScraper(api_key=API_KEY).parse_job_listing(job_list_url=json_ld_job_url)
+
+    def interview_questions(first_chunk):
+        mock_int = MockInterview(api_key=API_KEY, candidate_details=profile, job_listing_data=job)
+        return _consume(mock_int.generate_interview_questions(), time.perf_counter(), first_chunk)
+
+    def coach_chat(first_chunk):
+        career_coach = CareerBoost(api_key=API_KEY, candidate_profile=profile)
+        history, messages, output = ConversationWindow(), [], []
+        for turn in range(chat_turns):
+            messages.append({"role": "user", "content": f"Turn {turn}: how should I grow towards a staff engineer role?"})
+            response = _consume(career_coach.career_coach_chat(messages, history=history), time.perf_counter(), first_chunk)
+            messages.append({"role": "assistant", "content": response})
+            output.append(response)
+        return "".join(output)
+
+    return {
+        "resume_analysis_pdf": resume_analysis(pdf_bytes, "resume.pdf"),
+        "resume_analysis_docx": resume_analysis(docx_bytes, "resume.docx"),
+        # Same analysis split into concurrent extraction, critique and ATS calls
+        "resume_analysis_fan_out": resume_analysis(pdf_bytes, "resume.pdf", mode="fan_out"),
+        "resume_analysis_stream": resume_analysis_stream,
+        "job_parsing": job_parsing,
+        "job_parsing_json_ld": job_parsing_json_ld,
+        "interview_questions": interview_questions,
+        f"coach_chat_{chat_turns}_turns": coach_chat,
+    }
+
+
+def compare(results: List[Dict], baseline_path: str, max_regression: float) -> List[str]:
+    with open(baseline_path, encoding="utf-8") as baseline_file:
+        baseline = {row["flow"]: row for row in json.load(baseline_file)["results"]}
+    failures = []
+    for row in results:
+        reference = baseline.get(row["flow"])
+        if reference and row["p50_s"] > reference["p50_s"] * (1 + max_regression):
+            failures.append(f"{row['flow']}: p50 {row['p50_s']:.3f}s vs baseline {reference['p50_s']:.3f}s")
+    return failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmarks against a fake OpenAI server.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per flow")
+    parser.add_argument("--ttft", type=float, default=0.1, help="Simulated seconds to first token")
+    parser.add_argument("--tps", type=float, default=500.0, help="Simulated streamed tokens per second")
+    parser.add_argument("--completion-tokens", type=int, default=200, help="Length of synthetic responses")
+    parser.add_argument("--chat-turns", type=int, default=10, help="Turns of the career coach chat flow")
+    parser.add_argument("--flows", nargs="*", help="Only run flows whose name starts with one of these")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.5, help="Allowed p50 slowdown (0.5 = 50%%)")
+    args = parser.parse_args(argv)
+
+    llm_server = FakeOpenAIServer(ttft=args.ttft, tokens_per_second=args.tps,
+                                  completion_tokens=args.completion_tokens).start_in_thread()
+    page_server = FixtureServer().start_in_thread()
+
+    # Route every client to the local servers and keep caches out of the measurements
+    os.environ["OPENAI_BASE_URL"] = llm_server.base_url
+    os.environ["JOBBUDDY_CACHE_DIR"] = tempfile.mkdtemp(prefix="jobbuddy-bench-")
+
+    flows = build_flows(page_server.url(JOB_PAGE), page_server.url(JSON_LD_JOB_PAGE), args.chat_turns)
+    results = []
+    for name, flow in flows.items():
+        if args.flows and not any(name.startswith(prefix) for prefix in args.flows):
+            continue
+        flow([])  # Warm-up: imports, connection setup, pooled client creation
+        results.append(measure(name, flow, args.repeat))
+
+    header = f"{'flow':<26}{'mean s':>9}{'p50 s':>9}{'p95 s':>9}{'ttft s':>9}{'runs/s':>9}{'chars/s':>10}{'peak KiB':>10}"
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        ttft = f"{row['ttft_p50_s']:.3f}" if "ttft_p50_s" in row else "-"
+        print(f"{row['flow']:<26}{row['mean_s']:>9.3f}{row['p50_s']:>9.3f}{row['p95_s']:>9.3f}{ttft:>9}"
+              f"{row['runs_per_s']:>9.2f}{row['output_chars_per_s']:>10.0f}{row['peak_python_kib']:>10.0f}")
+    max_rss_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"\nmax RSS: {max_rss_mib:.0f} MiB (simulated ttft {args.ttft}s, {args.tps} tokens/s)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump({"settings": vars(args), "max_rss_mib": max_rss_mib, "results": results}, output_file, indent=2)
+
+    if args.compare:
+        failures = compare(results, args.compare, args.max_regression)
+        for failure in failures:
+            print(f"REGRESSION {failure}", file=sys.stderr)
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
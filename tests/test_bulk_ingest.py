@@ -0,0 +1,88 @@
+import asyncio
+import io
+import json
+
+import httpx
+import openai
+import pytest
+
+from utils.bulk_ingest import decode_result, retry_delay, run_ingestion
+from utils.job_post_summarizer import JobScraper
+
+REQUEST = httpx.Request("GET", "https://jobs.example.com/1")
+
+
+def status_error(status_code: int, headers: dict = None) -> httpx.HTTPStatusError:
+    response = httpx.Response(status_code, headers=headers, request=REQUEST)
+    return httpx.HTTPStatusError(f"{status_code}", request=REQUEST, response=response)
+
+
+@pytest.mark.parametrize("error", [
+    status_error(429),
+    status_error(503),
+    httpx.ConnectTimeout("timed out", request=REQUEST),
+    openai.RateLimitError("rate limited", response=httpx.Response(429, request=REQUEST), body=None),
+    openai.APIConnectionError(request=REQUEST),
+])
+def test_transient_errors_are_retried_with_bounded_backoff(error):
+    for attempt in range(6):
+        delay = retry_delay(error, attempt, base_delay=1.0, max_delay=8.0)
+        assert 0 <= delay <= min(8.0, 2 ** attempt)
+
+
+@pytest.mark.parametrize("error", [
+    status_error(404),
+    openai.AuthenticationError("bad key", response=httpx.Response(401, request=REQUEST), body=None),
+    ValueError("unparseable listing"),
+])
+def test_permanent_errors_are_not_retried(error):
+    assert retry_delay(error, 0, base_delay=1.0, max_delay=8.0) is None
+
+
+def test_retry_after_header_is_honoured_and_capped():
+    assert retry_delay(status_error(429, {"Retry-After": "3"}), 0, base_delay=1.0, max_delay=8.0) == 3.0
+    assert retry_delay(status_error(429, {"Retry-After": "120"}), 0, base_delay=1.0, max_delay=8.0) == 8.0
+
+
+def test_decode_result_parses_fenced_json_and_keeps_text():
+    assert decode_result('```json\n{"Position Name": "Analyst"}\n```') == {"Position Name": "Analyst"}
+    assert decode_result("Not a job listing") == "Not a job listing"
+
+
+def test_ingestion_retries_transient_failures_and_reports_permanent_ones(monkeypatch):
+    calls = {}
+
+    async def aparse_job_listing(self, url, client=None):
+        calls[url] = calls.get(url, 0) + 1
+        if url.endswith("/flaky") and calls[url] < 3:
+            raise status_error(429, {"Retry-After": "0"})
+        if url.endswith("/gone"):
+            raise status_error(404)
+        return '{"Position Name": "Analyst"}'
+
+    monkeypatch.setattr(JobScraper, "aparse_job_listing", aparse_job_listing)
+    urls = ["https://jobs.example.com/ok", "https://jobs.example.com/flaky", "https://jobs.example.com/gone"]
+    output = io.StringIO()
+    summary = asyncio.run(run_ingestion(urls, output, "sk-test", per_host_delay=0, max_retries=3, base_delay=0))
+
+    records = {record["url"]: record for record in map(json.loads, output.getvalue().splitlines())}
+    assert records["https://jobs.example.com/ok"]["result"] == {"Position Name": "Analyst"}
+    assert records["https://jobs.example.com/ok"]["attempts"] == 1
+    assert records["https://jobs.example.com/flaky"]["ok"] and records["https://jobs.example.com/flaky"]["attempts"] == 3
+    assert not records["https://jobs.example.com/gone"]["ok"]
+    assert records["https://jobs.example.com/gone"]["attempts"] == 1
+    assert summary["total"] == 3 and summary["succeeded"] == 2 and summary["failed"] == 1 and summary["retries"] == 2
+
+
+def test_ingestion_gives_up_after_max_retries(monkeypatch):
+    async def aparse_job_listing(self, url, client=None):
+        raise status_error(503, {"Retry-After": "0"})
+
+    monkeypatch.setattr(JobScraper, "aparse_job_listing", aparse_job_listing)
+    output = io.StringIO()
+    summary = asyncio.run(run_ingestion(["https://jobs.example.com/1"], output, "sk-test", per_host_delay=0, max_retries=2))
+
+    record = json.loads(output.getvalue())
+    assert not record["ok"] and record["attempts"] == 3
+    assert record["error"].startswith("HTTPStatusError")
+    assert summary["failed"] == 1
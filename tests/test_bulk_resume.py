@@ -0,0 +1,79 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from benchmarks.resume_fixtures import build_docx, build_pdf
+from utils.bulk_resume import ResumePipeline, find_resumes, load_checkpoint
+from utils.resume_analyzer import ResumeAnalyzer
+
+
+@pytest.fixture
+def resume_dir(tmp_path):
+    directory = tmp_path / "resumes"
+    (directory / "nested").mkdir(parents=True)
+    (directory / "b.pdf").write_bytes(build_pdf(pages=2))
+    (directory / "nested" / "a.docx").write_bytes(build_docx(pages=1))
+    (directory / "broken.pdf").write_bytes(b"not a pdf")
+    (directory / "~$lock.docx").write_bytes(b"")
+    (directory / "notes.txt").write_text("ignored")
+    return directory
+
+
+@pytest.fixture
+def analyses(monkeypatch):
+    analysed = []
+
+    async def aanalyze_text(self, resume_text):
+        analysed.append(self.resume)
+        return json.dumps({"Summary": resume_text[:40]})
+
+    monkeypatch.setattr(ResumeAnalyzer, "aanalyze_text", aanalyze_text)
+    return analysed
+
+
+def run_pipeline(paths, output_path, done=None):
+    pipeline = ResumePipeline("sk-test", workers=1, concurrency=2)
+    with open(output_path, "a", encoding="utf-8") as output:
+        return asyncio.run(pipeline.run(paths, output, done))
+
+
+def test_find_resumes_is_sorted_and_skips_other_files(resume_dir):
+    assert [os.path.relpath(path, resume_dir) for path in find_resumes(str(resume_dir))] == \
+        ["b.pdf", "broken.pdf", os.path.join("nested", "a.docx")]
+
+
+def test_checkpoint_ignores_failures_and_a_truncated_last_line(tmp_path):
+    output_path = tmp_path / "out.jsonl"
+    output_path.write_text(
+        json.dumps({"path": "a.pdf", "fingerprint": "10:1", "ok": True}) + "\n"
+        + json.dumps({"path": "b.pdf", "fingerprint": "20:2", "ok": False}) + "\n"
+        + '{"path": "c.pdf", "fingerp'
+    )
+    assert load_checkpoint(str(output_path)) == {"a.pdf": "10:1"}
+    assert load_checkpoint(str(tmp_path / "missing.jsonl")) == {}
+
+
+def test_resumed_run_skips_analysed_files_and_retries_changed_ones(resume_dir, tmp_path, analyses):
+    output_path = str(tmp_path / "out.jsonl")
+    paths = find_resumes(str(resume_dir))
+
+    summary = run_pipeline(paths, output_path)
+    assert summary["total"] == 3 and summary["succeeded"] == 2 and summary["failed"] == 1
+    records = {record["path"]: record for record in map(json.loads, open(output_path, encoding="utf-8"))}
+    assert records[str(resume_dir / "broken.pdf")]["stage"] == "extract"
+    assert sorted(analyses) == sorted([str(resume_dir / "b.pdf"), str(resume_dir / "nested" / "a.docx")])
+
+    # Only the failed file is processed again
+    analyses.clear()
+    summary = run_pipeline(paths, output_path, load_checkpoint(output_path))
+    assert summary["skipped"] == 2 and summary["total"] == 1
+    assert analyses == []
+
+    # A file edited since its analysis no longer matches its fingerprint
+    changed = resume_dir / "b.pdf"
+    changed.write_bytes(build_pdf(pages=3))
+    summary = run_pipeline(paths, output_path, load_checkpoint(output_path))
+    assert summary["skipped"] == 1 and summary["succeeded"] == 1
+    assert analyses == [str(changed)]
@@ -0,0 +1,78 @@
+import io
+import zipfile
+
+import pytest
+
+from benchmarks.resume_fixtures import SKILLS_TABLE, build_docx
+from utils.docx_extract import extract_docx_text
+
+NAMESPACES = (
+    'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+    'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"'
+)
+
+
+def paragraph(text: str) -> str:
+    return f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+def row(*cells: str) -> str:
+    return "<w:tr>" + "".join(f"<w:tc>{cell}</w:tc>" for cell in cells) + "</w:tr>"
+
+
+def build_package(body: str, headers: dict = None, footers: dict = None) -> bytes:
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w") as archive:
+        archive.writestr("word/document.xml", f"<w:document {NAMESPACES}><w:body>{body}</w:body></w:document>")
+        for name, text in (headers or {}).items():
+            archive.writestr(f"word/{name}.xml", f"<w:hdr {NAMESPACES}>{paragraph(text)}</w:hdr>")
+        for name, text in (footers or {}).items():
+            archive.writestr(f"word/{name}.xml", f"<w:ftr {NAMESPACES}>{paragraph(text)}</w:ftr>")
+    return output.getvalue()
+
+
+def test_tables_keep_their_rows_and_cells():
+    extraction = extract_docx_text(build_docx(pages=1))
+    assert extraction.error is None
+    for area, skills in SKILLS_TABLE:
+        assert f"{area} | {skills}" in extraction.blocks
+
+
+def test_headers_come_first_and_repeated_header_lines_are_dropped():
+    data = build_package(
+        paragraph("Experience"),
+        headers={"header2": "Ada Lovelace", "header1": "Ada Lovelace", "header3": "ada@example.com"},
+        footers={"footer1": "Page 1"},
+    )
+    assert extract_docx_text(data).blocks == ["Ada Lovelace", "ada@example.com", "Experience", "Page 1"]
+
+
+def test_nested_tables_and_text_boxes_are_read_once():
+    nested = "<w:tbl>" + row(paragraph("Python"), paragraph("5 years")) + "</w:tbl>"
+    text_box = (
+        "<w:p><w:r><mc:AlternateContent>"
+        f"<mc:Choice><w:txbxContent>{paragraph('Open to relocation')}</w:txbxContent></mc:Choice>"
+        f"<mc:Fallback><w:txbxContent>{paragraph('Open to relocation')}</w:txbxContent></mc:Fallback>"
+        "</mc:AlternateContent></w:r></w:p>"
+    )
+    body = "<w:tbl>" + row(paragraph("Skills"), nested) + "</w:tbl>" + text_box
+    assert extract_docx_text(build_package(body)).blocks == ["Skills | Python | 5 years", "Open to relocation"]
+
+
+def test_tabs_and_breaks_are_kept_inside_a_paragraph():
+    body = "<w:p><w:r><w:t>2019</w:t><w:tab/><w:t>Analyst</w:t><w:br/><w:t>Acme</w:t></w:r></w:p>"
+    assert extract_docx_text(build_package(body)).text == "2019\tAnalyst\nAcme"
+
+
+def test_damaged_document_keeps_the_blocks_read_so_far():
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w") as archive:
+        archive.writestr("word/document.xml", f"<w:document {NAMESPACES}><w:body>{paragraph('Summary')}<w:p><w:r><w:t>Cut")
+    extraction = extract_docx_text(output.getvalue())
+    assert extraction.blocks == ["Summary"]
+    assert extraction.error
+
+
+def test_oversized_upload_is_rejected():
+    with pytest.raises(ValueError):
+        extract_docx_text(build_docx(pages=1), max_bytes=1024)
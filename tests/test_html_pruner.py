@@ -0,0 +1,41 @@
+import os
+
+from bs4 import BeautifulSoup
+
+from utils.html_pruner import prune_job_html
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def _prune(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as fixture:
+        return prune_job_html(BeautifulSoup(fixture.read(), "html.parser")).text
+
+
+def test_article_header_keeps_the_job_title():
+    text = _prune("article_header_job.html")
+    assert "# Machine Learning Engineer" in text
+    assert "Remote, Europe" in text
+    assert "- Build feature pipelines with Spark and Airflow" in text
+
+
+def test_page_banner_header_is_removed():
+    text = _prune("article_header_job.html")
+    assert "Open positions" not in text
+    assert "Sign in" not in text
+
+
+def test_banner_role_is_removed_inside_article():
+    html = ('<body><article><header role="banner">Site banner</header><header><h1>Data Analyst</h1></header>'
+            f'<p>{"Analyse hiring data and report on it. " * 8}</p></article></body>')
+    text = prune_job_html(BeautifulSoup(html, "html.parser")).text
+    assert "# Data Analyst" in text
+    assert "Site banner" not in text
+
+
+def test_body_wrapped_in_a_form_is_kept():
+    text = _prune("webforms_job.html")
+    assert "# GIS Analyst II" in text
+    assert "Department: Public Works" in text
+    assert "- Two years of experience with ArcGIS Pro and enterprise geodatabases" in text
+    assert "VIEWSTATE" not in text
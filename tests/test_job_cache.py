@@ -0,0 +1,67 @@
+import pytest
+
+from utils.job_cache import JobListingCache, normalize_url
+from utils.job_post_summarizer import JobScraper
+
+POSTING = "<p>" + "Design and operate the data platform behind our analytics products. " * 10 + "</p>"
+
+
+@pytest.fixture
+def scraper(tmp_path):
+    return JobScraper(api_key="sk-test", cache=JobListingCache(str(tmp_path / "jobs.sqlite3")))
+
+
+def _page(body: str) -> str:
+    return f"<html><head><title>Careers</title></head><body><main>{body}</main></body></html>"
+
+
+def test_tracking_parameters_share_an_entry():
+    assert normalize_url("HTTPS://Jobs.example.com:443/role/42/?utm_source=x&b=2&a=1#apply") == \
+        "https://jobs.example.com/role/42?a=1&b=2"
+
+
+def test_fresh_entry_is_a_hit_and_expires_after_the_ttl(tmp_path):
+    cache = JobListingCache(str(tmp_path / "jobs.sqlite3"), ttl_seconds=60)
+    cache.put("https://jobs.example.com/1?utm_medium=mail", "hash", '{"Position Name": "Analyst"}', etag='"v1"')
+    entry = cache.get("https://jobs.example.com/1")
+    assert entry["result"] == '{"Position Name": "Analyst"}'
+    assert cache.is_fresh(entry)
+    assert cache.conditional_headers(entry) == {"If-None-Match": '"v1"'}
+
+    cache.ttl_seconds = 0
+    assert not cache.is_fresh(cache.get("https://jobs.example.com/1"))
+
+
+def test_not_modified_response_revalidates_the_entry(scraper):
+    scraper.cache.put("https://jobs.example.com/1", "hash", '{"Position Name": "Analyst"}', etag='"v1"')
+    entry = scraper.cache.get("https://jobs.example.com/1")
+    result, _ = scraper._process_response("https://jobs.example.com/1", entry, 304, {"ETag": '"v1"'}, "")
+    assert result == '{"Position Name": "Analyst"}'
+    assert scraper.cache.stats()["revalidations"] == 1
+
+
+def test_same_posting_under_another_url_reuses_the_parse(scraper):
+    _, page = scraper._process_response("https://board.example.com/a", None, 200, {}, _page(POSTING))
+    scraper._store_result("https://board.example.com/a", page, '{"Position Name": "Data Engineer"}')
+
+    result, _ = scraper._process_response("https://company.example.com/careers/7", None, 200, {}, _page(POSTING))
+    assert result == '{"Position Name": "Data Engineer"}'
+
+
+def test_short_shell_pages_are_not_shared_across_urls(scraper):
+    shell = _page("<h1>Loading…</h1>")
+    _, page = scraper._process_response("https://board.example.com/a", None, 200, {}, shell)
+    scraper._store_result("https://board.example.com/a", page, '{"Position Name": "Data Engineer"}')
+
+    result, _ = scraper._process_response("https://board.example.com/b", None, 200, {}, shell)
+    assert result is None
+    # The same URL still revalidates against its own entry
+    result, _ = scraper._process_response("https://board.example.com/a", scraper.cache.get("https://board.example.com/a"),
+                                          200, {}, shell)
+    assert result == '{"Position Name": "Data Engineer"}'
+
+
+def test_listing_with_unparsed_model_output_is_not_cached(scraper):
+    _, page = scraper._process_response("https://board.example.com/a", None, 200, {}, _page(POSTING))
+    scraper._store_result("https://board.example.com/a", page, '{"Position Name": "Data Engineer", "Unparsed Model Output": "..."}')
+    assert scraper.cache.get("https://board.example.com/a") is None
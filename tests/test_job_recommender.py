@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from utils.job_recommender import JobRecommender, infer_level, load_jsonl_listings
+
+LISTINGS = {
+    "platform": {"Position Name": "Senior Platform Engineer", "Location": "Berlin",
+                 "Required Skills": ["Kubernetes", "Terraform", "Go"], "Job Description": "Run our Kubernetes clusters."},
+    "data": {"Position Name": "Data Engineer", "Location": "Remote",
+             "Required Skills": ["Python", "Airflow", "SQL"], "Job Description": "Build batch pipelines in Python."},
+    "frontend": {"Position Name": "Junior Frontend Developer", "Location": "Paris",
+                 "Required Skills": ["React", "TypeScript"], "Job Description": "Ship product UI."},
+    "analyst": {"Position Name": "Data Analyst Intern",
+                "Required Skills": ["SQL", "Python"], "Job Description": "Reporting, fully remote team."},
+}
+
+
+@pytest.fixture
+def recommender():
+    recommender = JobRecommender()
+    recommender.add_many(LISTINGS.items())
+    return recommender
+
+
+def ids(matches):
+    return [match.job_id for match in matches]
+
+
+def test_best_matching_listing_ranks_first(recommender):
+    matches = recommender.recommend("Building Airflow pipelines with Python and SQL", k=4)
+    assert ids(matches)[0] == "data"
+    assert "frontend" not in ids(matches) and "platform" not in ids(matches)
+    assert [match.score for match in matches] == sorted((match.score for match in matches), reverse=True)
+
+
+def test_skill_aliases_match_through_the_canonical_skill(recommender):
+    # "k8s" never appears in a listing; it matches through the shared skill term
+    assert ids(recommender.recommend("k8s")) == ["platform"]
+    assert recommender.recommend("k9s") == []
+
+
+def test_filters_on_level_and_location(recommender):
+    profile = "Python SQL"
+    assert ids(recommender.recommend(profile, levels=["intern"])) == ["analyst"]
+    # A stated location is matched on its field; a listing without one is matched on its text
+    assert sorted(ids(recommender.recommend(profile, location="remote"))) == ["analyst", "data"]
+    assert recommender.recommend(profile, location="Paris") == []
+
+
+def test_readding_a_listing_replaces_it(recommender):
+    recommender.add("data", {"Position Name": "Data Engineer", "Required Skills": ["Scala", "Spark"]}, version="v2")
+    assert len(recommender) == 4
+    assert recommender.is_current("data", "v2")
+    assert "data" not in ids(recommender.recommend("Airflow pipelines"))
+    assert ids(recommender.recommend("Spark and Scala")) == ["data"]
+
+
+def test_top_k_and_batched_profiles_match_single_queries(recommender):
+    profiles = ["Python SQL reporting", "React TypeScript UI", "Kubernetes"]
+    batched = recommender.recommend_many(profiles, k=1)
+    assert [ids(matches) for matches in batched] == [ids(recommender.recommend(profile, k=1)) for profile in profiles]
+    assert all(len(matches) == 1 for matches in batched)
+
+
+def test_empty_index_returns_no_matches():
+    assert JobRecommender().recommend("Python") == []
+
+
+@pytest.mark.parametrize("title, level", [
+    ("Software Engineering Intern", "intern"),
+    ("VP of Engineering", "executive"),
+    ("Engineering Manager", "manager"),
+    ("Staff Engineer", "lead"),
+    ("Sr. Data Scientist", "senior"),
+    ("Graduate Analyst", "junior"),
+    ("Backend Engineer", "mid"),
+    (None, "mid"),
+])
+def test_infer_level(title, level):
+    assert infer_level(title) == level
+
+
+def test_jsonl_loader_skips_failed_records(tmp_path):
+    path = tmp_path / "listings.jsonl"
+    path.write_text("\n".join([
+        json.dumps({"url": "https://jobs.example.com/1", "ok": True, "result": LISTINGS["data"]}),
+        json.dumps({"url": "https://jobs.example.com/2", "ok": False, "error": "HTTPStatusError: 404"}),
+        "",
+        json.dumps({"ok": True, "result": LISTINGS["frontend"]}),
+    ]))
+    assert list(load_jsonl_listings(str(path))) == [
+        ("https://jobs.example.com/1", LISTINGS["data"]),
+        (f"{path}:4", LISTINGS["frontend"]),
+    ]
@@ -0,0 +1,70 @@
+from utils.job_store import JobStore
+
+
+def _listing(title: str, skills=("Python",), benefits: str = "Remote work") -> dict:
+    return {"Position Name": title, "Required Skills & Experience": list(skills), "Benefits": benefits}
+
+
+def test_query_filters_the_latest_parse_of_each_job(tmp_path):
+    store = JobStore(str(tmp_path), flush_rows=1)
+    store.append("a", _listing("Data Engineer"))
+    store.append("a", _listing("Product Manager", skills=("Jira",)))
+    store.append("b", _listing("Senior Data Engineer"))
+
+    assert store.query(title="Data")["job_id"].tolist() == ["b"]
+    assert store.query(title="Product")["job_id"].tolist() == ["a"]
+    assert sorted(store.query(title="Data", latest_only=False)["job_id"]) == ["a", "b"]
+    assert store.query(skills=["Python"])["job_id"].tolist() == ["b"]
+
+
+def test_aggregates_count_only_the_latest_parse(tmp_path):
+    store = JobStore(str(tmp_path), flush_rows=1)
+    store.append("a", _listing("Junior Data Engineer"))
+    store.append("a", _listing("Senior Data Engineer", skills=("Go",)))
+    store.append("b", _listing("Senior Python Developer"))
+
+    assert len(store) == 2
+    assert store.count_by("level").to_dict() == {"senior": 2}
+    assert store.count_by("level", title="Junior").empty
+    assert store.top_skills(skills=["Python"]).to_dict() == {"Python": 1}
+
+
+def test_latest_parse_wins_within_the_same_second(tmp_path):
+    store = JobStore(str(tmp_path), flush_rows=2)
+    store.append("a", _listing("Data Engineer"))
+    store.append("a", _listing("Data Analyst"))
+    assert store.query()["title"].tolist() == ["Data Analyst"]
+
+
+def test_compaction_merges_segments_of_similar_size(tmp_path):
+    store = JobStore(str(tmp_path), flush_rows=1)
+    for index in range(21):
+        store.append(f"job-{index}", _listing("Data Engineer"))
+    # Every 4 single-row segments merge into one of 4 rows, and every 4 of those into one of 16
+    assert sorted(segment["rows"] for segment in store._read_manifest()["segments"]) == [1, 4, 16]
+    assert len(store) == 21
+    assert sorted(store.query()["job_id"]) == sorted(f"job-{index}" for index in range(21))
+
+
+def test_scan_started_before_a_compaction_still_reads_its_segments(tmp_path):
+    store = JobStore(str(tmp_path), flush_rows=1)
+    for index in range(3):
+        store.append(f"job-{index}", _listing("Data Engineer"))
+    dataset = store.dataset()
+    store.append("job-3", _listing("Data Engineer"))  # Fills the tier and merges the first four segments
+
+    assert len(store._read_manifest()["segments"]) == 1
+    assert dataset.to_table(columns=["job_id"]).num_rows == 3
+
+
+def test_retired_segments_are_deleted_after_the_grace_period(tmp_path, monkeypatch):
+    store = JobStore(str(tmp_path), flush_rows=1)
+    for index in range(4):
+        store.append(f"job-{index}", _listing("Data Engineer"))
+    retired = [segment["file"] for segment in store._read_manifest()["retired"]]
+    assert len(retired) == 4 and all((tmp_path / name).exists() for name in retired)
+
+    monkeypatch.setattr("utils.job_store.RETIRED_SEGMENT_SECONDS", 0)
+    store.append("job-4", _listing("Data Engineer"))
+    assert store._read_manifest()["retired"] == []
+    assert not any((tmp_path / name).exists() for name in retired)
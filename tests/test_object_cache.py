@@ -0,0 +1,93 @@
+import threading
+import time
+
+from utils.object_cache import ObjectCache, approximate_size
+
+
+class Agent:
+    def __init__(self, profile: str, llm=None):
+        self.profile = profile
+        self.llm = llm
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ObjectCache(max_entries=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"
+    cache.put("c", "C")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+    assert cache.stats()["evicted_lru"] == 1
+
+
+def test_byte_limit_evicts_and_rejects_oversized_values():
+    cache = ObjectCache(max_bytes=100)
+    cache.put("a", "A", size=60)
+    cache.put("b", "B", size=60)
+    assert cache.get("a") is None
+    assert cache.stats()["resident_bytes"] == 60
+
+    assert cache.put("huge", "H", size=500) == "H"
+    assert cache.get("huge") is None
+    assert cache.get("b") == "B"
+    assert cache.stats()["oversized"] == 1
+
+
+def test_idle_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = ObjectCache(ttl_seconds=60)
+    cache.put("a", "A")
+    cache.put("b", "B")
+
+    now[0] += 45
+    assert cache.get("a") == "A"
+    now[0] += 45
+    assert cache.get("a") == "A"
+    assert cache.get("b") is None
+    assert cache.stats()["evicted_ttl"] == 1
+
+
+def test_released_session_drops_only_entries_nobody_else_uses():
+    cache = ObjectCache()
+    cache.put("shared", "S", session="one")
+    cache.get("shared", session="two")
+    cache.put("private", "P", session="one")
+    cache.put("global", "G")
+
+    assert cache.release_session("one") == 1
+    assert cache.get("private") is None
+    assert cache.get("shared") == "S" and cache.get("global") == "G"
+    assert cache.sessions() == {"two"}
+
+    assert cache.release_session("two") == 1
+    assert cache.get("global") == "G"
+    assert cache.stats()["released_entries"] == 2
+
+
+def test_concurrent_creation_keeps_one_object():
+    cache = ObjectCache()
+    barrier = threading.Barrier(8)
+    results = []
+
+    def factory():
+        barrier.wait()
+        return Agent("profile")
+
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_create("agent", factory))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(result) for result in results}) == 1
+    assert cache.stats()["entries"] == 1
+
+
+def test_approximate_size_counts_owned_data_not_shared_clients():
+    shared_client = Agent("x" * 100_000)
+    small, large = Agent("x" * 100, llm=shared_client), Agent("x" * 10_000, llm=shared_client)
+    assert approximate_size(large) - approximate_size(small) >= 9_900
+    assert approximate_size(small) < 1_000
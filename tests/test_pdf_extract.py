@@ -0,0 +1,17 @@
+from benchmarks.resume_fixtures import build_pdf
+from utils.pdf_extract import extract_pdf_text
+
+
+def test_parallel_extraction_matches_local_extraction():
+    data = build_pdf(pages=18)
+    local = extract_pdf_text(data, parallel_min_pages=0)
+    parallel = extract_pdf_text(data, parallel_min_pages=16)
+    assert parallel.parallel and not local.parallel
+    assert [page.index for page in parallel.pages] == list(range(18))
+    assert parallel.text == local.text
+
+
+def test_page_limit_truncates_long_documents():
+    extraction = extract_pdf_text(build_pdf(pages=6), max_pages=4)
+    assert len(extraction.pages) == 4
+    assert extraction.truncated
@@ -0,0 +1,42 @@
+import threading
+
+import pytest
+
+from utils.prefetch import BufferedStream, PrefetchCancelled, PrefetchScheduler
+
+
+def _gated(release: threading.Event):
+    def generate():
+        yield "first "
+        release.wait(5)
+        yield "second"
+    return generate
+
+
+def test_discard_keeps_an_attached_reader_whole():
+    scheduler, release = PrefetchScheduler(max_workers=1), threading.Event()
+    scheduler.prefetch("user", "key", _gated(release))
+    reader = scheduler.attach("user", "key").attach()
+    assert next(reader) == "first "
+
+    scheduler.discard("user", "key")
+    release.set()
+    assert "".join(reader) == "second"
+    assert scheduler.stats()["cancelled"] == 0
+
+
+def test_reader_of_a_cancelled_stream_is_told_to_regenerate():
+    stream = BufferedStream("key")
+    assert stream.cancel()
+    with pytest.raises(PrefetchCancelled):
+        stream.result()
+
+
+def test_discard_cancels_an_unread_generation():
+    scheduler, release = PrefetchScheduler(max_workers=1), threading.Event()
+    stream = scheduler.prefetch("user", "key", _gated(release))
+    scheduler.discard("user", "key")
+    release.set()
+    assert stream.cancelled
+    assert scheduler.attach("user", "key") is None
+    assert scheduler.stats()["cancelled"] == 1
@@ -0,0 +1,44 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from utils.rate_limiter import AdmissionScheduler
+
+
+def _llm(api_key: str):
+    return SimpleNamespace(openai_api_key=api_key, max_tokens=16)
+
+
+def test_new_key_is_admitted_when_every_tracked_key_has_waiters():
+    scheduler = AdmissionScheduler(requests_per_minute=1, max_wait=1.0, max_keys=2)
+    errors = []
+
+    def wait_in_line(api_key: str):
+        try:
+            scheduler.acquire(_llm(api_key), ["hello"])
+        except TimeoutError as error:
+            errors.append(error)
+
+    # Each key spends its only request, then gets a caller queued behind it
+    waiters = []
+    for api_key in ("first", "second"):
+        scheduler.release(scheduler.acquire(_llm(api_key), ["hello"]))
+        waiters.append(threading.Thread(target=wait_in_line, args=(api_key,)))
+        waiters[-1].start()
+    while sum(key["queued"] for key in scheduler.stats()["keys"].values()) < 2:
+        time.sleep(0.01)
+
+    ticket = scheduler.acquire(_llm("third"), ["hello"])
+    scheduler.release(ticket)
+    assert len(scheduler.stats()["keys"]) == 3
+
+    for waiter in waiters:
+        waiter.join()
+    assert len(errors) == 2
+
+
+def test_idle_keys_are_evicted_beyond_the_limit():
+    scheduler = AdmissionScheduler(requests_per_minute=60, max_keys=2)
+    for api_key in ("first", "second", "third"):
+        scheduler.release(scheduler.acquire(_llm(api_key), ["hello"]))
+    assert len(scheduler.stats()["keys"]) == 2
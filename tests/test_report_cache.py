@@ -0,0 +1,115 @@
+import asyncio
+import time
+
+import pytest
+
+from utils.report_cache import ReportCache, replay_chunks, report_cache_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ReportCache(str(tmp_path / "reports.sqlite3"), max_memory_entries=2)
+
+
+def counting_generator(chunks):
+    calls = []
+
+    def generate():
+        calls.append(1)
+        yield from chunks
+
+    return generate, calls
+
+
+def test_cache_key_changes_with_prompt_version_and_model():
+    key = report_cache_key("career_recommendation", "profile", "", "v1", "gpt-4o-mini")
+    assert key == report_cache_key("career_recommendation", "profile", "", "v1", "gpt-4o-mini")
+    assert key != report_cache_key("career_recommendation", "profile", "", "v2", "gpt-4o-mini")
+    assert key != report_cache_key("career_recommendation", "profile", "", "v1", "gpt-4o")
+    assert key != report_cache_key("interview_questions", "profile", "", "v1", "gpt-4o-mini")
+
+
+def test_replay_chunks_keeps_whitespace():
+    report = "## Summary\n\nA  strong   candidate.\n- Python\n"
+    assert "".join(replay_chunks(report, words_per_chunk=2)) == report
+
+
+def test_stream_replays_stored_report(cache):
+    generate, calls = counting_generator(["Learn ", "Rust."])
+    assert "".join(cache.stream("key", generate)) == "Learn Rust."
+    assert "".join(cache.stream("key", generate)) == "Learn Rust."
+    assert len(calls) == 1
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_disk_tier_survives_a_new_process(cache):
+    cache.put("key", "Stored report")
+    reopened = ReportCache(cache.path)
+    assert reopened.get("key") == "Stored report"
+    assert reopened.stats()["disk_hits"] == 1
+
+
+def test_regenerate_overwrites_stored_report(cache):
+    cache.put("key", "Old report")
+    generate, calls = counting_generator(["New ", "report"])
+    assert "".join(cache.stream("key", generate, regenerate=True)) == "New report"
+    assert ReportCache(cache.path).get("key") == "New report"
+    assert cache.stats()["regenerations"] == 1
+
+
+def test_interrupted_stream_is_not_stored(cache):
+    def generate():
+        yield "Partial"
+        raise RuntimeError("connection reset")
+
+    with pytest.raises(RuntimeError):
+        "".join(cache.stream("key", generate))
+    assert cache.get("key") is None
+
+
+@pytest.mark.parametrize("report", ["", "  \n"])
+def test_empty_report_is_not_stored(cache, report):
+    generate, calls = counting_generator([report] if report else [])
+    assert "".join(cache.stream("key", generate)) == report
+    assert cache.get("key") is None
+    assert cache.stats()["entries"] == 0
+
+    # The next request generates again instead of replaying an empty analysis
+    list(cache.stream("key", generate))
+    assert len(calls) == 2
+
+
+def test_astream_stores_and_replays(cache):
+    async def generate():
+        for chunk in ["Async ", "report"]:
+            yield chunk
+
+    async def collect():
+        return "".join([chunk async for chunk in cache.astream("key", generate)])
+
+    assert asyncio.run(collect()) == "Async report"
+    assert ReportCache(cache.path).get("key") == "Async report"
+    assert asyncio.run(collect()) == "Async report"
+
+
+def test_disk_tier_keeps_newest_entries(tmp_path):
+    cache = ReportCache(str(tmp_path / "reports.sqlite3"), max_memory_entries=0, max_disk_entries=3)
+    for index in range(5):
+        cache.put(f"key-{index}", f"Report {index}")
+
+    assert cache.stats()["entries"] == 3
+    assert cache.get("key-0") is None and cache.get("key-1") is None
+    assert cache.get("key-4") == "Report 4"
+
+
+def test_expired_reports_are_not_served_and_are_pruned(tmp_path, monkeypatch):
+    cache = ReportCache(str(tmp_path / "reports.sqlite3"), max_memory_entries=0, max_age_seconds=60)
+    cache.put("old", "Old report")
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    assert cache.get("old") is None
+
+    cache.put("new", "New report")
+    assert cache.stats()["entries"] == 1
+    assert cache.get("new") == "New report"
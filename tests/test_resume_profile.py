@@ -0,0 +1,31 @@
+import json
+
+from utils.resume_profile import parse_resume_profile, repair_json
+
+
+def test_python_literals_inside_strings_are_kept():
+    analysis = '{"Work Experience": [{"Title": "Analyst", "Company": "None Such Ltd", "Current": True}], "Certifications": None}'
+    data = json.loads(repair_json(analysis))
+    assert data["Work Experience"][0]["Company"] == "None Such Ltd"
+    assert data["Work Experience"][0]["Current"] is True
+    assert data["Certifications"] is None
+
+
+def test_smart_quotes_inside_values_with_trailing_comma():
+    analysis = ('{"Contact Information": {"Name": "Jane Doe",}, '
+                '"Professional Summary": "Known as the “go-to” engineer for data pipelines",}')
+    profile = parse_resume_profile(analysis)
+    assert profile.name == "Jane Doe"
+    assert profile.summary == "Known as the “go-to” engineer for data pipelines"
+    assert not profile.unparsed
+
+
+def test_smart_quoted_strings_are_straightened():
+    data = json.loads(repair_json('{“Contact Information”: {“Name”: “Jane \"JD\" Doe”}}'))
+    assert data["Contact Information"]["Name"] == 'Jane "JD" Doe'
+
+
+def test_truncated_output_is_closed():
+    data = json.loads(repair_json('{"Skills": ["Python", "SQL"], "Professional Summary": "Builds pipel'))
+    assert data["Skills"] == ["Python", "SQL"]
+    assert data["Professional Summary"] == "Builds pipel"
@@ -0,0 +1,52 @@
+import pytest
+
+from utils.skills import SkillMatcher, extract_skills, skill_gap
+
+
+def _names(text: str) -> set:
+    return {skill.name for skill in extract_skills(text)}
+
+
+@pytest.mark.parametrize("text, skill", [
+    ("Led our Go-to-market strategy", "Go"),
+    ("Owned the Go to market plan and the Go-live", "Go"),
+    ("Ten years of R&D leadership", "R"),
+    ("John R. Smith, Product Manager", "R"),
+    ("Completed an internship in the Spring 2020 semester", "Spring"),
+    ("Spring/Summer term coordinator", "Spring"),
+    ("Excel at building relationships with customers", "Excel"),
+    ("I want to express my interest in this role", "Express.js"),
+])
+def test_ordinary_words_are_not_skills(text, skill):
+    assert skill not in _names(text)
+
+
+@pytest.mark.parametrize("text, skill", [
+    ("Languages: Python, Go and Rust", "Go"),
+    ("Built microservices in Go to replace a monolith", "Go"),
+    ("Statistics in R, SQL and Python", "R"),
+    ("Java, Spring Boot, Hibernate", "Spring"),
+    ("Backend services with Java and Spring", "Spring"),
+    ("Advanced Excel and Tableau reporting", "Excel"),
+    ("REST APIs with Express.js on Node.js", "Express.js"),
+])
+def test_skill_mentions_are_found(text, skill):
+    assert skill in _names(text)
+
+
+def test_overlapping_aliases_keep_the_longest_match():
+    matcher = SkillMatcher({"framework": {"React": ["=React"], "React Native": []}})
+    assert [skill.name for _, _, skill in matcher.iter_matches("Shipped apps in React Native")] == ["React Native"]
+
+
+def test_guarded_alias_from_a_custom_taxonomy():
+    matcher = SkillMatcher({"tool": {"Jira": [{"alias": "=Jira", "unless_followed_by": r"\s+Align"}]}})
+    assert matcher.extract("Jira Align rollout") == {}
+    assert [skill.name for skill in matcher.extract("Tracked work in Jira")] == ["Jira"]
+
+
+def test_skill_gap_weights_coverage_by_mentions():
+    gap = skill_gap(extract_skills("Python and Docker"), extract_skills("Python, Python, Kubernetes"))
+    assert [skill.name for skill in gap.matched] == ["Python"]
+    assert [skill.name for skill in gap.missing] == ["Kubernetes"]
+    assert gap.coverage == pytest.approx(2 / 3)
@@ -0,0 +1,45 @@
+import json
+import os
+
+from bs4 import BeautifulSoup
+
+from utils.structured_job_data import (JOB_FIELDS, UNPARSED_OUTPUT_FIELD, find_job_posting, map_job_posting,
+                                       merge_job_fields, missing_fields)
+
+JOBS = os.path.join(os.path.dirname(__file__), os.pardir, "benchmarks", "fixtures", "jobs")
+
+PARTIAL = {"Position Name": "Data Engineer", "Position Overview": "Build pipelines.", "Key Responsibilities": ["Run Spark jobs"]}
+
+
+def test_json_ld_posting_covers_every_required_field():
+    with open(os.path.join(JOBS, "data_engineer_jsonld.html"), encoding="utf-8") as page:
+        posting, source = find_job_posting(BeautifulSoup(page.read(), "html.parser"))
+    fields = map_job_posting(posting)
+    assert source == "json-ld"
+    assert fields["Position Name"] == "Data Engineer"
+    assert "Strong Python and SQL" in fields["Required Skills & Experience"]
+    assert missing_fields(fields) == []
+
+
+def test_missing_required_field_requests_every_empty_field():
+    assert missing_fields(None) == JOB_FIELDS
+    assert missing_fields(PARTIAL) == [field for field in JOB_FIELDS if field not in PARTIAL]
+
+
+def test_merge_fills_only_missing_fields_from_repaired_output():
+    model_output = '```json\n{"Position Name": "Ignored", "Required Skills & Experience": ["Python", "SQL",],}\n```'
+    merged = json.loads(merge_job_fields(PARTIAL, model_output))
+    assert merged["Position Name"] == "Data Engineer"
+    assert merged["Required Skills & Experience"] == ["Python", "SQL"]
+    assert UNPARSED_OUTPUT_FIELD not in merged
+
+
+def test_unparseable_output_is_kept_with_a_warning(caplog):
+    merged = json.loads(merge_job_fields(PARTIAL, "Sorry, the page did not contain a job description."))
+    assert merged["Key Responsibilities"] == ["Run Spark jobs"]
+    assert merged[UNPARSED_OUTPUT_FIELD] == "Sorry, the page did not contain a job description."
+    assert "Could not parse the model output" in caplog.text
+
+
+def test_without_structured_data_the_model_output_is_returned_as_is():
+    assert merge_job_fields(None, '{"Position Name": "Analyst"}') == '{"Position Name": "Analyst"}'
@@ -0,0 +1,236 @@
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Iterable, Optional
+
+import httpx
+import openai
+from decouple import config
+
+from utils.job_cache import JobListingCache
+from utils.job_store import JobStore
+from utils.job_post_summarizer import JobScraper
+from utils.json_utils import strip_code_fence
+from utils.rate_limiter import BATCH, set_priority
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class PoliteTransport(httpx.AsyncBaseTransport):
+    def __init__(self, per_host: int = 2, per_host_delay: float = 0.5, transport: httpx.AsyncBaseTransport = None):
+        """
+        httpx transport that limits concurrent requests and request rate per job board host.
+
+        :param per_host: Maximum number of in-flight requests to one host
+        :param per_host_delay: Minimum seconds between two requests to the same host
+        :param transport: Underlying transport (defaults to httpx.AsyncHTTPTransport)
+        """
+        self._transport = transport or httpx.AsyncHTTPTransport()
+        self._per_host = per_host
+        self._per_host_delay = per_host_delay
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._next_request_at: Dict[str, float] = defaultdict(float)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self._per_host))
+        async with semaphore:
+            # Reserve the next slot for this host before sleeping so concurrent requests queue up
+            now = time.monotonic()
+            start_at = max(now, self._next_request_at[host])
+            self._next_request_at[host] = start_at + self._per_host_delay
+            if start_at > now:
+                await asyncio.sleep(start_at - now)
+            return await self._transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class RequestRateLimiter:
+    def __init__(self, requests_per_minute: Optional[float]):
+        """
+        Spaces out LLM requests evenly to stay under a requests-per-minute limit.
+
+        :param requests_per_minute: Allowed requests per minute; None disables the limit
+        """
+        self._interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self._interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_at)
+            self._next_at = start_at + self._interval
+        if start_at > now:
+            await asyncio.sleep(start_at - now)
+
+
+def retry_delay(error: Exception, attempt: int, base_delay: float, max_delay: float) -> Optional[float]:
+    """
+    Seconds to wait before retrying after an error, or None when the error is not retryable.
+    """
+    response = getattr(error, "response", None)
+    if isinstance(error, httpx.HTTPStatusError) or isinstance(error, openai.APIStatusError):
+        if response is None or response.status_code not in RETRYABLE_STATUS_CODES:
+            return None
+    elif not isinstance(error, (httpx.TransportError, openai.APIConnectionError, openai.APITimeoutError)):
+        return None
+
+    # Honour the server's Retry-After when present, otherwise exponential backoff with full jitter
+    if response is not None:
+        try:
+            return min(max_delay, float(response.headers.get("Retry-After")))
+        except (TypeError, ValueError):
+            pass
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+def decode_result(result: str):
+    try:
+        return json.loads(strip_code_fence(result))
+    except ValueError:
+        return result
+
+
+async def ingest_job_listings(urls: Iterable[str], api_key: str, cache: JobListingCache = None, store: JobStore = None,
+                              concurrency: int = 8, per_host: int = 2, per_host_delay: float = 0.5,
+                              requests_per_minute: float = None, max_retries: int = 5,
+                              base_delay: float = 1.0, max_delay: float = 60.0) -> AsyncIterator[Dict]:
+    """
+    Parse many job listings concurrently and yield each result as soon as it completes.
+
+    :param urls: Job listing URLs
+    :param api_key: OpenAI API key
+    :param cache: Optional JobListingCache shared with the app, so already parsed listings are skipped
+    :param store: Optional JobStore receiving every newly parsed listing
+    :param concurrency: Maximum number of listings parsed at once (size this from the OpenAI rate limits)
+    :param per_host: Maximum number of concurrent requests to one job board host
+    :param per_host_delay: Minimum seconds between two requests to the same host
+    :param requests_per_minute: Optional cap on LLM requests per minute
+    :param max_retries: Retries on 429/5xx and transport errors before a listing is reported as failed
+    :param base_delay: Initial backoff delay in seconds
+    :param max_delay: Upper bound of a single backoff delay in seconds
+    :return: Async iterator of result dictionaries with url, ok, result or error, attempts and seconds
+    """
+    # Bulk parses queue behind interactive calls sharing the same API key
+    set_priority(BATCH)
+    job_scraper = JobScraper(api_key=api_key, cache=cache, store=store)
+    semaphore = asyncio.Semaphore(concurrency)
+    rate_limiter = RequestRateLimiter(requests_per_minute)
+    transport = PoliteTransport(per_host=per_host, per_host_delay=per_host_delay)
+
+    async with httpx.AsyncClient(transport=transport, follow_redirects=True,
+                                 limits=httpx.Limits(max_connections=concurrency * 2)) as client:
+        async def parse(url: str) -> Dict:
+            started = time.perf_counter()
+            async with semaphore:
+                for attempt in range(max_retries + 1):
+                    try:
+                        await rate_limiter.wait()
+                        result = await job_scraper.aparse_job_listing(url, client=client)
+                        return {"url": url, "ok": True, "result": decode_result(result),
+                                "attempts": attempt + 1, "seconds": round(time.perf_counter() - started, 3)}
+                    except Exception as e:
+                        delay = retry_delay(e, attempt, base_delay, max_delay) if attempt < max_retries else None
+                        if delay is None:
+                            return {"url": url, "ok": False, "error": f"{type(e).__name__}: {e}",
+                                    "attempts": attempt + 1, "seconds": round(time.perf_counter() - started, 3)}
+                        logger.warning("Retrying %s in %.1fs after %s", url, delay, e)
+                        await asyncio.sleep(delay)
+
+        tasks = [asyncio.create_task(parse(url)) for url in urls]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+async def run_ingestion(urls: Iterable[str], output, api_key: str, **options) -> Dict:
+    """
+    Stream ingestion results to a JSONL file object and return a throughput summary.
+
+    :param urls: Job listing URLs
+    :param output: Text file object receiving one JSON line per listing
+    :param api_key: OpenAI API key
+    :param options: Keyword arguments forwarded to ingest_job_listings
+    :return: Summary with counts, elapsed seconds and listings per minute
+    """
+    started = time.perf_counter()
+    summary = {"total": 0, "succeeded": 0, "failed": 0, "retries": 0}
+    async for record in ingest_job_listings(urls, api_key, **options):
+        output.write(json.dumps(record, ensure_ascii=False) + "\n")
+        output.flush()
+        summary["total"] += 1
+        summary["succeeded" if record["ok"] else "failed"] += 1
+        summary["retries"] += record["attempts"] - 1
+
+    elapsed = time.perf_counter() - started
+    summary["elapsed_seconds"] = round(elapsed, 2)
+    summary["listings_per_minute"] = round(summary["total"] / elapsed * 60, 1) if elapsed else 0.0
+    cache = options.get("cache")
+    if cache is not None:
+        summary["cache"] = cache.stats()
+    return summary
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Parse a file of job listing URLs into JSON lines.")
+    parser.add_argument("urls_file", help="Text file with one job listing URL per line ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file (default: stdout)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Listings parsed at once")
+    parser.add_argument("--per-host", type=int, default=2, help="Concurrent requests per job board host")
+    parser.add_argument("--per-host-delay", type=float, default=0.5, help="Seconds between requests to one host")
+    parser.add_argument("--rpm", type=float, default=None, help="Maximum LLM requests per minute")
+    parser.add_argument("--max-retries", type=int, default=5, help="Retries on 429/5xx before giving up")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the job listing cache")
+    parser.add_argument("--store", nargs="?", const="", default=None,
+                        help="Also append parsed listings to the columnar job store (optionally at this directory)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s", stream=sys.stderr)
+    api_key = config("OPENAI_API_KEY", default=None)
+    if not api_key:
+        parser.error("OPENAI_API_KEY is not set")
+
+    urls_source = sys.stdin if args.urls_file == "-" else open(args.urls_file, encoding="utf-8")
+    with urls_source:
+        # Deduplicate while keeping the input order
+        urls = list(dict.fromkeys(line.strip() for line in urls_source if line.strip() and not line.startswith("#")))
+
+    output = sys.stdout if args.output == "-" else open(args.output, "a", encoding="utf-8")
+    store = None if args.store is None else JobStore(args.store or None)
+    try:
+        with output:
+            summary = asyncio.run(run_ingestion(
+                urls, output, api_key,
+                cache=None if args.no_cache else JobListingCache(),
+                store=store,
+                concurrency=args.concurrency,
+                per_host=args.per_host,
+                per_host_delay=args.per_host_delay,
+                requests_per_minute=args.rpm,
+                max_retries=args.max_retries,
+            ))
+    finally:
+        # Listings still buffered in the store are written even when the run is interrupted
+        if store is not None:
+            store.flush()
+    print(json.dumps(summary, indent=2), file=sys.stderr)
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
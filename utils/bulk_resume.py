@@ -0,0 +1,321 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set
+
+from decouple import config
+
+from utils.bulk_ingest import RequestRateLimiter, decode_result, retry_delay
+from utils.docx_extract import extract_docx_text
+from utils.json_utils import is_valid_json
+from utils.pdf_extract import extract_pdf_text
+from utils.rate_limiter import BATCH, set_priority
+from utils.resume_analyzer import ResumeAnalyzer
+from utils.resume_cache import ResumeAnalysisCache
+from utils.skills import extract_skills
+
+logger = logging.getLogger(__name__)
+
+RESUME_EXTENSIONS = {".pdf": "pdf", ".docx": "docx"}
+# Seconds between progress lines on stderr
+PROGRESS_INTERVAL = 30.0
+
+
+def find_resumes(directory: str) -> List[str]:
+    """
+    PDF and DOCX files below a directory, in a stable order so interrupted runs resume predictably.
+    """
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in RESUME_EXTENSIONS and not name.startswith("~$"):
+                paths.append(os.path.join(root, name))
+    return paths
+
+
+def fingerprint(path: str) -> str:
+    # Size and modification time identify a file version without reading it
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def load_checkpoint(output_path: str) -> Dict[str, str]:
+    """
+    Files already analysed successfully according to an earlier output file.
+
+    A line cut off by a crash is ignored, so that file is simply processed again.
+
+    :return: Dictionary of path -> fingerprint of the version that was analysed
+    """
+    done = {}
+    if not output_path or not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as output_file:
+        for line in output_file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("ok"):
+                done[record["path"]] = record.get("fingerprint")
+    return done
+
+
+def extract_resume(path: str) -> Dict:
+    """
+    Extract the text of one resume file. Runs in a worker process of the pipeline.
+
+    :return: Dictionary with path, fingerprint, sha256, file_type, text, pages, skills, extract_seconds and error
+    """
+    started = time.perf_counter()
+    file_type = RESUME_EXTENSIONS[os.path.splitext(path)[1].lower()]
+    record = {"path": path, "fingerprint": fingerprint(path), "file_type": file_type, "text": "", "error": None}
+    try:
+        with open(path, "rb") as resume_file:
+            data = resume_file.read()
+        record["sha256"] = hashlib.sha256(data).hexdigest()
+        if file_type == "pdf":
+            # Files are already spread over the worker processes, so pages are not split further
+            extraction = extract_pdf_text(data, parallel_min_pages=sys.maxsize)
+            record["pages"] = len(extraction.pages)
+        else:
+            extraction = extract_docx_text(data)
+            record["pages"] = None
+        record["text"] = extraction.text
+        record["error"] = extraction.error
+    except (OSError, ValueError) as e:
+        record["error"] = str(e)
+    if not record["text"].strip() and not record["error"]:
+        record["error"] = "No text could be extracted"
+    record["skills"] = [skill.name for skill in extract_skills(record["text"])]
+    record["extract_seconds"] = round(time.perf_counter() - started, 4)
+    return record
+
+
+class StageStats:
+    def __init__(self):
+        """
+        Item count and active wall-clock window of one pipeline stage.
+        """
+        self.items = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def record(self, started_at: float, seconds: float, ok: bool = True) -> None:
+        self.items += 1
+        self.failed += 0 if ok else 1
+        self.busy_seconds += seconds
+        self.started_at = started_at if self.started_at is None else min(self.started_at, started_at)
+        self.finished_at = max(self.finished_at or 0.0, started_at + seconds)
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at - self.started_at) if self.started_at is not None else 0.0
+
+    def rate(self, per: float = 1.0) -> float:
+        return round(self.items / self.elapsed * per, 2) if self.elapsed else 0.0
+
+
+class ResumePipeline:
+    def __init__(self, api_key: str, workers: int = None, concurrency: int = 8, requests_per_minute: float = None,
+                 max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0, mode: str = "single",
+                 cache: ResumeAnalysisCache = None, include_text: bool = False):
+        """
+        Headless resume analysis over many files: text extraction in a process pool feeding LLM analyses
+        with bounded async concurrency, with results streamed as JSON lines.
+
+        :param api_key: OpenAI API key
+        :param workers: Extraction processes (defaults to the CPU count)
+        :param concurrency: Analyses in flight at once (size this from the OpenAI rate limits)
+        :param requests_per_minute: Optional cap on analyses started per minute
+        :param max_retries: Retries on 429/5xx and transport errors before a file is reported as failed
+        :param mode: ResumeAnalyzer mode, "single" or "fan_out"
+        :param cache: Optional ResumeAnalysisCache shared with the app, so resumes analysed there are reused
+        :param include_text: Also write the extracted text to each output record
+        """
+        self.api_key = api_key
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.concurrency = concurrency
+        self.rate_limiter = RequestRateLimiter(requests_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.cache = cache
+        self.include_text = include_text
+        self.extraction = StageStats()
+        self.analysis = StageStats()
+        self.retries = 0
+
+    async def _analyze(self, record: Dict) -> Dict:
+        started_at = time.perf_counter()
+        result = {key: record.get(key) for key in ("path", "fingerprint", "sha256", "file_type", "pages", "skills", "extract_seconds")}
+        if self.include_text:
+            result["text"] = record["text"]
+        if record["error"] and not record["text"].strip():
+            return {**result, "ok": False, "stage": "extract", "error": record["error"]}
+
+        # One analyzer per file: fan-out analyses keep per-call state (the pooled model client is shared)
+        analyzer = ResumeAnalyzer(api_key=self.api_key, resume_path=record["path"], mode=self.mode)
+        cache_key = analyzer.cache_key_for_digest(record["sha256"], record["file_type"]) if self.cache is not None else None
+        analysis = await asyncio.to_thread(self.cache.get, cache_key) if cache_key else None
+        attempts = 0
+        if analysis is None:
+            for attempts in range(1, self.max_retries + 2):
+                try:
+                    await self.rate_limiter.wait()
+                    analysis = await analyzer.aanalyze_text(record["text"])
+                    break
+                except Exception as e:
+                    delay = retry_delay(e, attempts - 1, self.base_delay, self.max_delay) if attempts <= self.max_retries else None
+                    if delay is None:
+                        seconds = time.perf_counter() - started_at
+                        self.analysis.record(started_at, seconds, ok=False)
+                        return {**result, "ok": False, "stage": "analyze", "error": f"{type(e).__name__}: {e}",
+                                "attempts": attempts, "llm_seconds": round(seconds, 3)}
+                    self.retries += 1
+                    logger.warning("Retrying %s in %.1fs after %s", record["path"], delay, e)
+                    await asyncio.sleep(delay)
+            if cache_key and is_valid_json(analysis) and analyzer.is_complete():
+                await asyncio.to_thread(self.cache.put, cache_key, analysis, record["text"])
+
+        seconds = time.perf_counter() - started_at
+        self.analysis.record(started_at, seconds)
+        return {**result, "ok": True, "analysis": decode_result(analysis), "cached": attempts == 0,
+                "attempts": attempts, "llm_seconds": round(seconds, 3), "extract_error": record["error"]}
+
+    async def run(self, paths: Iterable[str], output, done: Dict[str, str] = None) -> Dict:
+        """
+        Process resume files and write one JSON line per file as soon as it is analysed.
+
+        :param paths: Resume file paths, consumed lazily (any iterable, e.g. a generator over a directory walk)
+        :param output: Text file object receiving the JSON lines (flushed after every line)
+        :param done: Checkpoint from load_checkpoint; files whose fingerprint is unchanged are skipped
+        :return: Summary with counts and per-stage throughput
+        """
+        started = time.perf_counter()
+        # Bulk analyses queue behind interactive calls sharing the same API key
+        set_priority(BATCH)
+        done = done or {}
+        summary = {"total": 0, "skipped": 0, "succeeded": 0, "failed": 0}
+
+        def pending_paths():
+            # Paths are checked against the checkpoint as they are reached, never collected up front
+            for path in paths:
+                if done.get(path) == fingerprint(path):
+                    summary["skipped"] += 1
+                    continue
+                summary["total"] += 1
+                yield path
+
+        pending = pending_paths()
+        loop = asyncio.get_running_loop()
+        # A fixed set of extractors feeding a bounded queue: at most workers * 2 texts are being extracted
+        # or waiting to be queued, plus the queue itself, whatever the size of the input
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            async def extract() -> None:
+                for path in pending:
+                    extract_started = time.perf_counter()
+                    try:
+                        record = await loop.run_in_executor(executor, extract_resume, path)
+                    except Exception as e:
+                        record = {"path": path, "fingerprint": fingerprint(path), "text": "", "error": f"{type(e).__name__}: {e}"}
+                    self.extraction.record(extract_started, time.perf_counter() - extract_started, ok=not record["error"])
+                    await queue.put(record)
+
+            async def produce() -> None:
+                await asyncio.gather(*(extract() for _ in range(self.workers * 2)))
+                for _ in range(self.concurrency):
+                    await queue.put(None)
+
+            async def consume() -> None:
+                while (record := await queue.get()) is not None:
+                    result = await self._analyze(record)
+                    output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    output.flush()
+                    summary["succeeded" if result["ok"] else "failed"] += 1
+
+            async def report_progress() -> None:
+                while True:
+                    await asyncio.sleep(PROGRESS_INTERVAL)
+                    logger.info("%d/%d resumes done (%d skipped); extraction %.1f files/s, analysis %.1f/min",
+                                summary["succeeded"] + summary["failed"], summary["total"], summary["skipped"],
+                                self.extraction.rate(), self.analysis.rate(60))
+
+            progress = asyncio.create_task(report_progress())
+            try:
+                await asyncio.gather(produce(), *(consume() for _ in range(self.concurrency)))
+            finally:
+                progress.cancel()
+
+        summary["retries"] = self.retries
+        summary["elapsed_seconds"] = round(time.perf_counter() - started, 2)
+        summary["extraction"] = {"files": self.extraction.items, "failed": self.extraction.failed,
+                                 "files_per_second": self.extraction.rate(), "busy_seconds": round(self.extraction.busy_seconds, 2)}
+        summary["analysis"] = {"analyses": self.analysis.items, "failed": self.analysis.failed,
+                               "analyses_per_minute": self.analysis.rate(60), "busy_seconds": round(self.analysis.busy_seconds, 2)}
+        return summary
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Analyse a directory of PDF/DOCX resumes into JSON lines.")
+    parser.add_argument("directory", help="Directory searched recursively for .pdf and .docx files")
+    parser.add_argument("-o", "--output", required=True, help="JSONL output file; also the checkpoint for resuming a run")
+    parser.add_argument("--workers", type=int, default=None, help="Extraction processes (default: CPU count)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Analyses in flight at once")
+    parser.add_argument("--rpm", type=float, default=None, help="Maximum analyses started per minute")
+    parser.add_argument("--max-retries", type=int, default=5, help="Retries on 429/5xx before giving up")
+    parser.add_argument("--mode", choices=["single", "fan_out"], default="single", help="Resume analysis mode")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the resume analysis cache")
+    parser.add_argument("--include-text", action="store_true", help="Write the extracted text to the output as well")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and analyse every file again")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s", stream=sys.stderr)
+    api_key = config("OPENAI_API_KEY", default=None)
+    if not api_key:
+        parser.error("OPENAI_API_KEY is not set")
+
+    paths = find_resumes(args.directory)
+    done = {} if args.restart else load_checkpoint(args.output)
+    if done:
+        logger.info("Resuming: %d files already analysed", len(done))
+
+    pipeline = ResumePipeline(
+        api_key,
+        workers=args.workers,
+        concurrency=args.concurrency,
+        requests_per_minute=args.rpm,
+        max_retries=args.max_retries,
+        mode=args.mode,
+        cache=None if args.no_cache else ResumeAnalysisCache(),
+        include_text=args.include_text,
+    )
+    # A line cut off by a crash must not swallow the first record of this run
+    if os.path.exists(args.output) and os.path.getsize(args.output):
+        with open(args.output, "rb") as previous:
+            previous.seek(-1, os.SEEK_END)
+            needs_newline = previous.read(1) != b"\n"
+        if needs_newline:
+            with open(args.output, "a", encoding="utf-8") as output:
+                output.write("\n")
+
+    with open(args.output, "a", encoding="utf-8") as output:
+        summary = asyncio.run(pipeline.run(paths, output, done))
+    print(json.dumps(summary, indent=2), file=sys.stderr)
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
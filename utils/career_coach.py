@@ -1,27 +1,45 @@
-import os
-from langchain_openai import ChatOpenAI
-from langchain.schema import HumanMessage, SystemMessage, AIMessage
-from typing import List, Generator, Dict
+from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
+from utils.llm_pool import get_chat_model
+from utils.telemetry import stream_content, astream_content
+from utils.chat_history import ConversationWindow
+from utils.report_cache import ReportCache, report_cache_key
+from utils.resume_profile import ResumeProfile, render_profile
+from utils.skills import Skill, extract_skills, format_skill_inventory
+from typing import List, Generator, Dict, AsyncGenerator, Union
 
 class CareerBoost:
-    def __init__(self, api_key: str, candidate_profile:str):
+    # Bump when the recommendation prompt changes so cached reports are regenerated
+    PROMPT_VERSION = "2"
+
+    def __init__(self, api_key: str, candidate_profile: Union[str, ResumeProfile], cache: ReportCache = None,
+                 resume_skills: Dict[Skill, int] = None):
         """
         Initialize CareerBoost with OpenAI API key and optional candidate details.
         
         :param api_key: OpenAI API key
+        :param candidate_profile: ResumeProfile (only the fields the coach needs are sent) or the raw analysis text
+        :param cache: Optional ReportCache reusing recommendations generated for the same profile
+        :param resume_skills: Taxonomy skills of the resume text (ResumeAnalyzer.last_resume_skills); matched on the profile when omitted
         """
-        # Set the API key for OpenAI
-        os.environ["OPENAI_API_KEY"] = api_key
+        self.model = "gpt-4o-mini"
+        self.candidate_profile = render_profile(candidate_profile, "for_career_coach")
+        self.cache = cache
+
+        # Normalized, categorized skills matched locally against the skill taxonomy
+        self.skill_hints = format_skill_inventory(
+            resume_skills if resume_skills is not None else extract_skills(self.candidate_profile)
+        )
 
-        # Create a LangChain ChatOpenAI model
-        self.llm = ChatOpenAI(
-            model="gpt-4o-mini", 
+        # Shared LangChain ChatOpenAI model from the process-wide client pool
+        self.llm = get_chat_model(
+            api_key,
+            model=self.model,
             temperature=0.5,  # Slightly creative responses
             streaming=True
         )
 
-        # System prompt template with a placeholder for the candidate's profile details
-        self.system_prompt = f"""
+        # Static instructions: identical for every user, so they form a cacheable prompt prefix
+        self.system_prompt = """
         ## R - Role
         You are CareerBoost AI, an innovative and witty AI-powered career coach designed to transform professional development into an engaging, personalized journey of growth and self-discovery.
 
@@ -55,24 +73,28 @@ class CareerBoost:
 
         4. **Non-Career or Non-Work-Related Inquiries**
         - Do not respond to questions that are not related to career, work, or professional development.
+        """
 
+        # Per-user data goes after the static prefix
+        self.candidate_context = f"""
         ## Candidate Profile:
-        {candidate_profile}
-        """
+        {self.candidate_profile}
 
-    def career_coach_chat(self, messages: List[Dict[str, str]]) -> Generator[str, None, None]:
-        """
-        Generate a streaming career coaching response based on user messages and candidate profile.
-        
-        :param messages: List of message dictionaries with 'role' and 'content' keys
-        :param candidate_profile: A string containing the candidate's profile details
-        :return: Generator yielding response chunks
+        {self.skill_hints}
         """
+
+    def _build_chat_messages(self, messages: List[Dict[str, str]], history: ConversationWindow = None) -> list:
         # Convert input messages to LangChain message objects
         chat_messages = []
 
-        # Add system message with candidate profile details
+        # Add the static system prompt first, then the candidate profile details
         chat_messages.append(SystemMessage(content=self.system_prompt))
+        chat_messages.append(SystemMessage(content=self.candidate_context))
+
+        # Earlier turns that no longer fit the token budget are represented by their summary
+        summary_message = history.summary_message() if history is not None else None
+        if summary_message is not None:
+            chat_messages.append(summary_message)
         
         # Convert user messages
         for msg in messages:
@@ -80,22 +102,77 @@ class CareerBoost:
                 chat_messages.append(HumanMessage(content=msg['content']))
             elif msg['role'] == 'assistant':
                 chat_messages.append(AIMessage(content=msg['content']))
+        return chat_messages
 
+    def career_coach_chat(self, messages: List[Dict[str, str]], history: ConversationWindow = None) -> Generator[str, None, None]:
+        """
+        Generate a streaming career coaching response based on user messages and candidate profile.
+        
+        :param messages: List of message dictionaries with 'role' and 'content' keys
+        :param history: Optional ConversationWindow keeping the prompt within a token budget
+        :param candidate_profile: A string containing the candidate's profile details
+        :return: Generator yielding response chunks
+        """
         # Stream the response from the AI model
-        for chunk in self.llm.stream(chat_messages):
-            if chunk and chunk.content:
-                yield chunk.content
+        if history is not None:
+            _, messages = history.window(messages, self.llm)
+        chat_messages = self._build_chat_messages(messages, history)
+        if history is not None:
+            history.record_prompt(chat_messages)
+
+        yield from stream_content(self.llm, chat_messages, agent="CareerBoost", method="career_coach_chat")
+
+    async def astream_career_coach_chat(self, messages: List[Dict[str, str]], history: ConversationWindow = None) -> AsyncGenerator[str, None]:
+        """
+        Async counterpart of career_coach_chat.
+
+        :param messages: List of message dictionaries with 'role' and 'content' keys
+        :param history: Optional ConversationWindow keeping the prompt within a token budget
+        :return: Async generator yielding response chunks
+        """
+        if history is not None:
+            _, messages = await history.awindow(messages, self.llm)
+        chat_messages = self._build_chat_messages(messages, history)
+        if history is not None:
+            history.record_prompt(chat_messages)
+
+        async for chunk in astream_content(self.llm, chat_messages, agent="CareerBoost", method="astream_career_coach_chat"):
+            yield chunk
 
-    def generate_career_recommendation(self) -> str:
+    def generate_career_recommendation(self, regenerate: bool = False) -> str:
         """
         Generate a comprehensive career recommendation based on user profile.
         
-        :param user_profile: String containing user's professional details
+        :param regenerate: Ignore a cached recommendation and generate a new one
         :return: Detailed career recommendation
         """
+        # Stream the recommendation and yield it incrementally
+        generate = lambda: stream_content(self.llm, self._recommendation_messages(), agent="CareerBoost", method="generate_career_recommendation")
+        if self.cache is None:
+            yield from generate()
+            return
+        yield from self.cache.stream(self._recommendation_cache_key(), generate, regenerate=regenerate)
+
+    async def astream_career_recommendation(self, regenerate: bool = False) -> AsyncGenerator[str, None]:
+        """
+        Async counterpart of generate_career_recommendation.
+
+        :param regenerate: Ignore a cached recommendation and generate a new one
+        :return: Async generator yielding recommendation chunks
+        """
+        generate = lambda: astream_content(self.llm, self._recommendation_messages(), agent="CareerBoost", method="astream_career_recommendation")
+        chunks = generate() if self.cache is None else self.cache.astream(self._recommendation_cache_key(), generate, regenerate=regenerate)
+        async for chunk in chunks:
+            yield chunk
+
+    def _recommendation_cache_key(self) -> str:
+        return report_cache_key("career_recommendation", self.candidate_profile + self.skill_hints, "", self.PROMPT_VERSION, self.model)
+
+    def _recommendation_messages(self) -> list:
         # Create the messages list, including the system message with the formatted profile
-        profile_messages = [
+        return [
             SystemMessage(content=self.system_prompt),
+            SystemMessage(content=self.candidate_context),
             HumanMessage(content="""
             "Based on the professional candidate profile provided, please generate a comprehensive and personalized professional development report, including the following:
 
@@ -107,8 +184,3 @@ class CareerBoost:
             The output should be structured as a detailed, step-by-step guide that takes into account of the candidate's unique career journey, goals, and aspirations. The report should provide actionable insights and a clear roadmap for professional advancement."
             """)
         ]
-
-        # Stream the recommendation and yield it incrementally
-        for chunk in self.llm.stream(profile_messages):
-            if chunk and chunk.content:
-                yield chunk.content
@@ -0,0 +1,133 @@
+import logging
+from typing import Dict, List, Tuple
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from utils.telemetry import invoke_content, ainvoke_content
+from utils.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and an AI assistant.
+Update the existing summary with the new conversation turns below.
+Keep every fact the user shared about themselves, their goals and constraints, every question the assistant asked,
+the user's answers and how well they answered, advice already given, decisions made and open threads.
+Drop greetings, filler and repetition. Write compact bullet points, at most {max_words} words in total.
+
+Existing summary:
+{summary}
+
+New conversation turns:
+{turns}
+
+Updated summary:"""
+
+
+def _message_tokens(message: Dict[str, str]) -> int:
+    # Content plus a few tokens of per-message chat formatting overhead
+    return estimate_tokens(message["content"]) + 4
+
+
+class ConversationWindow:
+    def __init__(self, max_history_tokens: int = 3000, min_recent_messages: int = 4, summary_max_words: int = 250):
+        """
+        Token-budgeted view of a chat history with a rolling summary of older turns.
+
+        Recent messages are kept verbatim while they fit in the budget. When the budget is
+        exceeded, the oldest turns are folded into the running summary, so the prompt sent on
+        each turn stays roughly constant in size however long the conversation gets. Folding
+        goes down to half of the budget, so the summary is only updated every few turns.
+
+        One instance belongs to one conversation (keep it in st.session_state).
+
+        :param max_history_tokens: Token budget for the verbatim recent messages
+        :param min_recent_messages: Number of latest messages that are never summarized
+        :param summary_max_words: Length limit given to the model for the running summary
+        """
+        self.max_history_tokens = max_history_tokens
+        self.min_recent_messages = min_recent_messages
+        self.summary_max_words = summary_max_words
+        self.summary = ""
+        self.summarized_count = 0  # Number of leading messages already folded into the summary
+        self.turn_stats: List[Dict[str, int]] = []
+
+    def _split(self, messages: List[Dict[str, str]]) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+        """
+        Decide which not-yet-summarized messages have to be folded into the summary.
+
+        :return: Tuple of (messages to fold, messages kept verbatim)
+        """
+        if len(messages) < self.summarized_count:
+            # The chat history was reset; start a new summary
+            self.summary, self.summarized_count = "", 0
+
+        recent = messages[self.summarized_count:]
+        recent_tokens = sum(_message_tokens(message) for message in recent)
+        if recent_tokens <= self.max_history_tokens:
+            return [], recent
+
+        fold_count = 0
+        while len(recent) - fold_count > self.min_recent_messages and recent_tokens > self.max_history_tokens // 2:
+            recent_tokens -= _message_tokens(recent[fold_count])
+            fold_count += 1
+        return recent[:fold_count], recent[fold_count:]
+
+    def _summary_messages(self, folded: List[Dict[str, str]]) -> list:
+        turns = "\n".join(f"{message['role'].capitalize()}: {message['content']}" for message in folded)
+        return [HumanMessage(content=SUMMARY_PROMPT.format(
+            max_words=self.summary_max_words, summary=self.summary or "(none yet)", turns=turns
+        ))]
+
+    def _apply_summary(self, summary: str, folded_count: int) -> None:
+        self.summary = summary.strip()
+        self.summarized_count += folded_count
+        logger.info("Folded %d messages into the conversation summary (%d tokens)",
+                    folded_count, estimate_tokens(self.summary))
+
+    def window(self, messages: List[Dict[str, str]], llm) -> Tuple[str, List[Dict[str, str]]]:
+        """
+        Fold old turns into the summary if needed and return what should be sent to the model.
+
+        :param messages: Full chat history with 'role' and 'content' keys
+        :param llm: Chat model used to update the summary
+        :return: Tuple of (running summary, recent messages to send verbatim)
+        """
+        folded, recent = self._split(messages)
+        if folded:
+            summary = invoke_content(llm, self._summary_messages(folded), agent="ConversationWindow", method="window")
+            self._apply_summary(summary, len(folded))
+        return self.summary, recent
+
+    async def awindow(self, messages: List[Dict[str, str]], llm) -> Tuple[str, List[Dict[str, str]]]:
+        """
+        Async counterpart of window.
+        """
+        folded, recent = self._split(messages)
+        if folded:
+            summary = await ainvoke_content(llm, self._summary_messages(folded), agent="ConversationWindow", method="awindow")
+            self._apply_summary(summary, len(folded))
+        return self.summary, recent
+
+    def summary_message(self):
+        # Injected right after the system prompt when earlier turns have been summarized
+        if not self.summary:
+            return None
+        return SystemMessage(content=f"Summary of the earlier part of this conversation:\n{self.summary}")
+
+    def record_prompt(self, chat_messages: list) -> int:
+        """
+        Record the size of the prompt sent on this turn.
+
+        :param chat_messages: LangChain messages sent to the model
+        :return: Estimated prompt tokens
+        """
+        prompt_tokens = sum(estimate_tokens(message.content) + 4 for message in chat_messages)
+        self.turn_stats.append({
+            "turn": len(self.turn_stats) + 1,
+            "prompt_tokens": prompt_tokens,
+            "summary_tokens": estimate_tokens(self.summary),
+            "messages": len(chat_messages),
+        })
+        logger.info("Chat prompt: ~%d tokens (%d messages, summary covers %d)",
+                    prompt_tokens, len(chat_messages), self.summarized_count)
+        return prompt_tokens
@@ -0,0 +1,194 @@
+import io
+import logging
+import os
+import re
+import time
+import zipfile
+from dataclasses import dataclass, field
+from typing import Generator, List, Optional
+from xml.etree.ElementTree import iterparse
+
+logger = logging.getLogger(__name__)
+
+# Uploads larger than this are rejected before parsing
+MAX_DOCX_BYTES = 10 * 1024 * 1024
+
+# Uncompressed size allowed for a single XML part, guarding against zip bombs
+MAX_PART_BYTES = 50 * 1024 * 1024
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+
+DOCUMENT_PART = "word/document.xml"
+HEADER_PART = re.compile(r"^word/header\d*\.xml$")
+FOOTER_PART = re.compile(r"^word/footer\d*\.xml$")
+
+
+@dataclass
+class DocxExtraction:
+    parts: List[str] = field(default_factory=list)
+    blocks: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.blocks)
+
+
+def _part_number(name: str) -> int:
+    digits = re.sub(r"\D", "", os.path.basename(name))
+    return int(digits) if digits else 0
+
+
+def docx_parts(archive: zipfile.ZipFile) -> List[str]:
+    """
+    XML parts holding visible text, in reading order: headers, the document body, then footers.
+    """
+    names = archive.namelist()
+    headers = sorted((name for name in names if HEADER_PART.match(name)), key=_part_number)
+    footers = sorted((name for name in names if FOOTER_PART.match(name)), key=_part_number)
+    return headers + ([DOCUMENT_PART] if DOCUMENT_PART in names else []) + footers
+
+
+def iter_part_blocks(xml_file) -> Generator[str, None, None]:
+    """
+    Stream the text blocks of one WordprocessingML part.
+
+    Paragraphs are yielded as they close; a table row is yielded as its cells joined
+    with " | ", so skills matrices keep their structure. Text boxes are read from their
+    primary representation only (the VML fallback copy is skipped). Elements are cleared
+    once handled, so memory stays bounded by the largest paragraph or table row.
+
+    :param xml_file: File-like object with the part's XML
+    :return: Generator yielding non-empty text blocks
+    """
+    paragraphs = []   # Stack of paragraphs being built; text boxes nest paragraphs inside paragraphs
+    cells = []        # Stack of open table cells, each a list of its paragraph texts
+    rows = []         # Stack of open table rows, each a list of its cell texts
+    fallback_depth = 0
+    body = None
+
+    for event, element in iterparse(xml_file, events=("start", "end")):
+        tag = element.tag
+        if event == "start":
+            if tag == MC_FALLBACK:
+                fallback_depth += 1
+            elif fallback_depth:
+                continue
+            elif tag == W + "p":
+                paragraphs.append([])
+            elif tag == W + "tc":
+                cells.append([])
+            elif tag == W + "tr":
+                rows.append([])
+            elif tag in (W + "body", W + "hdr", W + "ftr"):
+                body = element
+            continue
+
+        if tag == MC_FALLBACK:
+            fallback_depth -= 1
+        elif fallback_depth:
+            pass
+        elif tag == W + "t" and paragraphs:
+            paragraphs[-1].append(element.text or "")
+        elif tag == W + "tab" and paragraphs:
+            paragraphs[-1].append("\t")
+        elif tag in (W + "br", W + "cr") and paragraphs:
+            paragraphs[-1].append("\n")
+        elif tag == W + "p" and paragraphs:
+            text = "".join(paragraphs.pop()).strip()
+            if text:
+                if cells:
+                    cells[-1].append(text)
+                else:
+                    yield text
+        elif tag == W + "tc" and cells:
+            cell_text = " ".join(cells.pop())
+            if rows:
+                rows[-1].append(cell_text)
+        elif tag == W + "tr" and rows:
+            row = [cell for cell in rows.pop() if cell]
+            if row:
+                if cells:
+                    # A nested table row becomes part of the enclosing cell
+                    cells[-1].append(" | ".join(row))
+                else:
+                    yield " | ".join(row)
+
+        # Drop handled elements so the tree never holds more than the open block
+        if fallback_depth == 0 and not paragraphs and not cells and body is not None and tag != W + "body":
+            body.clear()
+        element.clear()
+
+
+def read_docx_bytes(source, max_bytes: int = MAX_DOCX_BYTES) -> bytes:
+    """
+    Read a DOCX from a path, raw bytes or a file-like object, enforcing the size limit.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        data = bytes(source)
+    elif isinstance(source, (str, os.PathLike)):
+        if os.path.getsize(source) > max_bytes:
+            raise ValueError(f"DOCX is larger than the {max_bytes / (1024 * 1024):g} MB limit.")
+        with open(source, "rb") as docx_file:
+            data = docx_file.read()
+    elif hasattr(source, "getvalue"):
+        data = source.getvalue()
+    else:
+        source.seek(0)
+        data = source.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise ValueError(f"DOCX is larger than the {max_bytes / (1024 * 1024):g} MB limit.")
+    return data
+
+
+def iter_docx_blocks(data: bytes, max_part_bytes: int = MAX_PART_BYTES) -> Generator[str, None, None]:
+    """
+    Stream the text blocks of a DOCX file straight from its zip archive.
+
+    :param data: DOCX file contents
+    :param max_part_bytes: Largest uncompressed XML part that is read
+    :return: Generator yielding paragraphs and table rows in reading order
+    """
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        seen_header_blocks = set()
+        for part in docx_parts(archive):
+            if archive.getinfo(part).file_size > max_part_bytes:
+                logger.warning("Skipping %s: larger than %d bytes uncompressed", part, max_part_bytes)
+                continue
+            is_document = part == DOCUMENT_PART
+            with archive.open(part) as xml_file:
+                for block in iter_part_blocks(xml_file):
+                    # First-page, even and default headers usually repeat the same lines
+                    if not is_document:
+                        if block in seen_header_blocks:
+                            continue
+                        seen_header_blocks.add(block)
+                    yield block
+
+
+def extract_docx_text(source, max_bytes: int = MAX_DOCX_BYTES, max_part_bytes: int = MAX_PART_BYTES) -> DocxExtraction:
+    """
+    Extract the text of a DOCX file, including tables, text boxes, headers and footers.
+
+    Unreadable documents do not raise: the returned extraction holds the blocks read so far and the error.
+    Exceeding the byte limit raises ValueError, like an unsupported file type.
+
+    :param source: Path, bytes or file-like object with the DOCX
+    :return: DocxExtraction with the text blocks and timing
+    """
+    data = read_docx_bytes(source, max_bytes)
+    extraction = DocxExtraction()
+    started = time.perf_counter()
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            extraction.parts = docx_parts(archive)
+        extraction.blocks.extend(iter_docx_blocks(data, max_part_bytes))
+    except Exception as e:
+        extraction.error = str(e)
+        logger.warning("Error reading DOCX after %d blocks: %s", len(extraction.blocks), e)
+    extraction.seconds = time.perf_counter() - started
+
+    logger.info("Extracted %d DOCX blocks from %d parts in %.3fs", len(extraction.blocks), len(extraction.parts), extraction.seconds)
+    return extraction
@@ -0,0 +1,205 @@
+import re
+from dataclasses import dataclass
+
+from bs4 import BeautifulSoup, CData, Comment, Doctype, NavigableString, ProcessingInstruction, Tag
+
+from utils.tokens import estimate_tokens
+
+# Tags that never carry job description text
+NON_CONTENT_TAGS = [
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe", "object", "embed",
+    "img", "picture", "video", "audio", "source", "link", "meta", "base",
+    "nav", "footer", "aside", "input", "select", "textarea",
+]
+
+# Tags replaced by their children: ASP.NET WebForms pages wrap the whole body in a <form>, and labels
+# and buttons hold visible text
+UNWRAPPED_TAGS = ["form", "label", "button"]
+
+# A <header> inside these holds the content's own heading (e.g. the job title); elsewhere it is the page banner
+SECTIONING_TAGS = ["article", "main", "section"]
+
+# Markup strings that are not visible text
+NON_CONTENT_STRINGS = (Comment, CData, Doctype, ProcessingInstruction)
+
+# Landmark roles used for page chrome rather than content
+NON_CONTENT_ROLES = {"navigation", "banner", "contentinfo", "search", "dialog", "alertdialog", "complementary"}
+
+# id/class words that mark boilerplate blocks (cookie banners, share widgets, ...)
+BOILERPLATE_PATTERN = re.compile(
+    r"(^|[-_\s])(cookie|consent|gdpr|navbar|nav|menu|breadcrumbs?|footer|sidebar|share|social|"
+    r"modal|popup|newsletter|subscribe|advert|ads?|promo|related|recommended|similar)([-_\s]|$)",
+    re.IGNORECASE,
+)
+
+# id/class words that usually mark the job description block itself
+JOB_CONTENT_PATTERN = re.compile(
+    r"job[-_]?(description|details|posting|body|content)|description|posting[-_]?(body|content)",
+    re.IGNORECASE,
+)
+
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+BLOCK_TAGS = HEADING_TAGS | {
+    "p", "div", "section", "article", "main", "ul", "ol", "li", "table", "tr", "dl", "dt", "dd",
+    "blockquote", "pre", "br", "hr",
+}
+
+# Below this many characters the detected main block is not trusted and the whole body is used
+MIN_MAIN_CONTENT_CHARS = 200
+
+
+@dataclass
+class PruneStats:
+    raw_bytes: int
+    pruned_bytes: int
+    raw_tokens: int
+    pruned_tokens: int
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.raw_bytes - self.pruned_bytes
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.raw_tokens - self.pruned_tokens
+
+    @property
+    def reduction(self) -> float:
+        """Fraction of input tokens removed by pruning."""
+        return self.tokens_saved / self.raw_tokens if self.raw_tokens else 0.0
+
+
+@dataclass
+class PrunedPage:
+    text: str
+    stats: PruneStats
+
+
+def _is_boilerplate(tag: Tag) -> bool:
+    if tag.get("role", "").lower() in NON_CONTENT_ROLES:
+        return True
+    if tag.get("aria-hidden") == "true" or tag.has_attr("hidden"):
+        return True
+    style = tag.get("style", "").replace(" ", "").lower()
+    if "display:none" in style or "visibility:hidden" in style:
+        return True
+    hints = " ".join([tag.get("id", "")] + list(tag.get("class", [])))
+    return bool(hints) and not JOB_CONTENT_PATTERN.search(hints) and bool(BOILERPLATE_PATTERN.search(hints))
+
+
+def _is_page_banner(tag: Tag) -> bool:
+    return tag.name == "header" and tag.find_parent(SECTIONING_TAGS) is None
+
+
+def _strip_non_content(root: Tag) -> None:
+    for node in root.find_all(string=lambda s: isinstance(s, NON_CONTENT_STRINGS)):
+        node.extract()
+    for tag in root.find_all(NON_CONTENT_TAGS):
+        if not tag.decomposed:
+            tag.decompose()
+    for tag in root.find_all(UNWRAPPED_TAGS):
+        tag.unwrap()
+    for tag in root.find_all(lambda tag: _is_page_banner(tag) or _is_boilerplate(tag)):
+        if not tag.decomposed:
+            tag.decompose()
+
+
+def _find_main_block(root: Tag) -> Tag:
+    # Explicit markup for the job description wins
+    for selector in ('[itemtype*="JobPosting"]', "main", "article", '[role="main"]'):
+        block = root.select_one(selector)
+        if block is not None and len(block.get_text(" ", strip=True)) >= MIN_MAIN_CONTENT_CHARS:
+            return block
+    for block in root.find_all(["div", "section"], attrs={"class": JOB_CONTENT_PATTERN}) + \
+            root.find_all(["div", "section"], attrs={"id": JOB_CONTENT_PATTERN}):
+        if len(block.get_text(" ", strip=True)) >= MIN_MAIN_CONTENT_CHARS:
+            return block
+
+    # Otherwise score containers by the paragraph and list text they hold (readability-style)
+    scores = {}
+    for node in root.find_all(["p", "li", "h2", "h3", "h4"]):
+        length = len(node.get_text(" ", strip=True))
+        if length < 20:
+            continue
+        parent = node.parent
+        for weight in (1.0, 0.5, 0.25):
+            if parent is None or parent is root:
+                break
+            scores[id(parent)] = (scores.get(id(parent), (0.0, parent))[0] + length * weight, parent)
+            parent = parent.parent
+    if scores:
+        _, block = max(scores.values(), key=lambda item: item[0])
+        if len(block.get_text(" ", strip=True)) >= MIN_MAIN_CONTENT_CHARS:
+            return block
+    return root
+
+
+def _flush_inline(blocks: list, inline: list) -> None:
+    text = " ".join("".join(inline).split())
+    if text:
+        blocks.append(text)
+    inline.clear()
+
+
+def _render_markdown(node: Tag, blocks: list, inline: list) -> None:
+    for child in node.children:
+        if isinstance(child, NavigableString):
+            inline.append(str(child))
+            continue
+        name = child.name
+        if name in HEADING_TAGS or name == "li":
+            _flush_inline(blocks, inline)
+            text = " ".join(child.get_text(" ", strip=True).split())
+            if text:
+                prefix = "#" * int(name[1]) if name in HEADING_TAGS else "-"
+                blocks.append(f"{prefix} {text}")
+        elif name == "tr":
+            _flush_inline(blocks, inline)
+            cells = [" ".join(cell.get_text(" ", strip=True).split()) for cell in child.find_all(["td", "th"])]
+            if any(cells):
+                blocks.append(" | ".join(cells))
+        elif name in BLOCK_TAGS:
+            _flush_inline(blocks, inline)
+            _render_markdown(child, blocks, inline)
+            _flush_inline(blocks, inline)
+        else:
+            _render_markdown(child, blocks, inline)
+
+
+def prune_job_html(soup: BeautifulSoup) -> PrunedPage:
+    """
+    Reduce a job listing page to the compact markdown text of its job description.
+
+    Non-content tags, page chrome and attributes are stripped, the main job description
+    block is located and rendered as headings, paragraphs and bullet lists.
+
+    :param soup: Parsed job listing page; it is not modified
+    :return: PrunedPage holding the markdown text and before/after size statistics
+    """
+    raw_html = str(soup)
+    working = BeautifulSoup(raw_html, "html.parser")
+
+    title = working.title.get_text(" ", strip=True) if working.title else ""
+    root = working.body or working
+    _strip_non_content(root)
+    main_block = _find_main_block(root)
+
+    # Keep the page heading when the detected block does not include it (it usually holds the position name)
+    heading = root.find("h1")
+    blocks = []
+    if title:
+        blocks.append("Page Title: " + " ".join(title.split()))
+    if heading is not None and main_block is not root and not any(parent is main_block for parent in heading.parents):
+        blocks.append("# " + " ".join(heading.get_text(" ", strip=True).split()))
+    inline = []
+    _render_markdown(main_block, blocks, inline)
+    _flush_inline(blocks, inline)
+    text = "\n".join(blocks)
+
+    stats = PruneStats(
+        raw_bytes=len(raw_html.encode("utf-8")),
+        pruned_bytes=len(text.encode("utf-8")),
+        raw_tokens=estimate_tokens(raw_html),
+        pruned_tokens=estimate_tokens(text),
+    )
+    return PrunedPage(text=text, stats=stats)
@@ -0,0 +1,146 @@
+import hashlib
+import threading
+import time
+from contextlib import closing
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from utils.storage import cache_path, connect
+
+# Query parameters that only track where a click came from and never change the posting
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "ref", "referrer", "source", "src", "trk", "trackingid"}
+
+DEFAULT_TTL_SECONDS = 6 * 60 * 60
+
+# Pruned pages shorter than this (a bare title, a "loading" shell of a JS-rendered board) look alike across
+# unrelated postings, so their parse is only reused for the same URL
+MIN_SHARED_CONTENT_CHARS = 400
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a job listing URL so different spellings of the same posting share a cache entry.
+
+    :param url: URL as entered by the user
+    :return: URL with lower-cased scheme/host, no default port, fragment or tracking parameters,
+             and sorted query parameters
+    """
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "https").lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not ((scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class JobListingCache:
+    def __init__(self, path: str = None, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        """
+        On-disk cache of parsed job listings shared by every process using the same file.
+
+        Entries are keyed on the normalized URL and remember the hash of the page content that
+        was parsed, together with the ETag/Last-Modified validators of the response, so stale
+        entries can be revalidated without calling the LLM again.
+
+        :param path: SQLite database file (defaults to job_listings.sqlite3 in the cache directory)
+        :param ttl_seconds: Age after which an entry has to be revalidated against the job board
+        """
+        self.path = path or cache_path("job_listings.sqlite3")
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "revalidations": 0}
+
+        with closing(connect(self.path)) as connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS job_listings (
+                    url_key TEXT PRIMARY KEY,
+                    content_hash TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    result TEXT NOT NULL,
+                    validated_at REAL NOT NULL
+                )""")
+            connection.execute("CREATE INDEX IF NOT EXISTS job_listings_content_hash ON job_listings (content_hash)")
+
+    def get(self, url: str) -> Optional[Dict]:
+        with closing(connect(self.path)) as connection:
+            row = connection.execute(
+                "SELECT * FROM job_listings WHERE url_key = ?", (normalize_url(url),)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def get_by_content_hash(self, page_hash: str) -> Optional[Dict]:
+        # The same posting is often reachable under several URLs (job board, company site, aggregator)
+        with closing(connect(self.path)) as connection:
+            row = connection.execute(
+                "SELECT * FROM job_listings WHERE content_hash = ? ORDER BY validated_at DESC LIMIT 1", (page_hash,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def is_fresh(self, entry: Dict) -> bool:
+        return time.time() - entry["validated_at"] < self.ttl_seconds
+
+    def put(self, url: str, page_hash: str, result: str, etag: str = None, last_modified: str = None) -> None:
+        with closing(connect(self.path)) as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO job_listings VALUES (?, ?, ?, ?, ?, ?)",
+                (normalize_url(url), page_hash, etag, last_modified, result, time.time()),
+            )
+
+    def touch(self, url: str, etag: str = None, last_modified: str = None) -> None:
+        # Mark an entry as revalidated, keeping the previous validators when the response sent none
+        with closing(connect(self.path)) as connection:
+            connection.execute(
+                """UPDATE job_listings
+                   SET validated_at = ?, etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified)
+                   WHERE url_key = ?""",
+                (time.time(), etag, last_modified, normalize_url(url)),
+            )
+
+    def iter_results(self) -> Iterator[Tuple[str, str, str]]:
+        """
+        Every cached listing, e.g. to index the job corpus for recommendations.
+
+        :return: Iterator of (normalized URL, content hash, parsed result)
+        """
+        with closing(connect(self.path)) as connection:
+            for row in connection.execute("SELECT url_key, content_hash, result FROM job_listings"):
+                yield tuple(row)
+
+    def conditional_headers(self, entry: Optional[Dict]) -> Dict[str, str]:
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Cache counters for this process.
+
+        :return: Dictionary with hits, misses, revalidations, entries and hit_ratio
+        """
+        with self._lock:
+            stats = dict(self._counters)
+        with closing(connect(self.path)) as connection:
+            stats["entries"] = connection.execute("SELECT COUNT(*) FROM job_listings").fetchone()[0]
+        lookups = stats["hits"] + stats["misses"] + stats["revalidations"]
+        stats["hit_ratio"] = (stats["hits"] + stats["revalidations"]) / lookups if lookups else 0.0
+        return stats
+
@@ -1,19 +1,42 @@
-import os
-from langchain_openai import ChatOpenAI
-from langchain.schema import HumanMessage, SystemMessage
-
+import asyncio
+import json
+import logging
+import time
+from typing import TYPE_CHECKING, Dict
+from langchain_core.messages import HumanMessage, SystemMessage
+from utils.llm_pool import get_chat_model
+from utils.telemetry import invoke_content, ainvoke_content, timed_http, telemetry
+
+import httpx
 import requests
 from bs4 import BeautifulSoup
 
-class JobScraper:
-    def __init__(self, api_key:str):
+from utils.html_pruner import prune_job_html
+from utils.job_cache import MIN_SHARED_CONTENT_CHARS, JobListingCache, content_hash, normalize_url
+from utils.json_utils import is_valid_json
+from utils.skills import Skill, extract_skills
+from utils.structured_job_data import (UNPARSED_OUTPUT_FIELD, fast_path_stats, find_job_posting, format_job_fields, map_job_posting,
+                                      merge_job_fields, missing_fields)
+
+if TYPE_CHECKING:
+    # Only for annotations: the store pulls in pyarrow and pandas, which parsing alone does not need
+    from utils.job_store import JobStore
 
-        # Set the API key for OpenAI
-        os.environ["OPENAI_API_KEY"] = api_key
+logger = logging.getLogger(__name__)
 
-        # Create a LangChain ChatOpenAI model
-        self.llm = ChatOpenAI(
-            model="gpt-4o-mini", 
+class JobScraper:
+    def __init__(self, api_key:str, cache: JobListingCache = None, store: "JobStore" = None):
+        """
+        Initialize JobScraper with OpenAI API key and an optional parsed-listing cache.
+
+        :param api_key: OpenAI API key
+        :param cache: JobListingCache used to skip fetching and parsing unchanged job listings
+        :param store: Optional JobStore every newly parsed listing is appended to
+        """
+        # Shared LangChain ChatOpenAI model from the process-wide client pool
+        self.llm = get_chat_model(
+            api_key,
+            model="gpt-4o-mini",
             temperature=0.5,  # Slightly creative responses
             streaming=True
         )
@@ -55,7 +78,7 @@ class JobScraper:
 
         ### **C**: **Context**
 
-        You are working with **raw HTML content** that contains structured information about job postings. This content will likely come in various formats and will include key sections like position descriptions, job responsibilities, skills, and benefits. 
+        You are working with **raw HTML content**, or markdown already extracted from the main content of the page, that contains structured information about job postings. This content will likely come in various formats and will include key sections like position descriptions, job responsibilities, skills, and benefits. 
 
         Job descriptions might be written in various styles, and the HTML format could vary from one company or job posting to another. For instance:
         - Some job descriptions may have `<ul>` or `<ol>` lists for responsibilities.
@@ -179,34 +202,210 @@ class JobScraper:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
 
+        self.cache = cache
+        self.store = store
+
+        # Size statistics of the last page sent to the model (see utils.html_pruner.PruneStats)
+        self.last_prune_stats = None
+
+        # Taxonomy skills of the last parsed listing, matched locally on the parsed result
+        self.last_job_skills: Dict[Skill, int] = None
+
+    def _fetch_job_page(self, job_list_url:str, extra_headers:dict = None):
+        with timed_http("JobScraper", "parse_job_listing", job_list_url):
+            response = requests.get(job_list_url, headers={**self.headers, **(extra_headers or {})}, timeout=10)
+            response.raise_for_status()
+        return response
+
     def _extract_html_contents(self, job_list_url:str):
-        response = requests.get(job_list_url, headers=self.headers, timeout=10)
-        response.raise_for_status()
+        response = self._fetch_job_page(job_list_url)
         soup = BeautifulSoup(response.text, 'html.parser')
         return soup
         
-    def parse_job_listing(self, job_list_url:str):
-        html_contents = self._extract_html_contents(job_list_url)
-        messages = [
-        SystemMessage(content=self.system_prompt),
-        HumanMessage(content=f"""
-        Given the provided html contents of the job listing.
-        Please parse and summarize the job description into a clear, structured document. 
-        The content is organized into logical sections including:
-        Position Name
+    def _prune_html_contents(self, soup: BeautifulSoup, job_list_url: str) -> str:
+        # Strip page chrome and markup locally so only the job description reaches the model
+        pruned_page = prune_job_html(soup)
+        stats = pruned_page.stats
+        self.last_prune_stats = stats
+        logger.info(
+            "Pruned %s: %d -> %d bytes, ~%d -> ~%d tokens (%.0f%% fewer)",
+            job_list_url, stats.raw_bytes, stats.pruned_bytes,
+            stats.raw_tokens, stats.pruned_tokens, stats.reduction * 100,
+        )
+        return pruned_page.text
+
+    def _structured_fields(self, soup: BeautifulSoup, job_list_url: str):
+        # Schema.org JobPosting data (JSON-LD or microdata) mapped locally onto the parsed listing fields
+        started = time.perf_counter()
+        posting, source = find_job_posting(soup)
+        fields = map_job_posting(posting) if posting is not None else None
+        telemetry.record("extract", "JobScraper", "structured_job_data", source or "-", time.perf_counter() - started, ok=fields is not None)
+        if fields is not None:
+            logger.info("Found %s JobPosting data on %s (missing: %s)", source, job_list_url, missing_fields(fields) or "none")
+        return fields, source
+
+    def _build_messages(self, page_contents: str, fields: list = None):
+        # When structured data already covers part of the listing, only the remaining sections are requested
+        sections = "\n        ".join(fields) if fields else """Position Name
         Position Overview
         About the Role
         Key Responsibilities
         Required Skills & Experience
         Highly Valued Experience
         Soft Skills
-        Benefits
-
-        HTML Contents:
-        {html_contents}
+        Benefits"""
+        only_missing = """
+        The other sections are already known: return a JSON object with only the sections listed above.
+        """ if fields else ""
+        return [
+        SystemMessage(content=self.system_prompt),
+        HumanMessage(content=f"""
+        Given the provided contents of the job listing (the main content of the page, already converted from HTML to markdown).
+        Please parse and summarize the job description into a clear, structured document. 
+        The content is organized into logical sections including:
+        {sections}
+        {only_missing}
+        Job Listing Contents:
+        {page_contents}
         """)
         ]
 
-        response = self.llm.invoke(messages)
-        return response.content
-        
\ No newline at end of file
+    def _fast_path(self, page: dict):
+        """
+        Decide how much of the listing still needs the model.
+
+        :return: Tuple of (complete result or None, fields to request from the model or None for all of them)
+        """
+        fields, source = page.get("structured"), page.get("structured_source")
+        missing = missing_fields(fields)
+        if fields and not missing:
+            fast_path_stats.record("full", source)
+            return format_job_fields(fields), None
+        fast_path_stats.record("partial" if fields else "none", source)
+        return None, missing if fields else None
+
+    def _lookup_cache(self, job_list_url: str):
+        # Fresh entries are served without touching the network
+        if self.cache is None:
+            return None, None
+        entry = self.cache.get(job_list_url)
+        if entry and self.cache.is_fresh(entry):
+            self.cache.record("hits")
+            return entry, entry["result"]
+        return entry, None
+
+    def _conditional_headers(self, entry) -> dict:
+        # Stale or unknown: conditional GET so an unchanged page costs a 304 and no parsing
+        return self.cache.conditional_headers(entry) if self.cache is not None else {}
+
+    def _process_response(self, job_list_url: str, entry, status_code: int, headers, text: str):
+        """
+        Turn a fetched job page into either a reusable cached result or the pruned page to parse.
+
+        :return: Tuple of (cached result or None, page dictionary for _store_result)
+        """
+        page = {"etag": headers.get("ETag"), "last_modified": headers.get("Last-Modified")}
+        if entry and status_code == 304:
+            self.cache.touch(job_list_url, page["etag"], page["last_modified"])
+            self.cache.record("revalidations")
+            return entry["result"], page
+
+        soup = BeautifulSoup(text, 'html.parser')
+        page["structured"], page["structured_source"] = self._structured_fields(soup, job_list_url)
+        page["contents"] = self._prune_html_contents(soup, job_list_url)
+        if self.cache is None:
+            return None, page
+
+        # Servers without validators: compare the hash of the pruned content instead
+        page["hash"] = content_hash(page["contents"])
+        if entry and entry["content_hash"] == page["hash"]:
+            known = entry
+        elif len(page["contents"]) >= MIN_SHARED_CONTENT_CHARS:
+            known = self.cache.get_by_content_hash(page["hash"])
+        else:
+            known = None
+        if known:
+            self.cache.put(job_list_url, page["hash"], known["result"], page["etag"], page["last_modified"])
+            self.cache.record("revalidations")
+            return known["result"], page
+
+        self.cache.record("misses")
+        return None, page
+
+    def _store_result(self, job_list_url: str, page: dict, result: str) -> None:
+        # A listing whose model output could not be parsed is returned but not cached, so the next request retries
+        if is_valid_json(result) and UNPARSED_OUTPUT_FIELD in json.loads(result):
+            return
+        if self.cache is not None and is_valid_json(result):
+            self.cache.put(job_list_url, page["hash"], result, page["etag"], page["last_modified"])
+        # Only fresh parses reach this point, so the corpus gets one row per new or changed listing
+        if self.store is not None and is_valid_json(result):
+            self.store.append(normalize_url(job_list_url), result, url=job_list_url)
+
+    def parse_job_listing(self, job_list_url:str):
+        result = self._parse_job_listing(job_list_url)
+        self.last_job_skills = extract_skills(result)
+        return result
+
+    def _parse_job_listing(self, job_list_url: str):
+        entry, result = self._lookup_cache(job_list_url)
+        if result is not None:
+            return result
+
+        response = self._fetch_job_page(job_list_url, self._conditional_headers(entry))
+        result, page = self._process_response(job_list_url, entry, response.status_code, response.headers, response.text)
+        if result is not None:
+            return result
+
+        result, fields = self._fast_path(page)
+        if result is None:
+            result = invoke_content(self.llm, self._build_messages(page["contents"], fields), agent="JobScraper", method="parse_job_listing")
+            result = merge_job_fields(page["structured"], result)
+        self._store_result(job_list_url, page, result)
+        return result
+
+    async def _afetch_job_page(self, job_list_url: str, extra_headers: dict = None, client: httpx.AsyncClient = None):
+        if client is None:
+            async with httpx.AsyncClient(follow_redirects=True) as own_client:
+                return await self._afetch_job_page(job_list_url, extra_headers, own_client)
+        with timed_http("JobScraper", "aparse_job_listing", job_list_url):
+            response = await client.get(job_list_url, headers={**self.headers, **(extra_headers or {})}, timeout=10)
+            if response.status_code != 304:  # httpx treats 304 Not Modified as an error status
+                response.raise_for_status()
+        return response
+
+    async def aparse_job_listing(self, job_list_url: str, client: httpx.AsyncClient = None):
+        """
+        Async counterpart of parse_job_listing.
+
+        The page is fetched with httpx and the model is awaited; cache access, pruning and
+        hashing run in a worker thread so the event loop is never blocked.
+
+        :param job_list_url: URL of the job listing
+        :param client: Optional shared httpx.AsyncClient (reuses connections across many parses)
+        :return: Parsed job listing as a JSON string
+        """
+        result = await self._aparse_job_listing(job_list_url, client)
+        self.last_job_skills = extract_skills(result)
+        return result
+
+    async def _aparse_job_listing(self, job_list_url: str, client: httpx.AsyncClient = None):
+        entry, result = await asyncio.to_thread(self._lookup_cache, job_list_url)
+        if result is not None:
+            return result
+
+        response = await self._afetch_job_page(job_list_url, self._conditional_headers(entry), client)
+        result, page = await asyncio.to_thread(
+            self._process_response, job_list_url, entry, response.status_code, response.headers, response.text
+        )
+        if result is not None:
+            return result
+
+        result, fields = self._fast_path(page)
+        if result is None:
+            result = await ainvoke_content(
+                self.llm, self._build_messages(page["contents"], fields), agent="JobScraper", method="aparse_job_listing"
+            )
+            result = merge_job_fields(page["structured"], result)
+        await asyncio.to_thread(self._store_result, job_list_url, page, result)
+        return result
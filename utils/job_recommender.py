@@ -0,0 +1,308 @@
+import json
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from utils.json_utils import flatten_text, load_listing
+from utils.skills import extract_skills
+
+if TYPE_CHECKING:
+    from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+# BM25 parameters: term frequency saturation and document length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Canonical taxonomy skills count as this many plain term occurrences, so "k8s" and "Kubernetes" rank alike
+SKILL_TERM_WEIGHT = 3
+
+TOKEN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[.\-/][a-z0-9+#]+)*")
+STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being both but by can could did do does doing
+for from had has have having he her here his how i if in into is it its just me more most my no nor not
+of on once only or other our out over own same she should so some such than that the their them then there
+these they this those through to too under until up very was we were what when where which while who will
+with would you your yours years year experience work team role
+""".split())
+
+# Seniority levels, from the most specific title pattern to the least; titles without a match are "mid"
+LEVEL_PATTERNS = [
+    ("intern", re.compile(r"\b(intern|internship|trainee|apprentice)\b")),
+    ("executive", re.compile(r"\b(vp|vice president|chief|cto|cio|ceo|head of)\b")),
+    ("director", re.compile(r"\bdirector\b")),
+    ("manager", re.compile(r"\bmanager\b")),
+    ("lead", re.compile(r"\b(staff|principal|lead|architect|distinguished)\b")),
+    ("senior", re.compile(r"\b(senior|sr\.?|iii|level 3)\b")),
+    ("junior", re.compile(r"\b(junior|jr\.?|entry[- ]level|graduate|associate|i)\b")),
+]
+LEVELS = ["intern", "junior", "mid", "senior", "lead", "manager", "director", "executive"]
+
+# Fields of a listing that may state where the job is
+LOCATION_FIELDS = ("Location", "Job Location", "Locations", "Work Location")
+
+
+@dataclass(frozen=True, slots=True)
+class JobMatch:
+    job_id: str
+    title: str
+    score: float
+    level: str
+    location: str
+    listing: Dict[str, Any]
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Terms of a text for ranking: lowercase words without stopwords, plus one "skill:<name>" term per
+    taxonomy skill mention so that aliases of the same skill share a term.
+    """
+    terms = [token for token in TOKEN.findall(text.lower()) if token not in STOPWORDS and len(token) > 1]
+    for skill, count in extract_skills(text).items():
+        terms.extend([f"skill:{skill.name.lower()}"] * (count * SKILL_TERM_WEIGHT))
+    return terms
+
+
+def infer_level(title: str) -> str:
+    title = (title or "").lower()
+    for level, pattern in LEVEL_PATTERNS:
+        if pattern.search(title):
+            return level
+    return "mid"
+
+
+def listing_location(listing: Dict[str, Any]) -> str:
+    for field in LOCATION_FIELDS:
+        if listing.get(field):
+            return flatten_text(listing[field]).strip()
+    return ""
+
+
+class JobRecommender:
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        """
+        In-memory BM25 index of parsed job listings, ranking all of them against a profile with one sparse
+        matrix-vector product.
+
+        Listings are added incrementally; re-adding a job id replaces the previous version. The BM25 weight
+        matrix is rebuilt lazily (in O(non-zeros), vectorized) on the first query after a change.
+
+        :param k1: BM25 term frequency saturation
+        :param b: BM25 document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._vocabulary: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._versions: Dict[str, Optional[str]] = {}
+        self._listings: List[Dict[str, Any]] = []
+
+        # Term counts of every row in CSR layout, grown in place as listings arrive
+        self._indptr: List[int] = [0]
+        self._indices: List[int] = []
+        self._counts: List[float] = []
+        self._lengths: List[int] = []
+        self._alive: List[bool] = []
+        self._levels: List[str] = []
+        self._locations: List[str] = []
+        self._texts: List[str] = []
+
+        self._weights: Optional["sparse.csr_matrix"] = None
+        self._filter_arrays: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self._rows
+
+    def is_current(self, job_id: str, version: str = None) -> bool:
+        return job_id in self._rows and self._versions.get(job_id) == version
+
+    def add(self, job_id: str, listing: Any, version: str = None) -> None:
+        """
+        Index one parsed listing.
+
+        :param job_id: Stable identifier, such as the normalized URL
+        :param listing: Parsed listing as a dictionary or the JSON string returned by JobScraper
+        :param version: Optional content version (e.g. the page hash) checked by is_current
+        """
+        listing = load_listing(listing)
+        text = flatten_text(listing)
+        terms: Dict[int, int] = {}
+        term_list = tokenize(text)
+        with self._lock:
+            for term in term_list:
+                column = self._vocabulary.setdefault(term, len(self._vocabulary))
+                terms[column] = terms.get(column, 0) + 1
+
+            if job_id in self._rows:
+                self._alive[self._rows[job_id]] = False
+            self._rows[job_id] = len(self._ids)
+            self._versions[job_id] = version
+            self._ids.append(job_id)
+            self._listings.append(listing)
+            self._indices.extend(terms)
+            self._counts.extend(terms.values())
+            self._indptr.append(len(self._indices))
+            self._lengths.append(len(term_list))
+            self._alive.append(True)
+            self._levels.append(infer_level(str(listing.get("Position Name", ""))))
+            self._locations.append(listing_location(listing).lower())
+            self._texts.append(text.lower())
+            self._weights = None
+            self._filter_arrays = None
+
+    def add_many(self, listings: Iterable[Tuple[str, Any]]) -> int:
+        """
+        Index several listings.
+
+        :param listings: Iterable of (job id, listing) pairs
+        :return: Number of listings added
+        """
+        added = 0
+        for job_id, listing in listings:
+            self.add(job_id, listing)
+            added += 1
+        return added
+
+    def _build(self) -> "sparse.csr_matrix":
+        # scipy is only needed once something is ranked; the job store imports this module for its helpers
+        from scipy import sparse
+
+        # BM25 document weights: idf(t) * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / average length))
+        rows = len(self._ids)
+        counts = sparse.csr_matrix(
+            (np.asarray(self._counts, dtype=np.float32), np.asarray(self._indices, dtype=np.int32), np.asarray(self._indptr, dtype=np.int64)),
+            shape=(rows, len(self._vocabulary)),
+        )
+        alive = np.asarray(self._alive, dtype=bool)
+        counts = (sparse.diags(alive.astype(np.float32)) @ counts).tocsr()
+        counts.eliminate_zeros()
+
+        documents = max(int(alive.sum()), 1)
+        frequencies = np.bincount(counts.indices, minlength=len(self._vocabulary))
+        idf = np.log1p((documents - frequencies + 0.5) / (frequencies + 0.5)).astype(np.float32)
+
+        lengths = np.asarray(self._lengths, dtype=np.float32)
+        average = lengths[alive].mean() if alive.any() else 1.0
+        norms = self.k1 * (1 - self.b + self.b * lengths / max(average, 1.0))
+        row_of = np.repeat(np.arange(rows), np.diff(counts.indptr))
+        tf = counts.data
+        counts.data = idf[counts.indices] * tf * (self.k1 + 1) / (tf + norms[row_of])
+        return counts.tocsr()
+
+    def _query_vector(self, profile_text: str) -> np.ndarray:
+        query = np.zeros(len(self._vocabulary), dtype=np.float32)
+        for term in tokenize(profile_text):
+            column = self._vocabulary.get(term)
+            if column is not None:
+                query[column] += 1
+        # Repeated profile terms count, but with diminishing returns
+        return np.log1p(query)
+
+    def _snapshot(self):
+        with self._lock:
+            if self._weights is None:
+                self._weights = self._build()
+            if self._filter_arrays is None:
+                self._filter_arrays = (
+                    np.asarray(self._alive, dtype=bool),
+                    np.asarray(self._levels, dtype=object),
+                    np.asarray(self._locations, dtype=object),
+                    np.asarray(self._texts, dtype=object),
+                )
+            return self._weights, self._filter_arrays, list(self._ids), list(self._listings)
+
+    def _mask(self, arrays, location: str = None, levels: Iterable[str] = None) -> np.ndarray:
+        alive, row_levels, row_locations, row_texts = arrays
+        mask = alive.copy()
+        if levels:
+            mask &= np.isin(row_levels, list(levels))
+        if location:
+            location = location.strip().lower()
+            # A stated location is matched first; listings without one match on their text
+            in_location = np.fromiter((location in value for value in row_locations), dtype=bool, count=len(row_locations))
+            unstated = row_locations == ""
+            in_text = np.fromiter((location in text for text in row_texts[unstated]), dtype=bool, count=int(unstated.sum()))
+            in_location[unstated] = in_text
+            mask &= in_location
+        return mask
+
+    def recommend(self, profile_text: str, k: int = 10, location: str = None, levels: Iterable[str] = None) -> List[JobMatch]:
+        """
+        Rank the indexed listings against a resume profile.
+
+        :param profile_text: Resume text or rendered ResumeProfile
+        :param k: Number of listings to return
+        :param location: Optional location (or "remote") the listing must mention
+        :param levels: Optional seniority levels to keep (see LEVELS)
+        :return: Top-k JobMatch list, best first; listings sharing no term with the profile are left out
+        """
+        return self.recommend_many([profile_text], k=k, location=location, levels=levels)[0]
+
+    def recommend_many(self, profile_texts: List[str], k: int = 10, location: str = None,
+                       levels: Iterable[str] = None) -> List[List[JobMatch]]:
+        """
+        Rank the indexed listings against several profiles with one sparse matrix product.
+
+        :return: One top-k list per profile, in the order of profile_texts
+        """
+        if not self._ids or not profile_texts:
+            return [[] for _ in profile_texts]
+        started = time.perf_counter()
+        weights, arrays, ids, listings = self._snapshot()
+        queries = np.vstack([self._query_vector(text) for text in profile_texts])[:, :weights.shape[1]]
+        scores = np.asarray((weights @ queries.T).T)
+        scores[:, ~self._mask(arrays, location, levels)] = 0.0
+
+        results = []
+        _, row_levels, row_locations, _ = arrays
+        for row_scores in scores:
+            candidates = np.flatnonzero(row_scores > 0)
+            if len(candidates) > k:
+                candidates = candidates[np.argpartition(-row_scores[candidates], k - 1)[:k]]
+            candidates = candidates[np.argsort(-row_scores[candidates], kind="stable")]
+            results.append([
+                JobMatch(
+                    job_id=ids[row],
+                    title=str(listings[row].get("Position Name") or ""),
+                    score=float(row_scores[row]),
+                    level=row_levels[row],
+                    location=listing_location(listings[row]),
+                    listing=listings[row],
+                )
+                for row in candidates
+            ])
+        logger.debug("Ranked %d listings for %d profiles in %.1f ms", len(ids), len(profile_texts), (time.perf_counter() - started) * 1000)
+        return results
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "listings": len(self._rows),
+                "terms": len(self._vocabulary),
+                "non_zeros": len(self._indices),
+            }
+
+
+def load_jsonl_listings(path: str) -> Iterable[Tuple[str, Any]]:
+    """
+    Read listings from a JSONL file written by utils.bulk_ingest (failed records are skipped).
+
+    :return: Iterator of (url, listing) pairs
+    """
+    with open(path, encoding="utf-8") as listings_file:
+        for number, line in enumerate(listings_file, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("ok", True) and record.get("result"):
+                yield record.get("url") or f"{path}:{number}", record["result"]
@@ -0,0 +1,388 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from pyarrow import fs
+
+from utils.job_cache import normalize_url
+from utils.job_recommender import infer_level, listing_location
+from utils.json_utils import flatten_text, load_listing
+from utils.skills import extract_skills
+from utils.storage import cache_path
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers in one process are still serialized by the thread lock
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Rows kept in memory before they are written as a new segment
+DEFAULT_FLUSH_ROWS = 256
+# Size-tiered compaction: segments within a factor TIER_FACTOR of each other in row count form a tier,
+# and a tier's segments are merged once it holds SEGMENTS_PER_TIER of them. Every row is rewritten about
+# once per tier, not on every compaction. Segments of COMPACT_ROWS rows or more are never merged again
+COMPACT_ROWS = 50_000
+TIER_FACTOR = 4
+SEGMENTS_PER_TIER = 4
+# Seconds a segment replaced by compaction is kept on disk, so scans that listed it before can still read it
+RETIRED_SEGMENT_SECONDS = 600
+# Rows per record batch inside a segment; scans and filters stream batch by batch
+BATCH_ROWS = 8192
+
+SCHEMA = pa.schema([
+    ("job_id", pa.string()),
+    ("url", pa.string()),
+    ("parsed_at", pa.timestamp("s", tz="UTC")),
+    ("title", pa.string()),
+    ("level", pa.string()),
+    ("location", pa.string()),
+    ("overview", pa.string()),
+    ("responsibilities", pa.list_(pa.string())),
+    ("required", pa.list_(pa.string())),
+    ("valued", pa.list_(pa.string())),
+    ("soft_skills", pa.list_(pa.string())),
+    ("benefits", pa.string()),
+    ("skills", pa.list_(pa.string())),
+    ("listing", pa.string()),
+])
+
+# Columns read by default; the raw listing JSON is only read when asked for
+SUMMARY_COLUMNS = ["job_id", "url", "parsed_at", "title", "level", "location", "skills", "benefits"]
+
+
+def _strings(value: Any) -> List[str]:
+    if value is None or value == "":
+        return []
+    if isinstance(value, (list, tuple)):
+        return [flatten_text(item) for item in value if item]
+    return [flatten_text(value)]
+
+
+def job_record(job_id: str, listing: Any, url: str = None, parsed_at: float = None) -> Dict[str, Any]:
+    """
+    Flatten a parsed listing into one row of the job store.
+
+    :param job_id: Stable identifier of the listing (the normalized URL for scraped listings)
+    :param listing: Parsed listing as a dictionary or the JSON string returned by JobScraper
+    """
+    listing = load_listing(listing)
+    title = flatten_text(listing.get("Position Name")).strip()
+    return {
+        "job_id": job_id,
+        "url": url,
+        "parsed_at": int(parsed_at or time.time()),
+        "title": title,
+        "level": infer_level(title),
+        "location": listing_location(listing),
+        "overview": " ".join(filter(None, (flatten_text(listing.get("Position Overview")), flatten_text(listing.get("About the Role"))))),
+        "responsibilities": _strings(listing.get("Key Responsibilities")),
+        "required": _strings(listing.get("Required Skills & Experience")),
+        "valued": _strings(listing.get("Highly Valued Experience")),
+        "soft_skills": _strings(listing.get("Soft Skills")),
+        "benefits": flatten_text(listing.get("Benefits")),
+        "skills": [skill.name for skill in extract_skills(flatten_text(listing))],
+        "listing": json.dumps(listing, ensure_ascii=False),
+    }
+
+
+class JobStore:
+    def __init__(self, path: str = None, flush_rows: int = DEFAULT_FLUSH_ROWS):
+        """
+        Append-only columnar store of parsed job listings, kept as Arrow IPC segment files.
+
+        Appends are buffered and written as new segments; a manifest replaced atomically lists the live
+        segments, so readers in other processes never see a half-written file. Reads memory-map the
+        segments and stream record batches, so filters and aggregations over hundreds of thousands of
+        listings touch only the columns and pages they need. Small segments are merged as they accumulate.
+
+        :param path: Directory of the store (defaults to job_store in the cache directory)
+        :param flush_rows: Buffered rows that trigger a write; 1 persists every append immediately
+        """
+        self.path = path or cache_path("job_store")
+        self.flush_rows = max(1, flush_rows)
+        os.makedirs(self.path, exist_ok=True)
+        self._manifest_path = os.path.join(self.path, "manifest.json")
+        self._lock = threading.Lock()
+        self._buffer: List[Dict[str, Any]] = []
+        self._filesystem = fs.LocalFileSystem(use_mmap=True)
+
+    def __enter__(self) -> "JobStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.flush()
+
+    @contextmanager
+    def _writer_lock(self):
+        # Serializes writers across threads and, through an advisory file lock, across processes
+        with self._lock, open(os.path.join(self.path, "store.lock"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self._manifest_path, encoding="utf-8") as manifest_file:
+                return json.load(manifest_file)
+        except FileNotFoundError:
+            return {"segments": []}
+
+    def _write_manifest(self, manifest: Dict[str, Any]) -> None:
+        temporary = f"{self._manifest_path}.{uuid.uuid4().hex}.tmp"
+        with open(temporary, "w", encoding="utf-8") as manifest_file:
+            json.dump(manifest, manifest_file)
+        os.replace(temporary, self._manifest_path)
+
+    def _write_segment(self, table: pa.Table) -> Dict[str, Any]:
+        # Uncompressed IPC files can be memory-mapped and read without copying
+        name = f"segment-{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}.arrow"
+        temporary = os.path.join(self.path, name + ".tmp")
+        with pa.OSFile(temporary, "wb") as sink, pa.ipc.new_file(sink, SCHEMA) as writer:
+            writer.write_table(table, max_chunksize=BATCH_ROWS)
+        os.replace(temporary, os.path.join(self.path, name))
+        return {"file": name, "rows": table.num_rows}
+
+    def append(self, job_id: str, listing: Any, url: str = None) -> None:
+        """
+        Add a parsed listing; it is written once flush_rows listings are buffered (or on flush()).
+
+        :param job_id: Stable identifier, e.g. the normalized URL
+        :param listing: Parsed listing as a dictionary or the JSON string returned by JobScraper
+        :param url: Original URL of the listing
+        """
+        with self._lock:
+            self._buffer.append(job_record(job_id, listing, url))
+            full = len(self._buffer) >= self.flush_rows
+        if full:
+            self.flush()
+
+    def append_many(self, listings: Iterable[Tuple[str, Any]]) -> int:
+        """
+        :param listings: Iterable of (url, listing) pairs; the normalized URL is used as job id
+        :return: Number of listings appended
+        """
+        appended = 0
+        for url, listing in listings:
+            self.append(normalize_url(url), listing, url=url)
+            appended += 1
+        return appended
+
+    def flush(self) -> None:
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return
+        table = pa.Table.from_pylist(rows, schema=SCHEMA)
+        with self._writer_lock():
+            manifest = self._read_manifest()
+            manifest["segments"].append(self._write_segment(table))
+            self._write_manifest(manifest)
+            self._compact(manifest)
+            self._remove_retired(manifest)
+
+    @staticmethod
+    def _tier(rows: int) -> int:
+        tier = 0
+        while rows >= TIER_FACTOR:
+            rows //= TIER_FACTOR
+            tier += 1
+        return tier
+
+    def _compact(self, manifest: Dict[str, Any]) -> None:
+        # A merged segment can fill the next tier up, so keep going until no tier is full
+        while True:
+            tiers: Dict[int, List[Dict[str, Any]]] = {}
+            for segment in manifest["segments"]:
+                if segment["rows"] < COMPACT_ROWS:
+                    tiers.setdefault(self._tier(segment["rows"]), []).append(segment)
+            full = [segments for _, segments in sorted(tiers.items()) if len(segments) >= SEGMENTS_PER_TIER]
+            if not full:
+                return
+            self._merge(manifest, full[0])
+
+    def _merge(self, manifest: Dict[str, Any], segments: List[Dict[str, Any]]) -> None:
+        merged = pa.concat_tables(self._read_segment(segment["file"]) for segment in segments)
+        replacement = self._write_segment(merged)
+        merged_files = {segment["file"] for segment in segments}
+        # The merged segment takes the place of the oldest one it replaces, keeping segments in write order
+        position = next(index for index, segment in enumerate(manifest["segments"]) if segment["file"] in merged_files)
+        kept = [segment for segment in manifest["segments"] if segment["file"] not in merged_files]
+        manifest["segments"] = kept[:position] + [replacement] + kept[position:]
+        # Segment files are opened lazily while a scan runs, so replaced ones are only deleted after a grace period
+        retired_at = time.time()
+        manifest.setdefault("retired", []).extend({"file": name, "retired_at": retired_at} for name in sorted(merged_files))
+        self._write_manifest(manifest)
+        logger.info("Compacted %d job store segments (%d rows)", len(merged_files), merged.num_rows)
+
+    def _remove_retired(self, manifest: Dict[str, Any]) -> None:
+        expired = [segment for segment in manifest.get("retired", [])
+                   if time.time() - segment["retired_at"] >= RETIRED_SEGMENT_SECONDS]
+        if not expired:
+            return
+        for segment in expired:
+            try:
+                os.remove(os.path.join(self.path, segment["file"]))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning("Could not remove compacted segment %s: %s", segment["file"], e)
+        manifest["retired"] = [segment for segment in manifest["retired"] if segment not in expired]
+        self._write_manifest(manifest)
+
+    def _read_segment(self, name: str) -> pa.Table:
+        with pa.memory_map(os.path.join(self.path, name)) as source:
+            return pa.ipc.open_file(source).read_all()
+
+    def dataset(self) -> ds.Dataset:
+        """
+        Memory-mapped pyarrow Dataset over the segments listed in the manifest.
+
+        Segments are opened when the dataset is scanned. Ones replaced by a compaction in the meantime
+        stay on disk for RETIRED_SEGMENT_SECONDS, so a scan started within that window completes.
+        """
+        files = [os.path.join(self.path, segment["file"]) for segment in self._read_manifest()["segments"]]
+        return ds.dataset(files, schema=SCHEMA, format="ipc", filesystem=self._filesystem)
+
+    def __len__(self) -> int:
+        # Listings, not rows: a job parsed several times counts once
+        return pc.count_distinct(self.dataset().to_table(columns=["job_id"]).column("job_id")).as_py()
+
+    @staticmethod
+    def _filter_expression(title: str = None, benefits: str = None, levels: Iterable[str] = None,
+                           location: str = None) -> Optional[ds.Expression]:
+        expressions = []
+        if title:
+            expressions.append(pc.match_substring(ds.field("title"), title, ignore_case=True))
+        if benefits:
+            expressions.append(pc.match_substring(ds.field("benefits"), benefits, ignore_case=True))
+        if location:
+            expressions.append(pc.match_substring(ds.field("location"), location, ignore_case=True))
+        if levels:
+            expressions.append(ds.field("level").isin(list(levels)))
+        expression = None
+        for item in expressions:
+            expression = item if expression is None else expression & item
+        return expression
+
+    @staticmethod
+    def _skills_mask(column: pa.ListArray, skills: Iterable[str]) -> np.ndarray:
+        # Rows whose skill list holds every requested skill, computed on the flattened list values
+        mask = np.ones(len(column), dtype=bool)
+        flat = pc.list_flatten(column)
+        parents = pc.list_parent_indices(column).to_numpy()
+        for skill in skills:
+            hits = pc.equal(pc.utf8_lower(flat), skill.lower()).to_numpy(zero_copy_only=False)
+            rows = np.zeros(len(column), dtype=bool)
+            rows[parents[hits]] = True
+            mask &= rows
+        return mask
+
+    @staticmethod
+    def _latest_mask(dataset: ds.Dataset) -> np.ndarray:
+        # Rows holding the most recent parse of their job id, in dataset order, from the job_id and parsed_at
+        # columns only; among parses with the same timestamp the one written last wins
+        table = dataset.to_table(columns=["job_id", "parsed_at"])
+        frame = table.to_pandas().iloc[::-1]
+        latest = frame.sort_values("parsed_at", ascending=False, kind="stable").drop_duplicates("job_id").index
+        mask = np.zeros(table.num_rows, dtype=bool)
+        mask[latest.to_numpy()] = True
+        return mask
+
+    def _latest_batches(self, dataset: ds.Dataset, columns: List[str]) -> Iterator[pa.RecordBatch]:
+        mask = self._latest_mask(dataset)
+        offset = 0
+        for fragment in dataset.get_fragments():
+            for batch in fragment.to_batches(columns=columns, batch_size=BATCH_ROWS):
+                yield batch.filter(pa.array(mask[offset:offset + batch.num_rows]))
+                offset += batch.num_rows
+
+    def scan(self, columns: List[str] = None, title: str = None, skills: Iterable[str] = None, benefits: str = None,
+             levels: Iterable[str] = None, location: str = None, latest_only: bool = False) -> Iterator[pa.RecordBatch]:
+        """
+        Stream matching listings batch by batch, without loading the store into memory.
+
+        Text filters are case-insensitive substring matches; skills are canonical taxonomy names that
+        must all be present.
+
+        :param columns: Columns to read (SUMMARY_COLUMNS by default)
+        :param latest_only: Only consider the most recent parse of each job id; the filters then apply to that
+                            parse, so a listing whose newest parse no longer matches is left out
+        :return: Iterator of record batches
+        """
+        columns = list(columns or SUMMARY_COLUMNS)
+        skills = list(skills or [])
+        expression = self._filter_expression(title, benefits, levels, location)
+        dataset = self.dataset()
+        if latest_only:
+            # Filters run on the latest rows, so their columns are read along with the requested ones
+            filter_columns = [column for column, value in (("title", title), ("benefits", benefits), ("level", levels),
+                                                           ("location", location), ("skills", skills)) if value]
+            read_columns = columns + [column for column in filter_columns if column not in columns]
+            batches = (batch.filter(expression) if expression is not None else batch
+                       for batch in self._latest_batches(dataset, read_columns))
+        else:
+            read_columns = columns + (["skills"] if skills and "skills" not in columns else [])
+            batches = dataset.to_batches(columns=read_columns, filter=expression, batch_size=BATCH_ROWS)
+        for batch in batches:
+            if skills and batch.num_rows:
+                batch = batch.filter(pa.array(self._skills_mask(batch.column("skills"), skills)))
+            if batch.num_rows:
+                yield batch.select(columns)
+
+    def query(self, latest_only: bool = True, limit: int = None, **filters) -> pd.DataFrame:
+        """
+        Matching listings as a DataFrame.
+
+        :param latest_only: Keep only the most recent parse of each job id, filtered as it is now
+        :param limit: Optional maximum number of rows, newest first
+        :param filters: Keyword arguments of scan (columns, title, skills, benefits, levels, location)
+        """
+        columns = list(filters.pop("columns", None) or SUMMARY_COLUMNS)
+        read_columns = columns + [column for column in ("job_id", "parsed_at") if column not in columns]
+        batches = list(self.scan(columns=read_columns, latest_only=latest_only, **filters))
+        frame = pa.Table.from_batches(batches, schema=SCHEMA.empty_table().select(read_columns).schema).to_pandas()
+        frame = frame.sort_values("parsed_at", ascending=False, kind="stable")
+        if limit is not None:
+            frame = frame.head(limit)
+        return frame[columns].reset_index(drop=True)
+
+    def count_by(self, column: str, **filters) -> pd.Series:
+        """
+        Number of listings per value of a string column (e.g. "level" or "location"), largest first.
+
+        Only the most recent parse of each job id is counted, as in query.
+        """
+        counts = self.query(columns=[column], **filters)[column].value_counts(dropna=False)
+        return counts.rename_axis(None).rename("listings").astype("int64")
+
+    def top_skills(self, limit: int = 20, **filters) -> pd.Series:
+        """
+        Most requested taxonomy skills across the matching listings (the most recent parse of each job id).
+        """
+        counts = self.query(columns=["skills"], **filters)["skills"].explode().value_counts()
+        return counts.rename_axis(None).rename("listings").astype("int64").head(limit)
+
+    def stats(self) -> Dict[str, float]:
+        segments = self._read_manifest()["segments"]
+        return {
+            "segments": len(segments),
+            "rows": sum(segment["rows"] for segment in segments),
+            "buffered": len(self._buffer),
+            "bytes": sum(os.path.getsize(os.path.join(self.path, segment["file"]))
+                         for segment in segments if os.path.exists(os.path.join(self.path, segment["file"]))),
+        }
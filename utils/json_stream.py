@@ -0,0 +1,93 @@
+import json
+import logging
+from typing import Any, List, Tuple
+
+from utils.resume_profile import repair_json
+
+logger = logging.getLogger(__name__)
+
+
+class JSONSectionStream:
+    def __init__(self):
+        """
+        Incremental parser for a streamed JSON object that emits each top-level member as soon as it closes.
+
+        Feed it the chunks of a model response; text before the opening brace (such as a
+        code fence) and after the closing brace is ignored. Only the member currently being
+        received is buffered, so memory is bounded by the largest section.
+        """
+        self._member = []       # Characters of the top-level member being received
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self.started = False
+        self.done = False
+        self.sections = {}
+
+    def _emit(self, member: str) -> List[Tuple[str, Any]]:
+        if not member.strip():
+            return []
+        try:
+            parsed = json.loads("{" + member + "}", strict=False)
+        except ValueError:
+            try:
+                parsed = json.loads(repair_json("{" + member), strict=False)
+            except ValueError:
+                logger.warning("Skipping unparseable section: %.80s", member.strip())
+                return []
+        self.sections.update(parsed)
+        return list(parsed.items())
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Consume the next chunk of the response.
+
+        :param chunk: Text received from the model
+        :return: List of (section name, value) pairs completed by this chunk
+        """
+        completed = []
+        for char in chunk:
+            if self.done:
+                break
+            if not self.started:
+                if char == "{":
+                    self.started, self._depth = True, 1
+                continue
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    # Closing brace of the object: the last member is complete
+                    self.done = True
+                    completed.extend(self._emit("".join(self._member)))
+                    self._member = []
+                    break
+            elif char == "," and self._depth == 1:
+                completed.extend(self._emit("".join(self._member)))
+                self._member = []
+                continue
+            self._member.append(char)
+        return completed
+
+    def close(self) -> List[Tuple[str, Any]]:
+        """
+        Finish a response that ended without closing the object (e.g. a truncated stream).
+
+        :return: The last member, when it can be repaired
+        """
+        if self.done or not self.started:
+            return []
+        self.done = True
+        member, self._member = "".join(self._member), []
+        return self._emit(member)
@@ -0,0 +1,49 @@
+import json
+from typing import Any, Dict
+
+
+def strip_code_fence(text: str) -> str:
+    """
+    Remove a Markdown code fence the model sometimes wraps around JSON output.
+
+    :param text: Raw model output
+    :return: Text without the surrounding ``` / ```json fence
+    """
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = text[4:] if text.lower().startswith("json") else text
+    return text.strip()
+
+
+def is_valid_json(result: str) -> bool:
+    # Only well-formed model outputs are worth caching
+    try:
+        json.loads(strip_code_fence(result))
+    except ValueError:
+        return False
+    return True
+
+
+def load_listing(listing: Any) -> Dict[str, Any]:
+    """
+    Parsed job listing as a dictionary, whether given as one or as the JSON string returned by JobScraper.
+
+    :return: The listing; text that is not a JSON object is kept as its "Position Overview"
+    """
+    if isinstance(listing, dict):
+        return listing
+    try:
+        data = json.loads(strip_code_fence(str(listing)), strict=False)
+    except ValueError:
+        return {"Position Overview": str(listing)}
+    return data if isinstance(data, dict) else {"Position Overview": str(listing)}
+
+
+def flatten_text(value: Any) -> str:
+    # All string values of nested dictionaries and lists, joined with spaces
+    if isinstance(value, dict):
+        return " ".join(flatten_text(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return " ".join(flatten_text(item) for item in value)
+    return "" if value is None else str(value)
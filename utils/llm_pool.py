@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Tuple
+
+if TYPE_CHECKING:
+    import httpx
+    from langchain_openai import ChatOpenAI
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+
+def key_fingerprint(api_key: str) -> str:
+    # Registry keys never hold the raw API key
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+def _loop_local_transport(**transport_options) -> "httpx.AsyncBaseTransport":
+    # Async connections belong to the event loop that opened them, so each loop gets its own connection pool
+    import httpx
+
+    class LoopLocalTransport(httpx.AsyncBaseTransport):
+        def __init__(self):
+            self.transports: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport]" = weakref.WeakKeyDictionary()
+
+        async def handle_async_request(self, request: "httpx.Request") -> "httpx.Response":
+            loop = asyncio.get_running_loop()
+            transport = self.transports.get(loop)
+            if transport is None:
+                transport = self.transports[loop] = httpx.AsyncHTTPTransport(**transport_options)
+            return await transport.handle_async_request(request)
+
+        async def aclose(self) -> None:
+            loop = asyncio.get_running_loop()
+            transport = self.transports.pop(loop, None)
+            if transport is not None:
+                await transport.aclose()
+
+    return LoopLocalTransport()
+
+
+class _HTTPPool:
+    def __init__(self, client: "httpx.Client", async_client: "httpx.AsyncClient", async_transport):
+        # Connection pools of one API key, shared by every ChatOpenAI client created for it
+        self.client = client
+        self.async_client = async_client
+        self.async_transport = async_transport
+        self.users = 0
+        self.evicted = False
+
+    def close(self) -> None:
+        self.client.close()
+        # Async pools are closed on their own loop; pools of loops that already closed went with them
+        for loop, transport in list(self.async_transport.transports.items()):
+            if loop.is_running():
+                asyncio.run_coroutine_threadsafe(transport.aclose(), loop)
+
+
+class LLMClientPool:
+    def __init__(self, max_clients: int = 64, max_api_keys: int = 16, max_connections: int = 20,
+                 keepalive_expiry: float = 60.0):
+        """
+        Thread-safe registry of ChatOpenAI clients shared by all agents and sessions.
+
+        Clients are keyed on the API key and model settings and are handed the API key
+        explicitly, so the process environment is never modified. Every client for the same
+        API key shares one keep-alive HTTP connection pool, so TLS handshakes are paid once per
+        key instead of once per agent instance. Both registries are LRU-bounded; an evicted
+        connection pool is closed once no ChatOpenAI client created with it is left.
+
+        :param max_clients: Maximum number of ChatOpenAI clients kept in the registry
+        :param max_api_keys: Maximum number of API keys with a live HTTP connection pool
+        :param max_connections: Connection limit of each per-key HTTP pool
+        :param keepalive_expiry: Seconds an idle keep-alive connection is kept open
+        """
+        self.max_clients = max_clients
+        self.max_api_keys = max_api_keys
+        self.max_connections = max_connections
+        self.keepalive_expiry = keepalive_expiry
+        # Reentrant: a client's finalizer may run during garbage collection while the lock is held
+        self._lock = threading.RLock()
+        self._clients: "OrderedDict[Tuple, ChatOpenAI]" = OrderedDict()
+        self._http_pools: "OrderedDict[str, _HTTPPool]" = OrderedDict()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "closed_http_pools": 0}
+
+    def _http_pool(self, fingerprint: str) -> _HTTPPool:
+        http_pool = self._http_pools.get(fingerprint)
+        if http_pool is not None:
+            self._http_pools.move_to_end(fingerprint)
+            return http_pool
+        import httpx
+        limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections,
+                              keepalive_expiry=self.keepalive_expiry)
+        timeout = httpx.Timeout(120.0, connect=10.0)
+        async_transport = _loop_local_transport(limits=limits)
+        http_pool = _HTTPPool(httpx.Client(limits=limits, timeout=timeout),
+                              httpx.AsyncClient(transport=async_transport, timeout=timeout), async_transport)
+        self._http_pools[fingerprint] = http_pool
+        while len(self._http_pools) > self.max_api_keys:
+            _, evicted = self._http_pools.popitem(last=False)
+            evicted.evicted = True
+            # Agents created earlier may still hold clients using it; the last one to go closes it
+            if not evicted.users:
+                self._close(evicted)
+        return http_pool
+
+    def _close(self, http_pool: _HTTPPool) -> None:
+        http_pool.close()
+        self._counters["closed_http_pools"] += 1
+
+    def _release(self, http_pool: _HTTPPool) -> None:
+        # Finalizer of a ChatOpenAI client
+        with self._lock:
+            http_pool.users -= 1
+            if http_pool.evicted and not http_pool.users:
+                self._close(http_pool)
+
+    def get(self, api_key: str, model: str = DEFAULT_MODEL, temperature: float = 0.7,
+            streaming: bool = True) -> "ChatOpenAI":
+        """
+        Return a pooled ChatOpenAI client for the given API key and model settings.
+
+        :param api_key: OpenAI API key the client authenticates with
+        :param model: OpenAI model name
+        :param temperature: Sampling temperature
+        :param streaming: Whether the client streams by default
+        :return: Shared ChatOpenAI instance (safe to use from several threads)
+        """
+        fingerprint = key_fingerprint(api_key)
+        registry_key = (fingerprint, model, temperature, streaming)
+        with self._lock:
+            llm = self._clients.get(registry_key)
+            if llm is not None:
+                self._clients.move_to_end(registry_key)
+                self._counters["hits"] += 1
+                return llm
+
+            self._counters["misses"] += 1
+            # Imported on the first client: langchain_openai and the OpenAI SDK take a second or more to load
+            from langchain_openai import ChatOpenAI
+            http_pool = self._http_pool(fingerprint)
+            llm = ChatOpenAI(
+                model=model,
+                temperature=temperature,
+                streaming=streaming,
+                stream_usage=True,  # Token usage (including cached prompt tokens) on streamed responses
+                api_key=api_key,
+                http_client=http_pool.client,
+                http_async_client=http_pool.async_client,
+            )
+            http_pool.users += 1
+            weakref.finalize(llm, self._release, http_pool)
+            self._clients[registry_key] = llm
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+                self._counters["evictions"] += 1
+            return llm
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters, clients=len(self._clients), api_keys=len(self._http_pools))
+
+
+# Process-wide pool used by all agents
+default_pool = LLMClientPool()
+
+
+def get_chat_model(api_key: str, model: str = DEFAULT_MODEL, temperature: float = 0.7,
+                   streaming: bool = True) -> "ChatOpenAI":
+    return default_pool.get(api_key, model=model, temperature=temperature, streaming=streaming)
@@ -1,34 +1,51 @@
-import os
-from langchain_openai import ChatOpenAI
-from langchain.schema import HumanMessage, SystemMessage, AIMessage
-from typing import List, Generator, Dict
+from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
+from utils.llm_pool import get_chat_model
+from utils.telemetry import invoke_content, ainvoke_content, stream_content, astream_content
+from utils.chat_history import ConversationWindow
+from utils.report_cache import ReportCache, report_cache_key
+from utils.resume_profile import ResumeProfile, render_profile
+from utils.skills import Skill, extract_skills, format_skill_gap, skill_gap
+from typing import List, Generator, Dict, AsyncGenerator, Union
 
 class MockInterview:
-    def __init__(self, api_key: str, candidate_details:str, job_listing_data:str):
+    # Bump when the interview questions prompt changes so cached reports are regenerated
+    PROMPT_VERSION = "2"
+
+    def __init__(self, api_key: str, candidate_details: Union[str, ResumeProfile], job_listing_data:str, cache: ReportCache = None,
+                 resume_skills: Dict[Skill, int] = None, job_skills: Dict[Skill, int] = None):
         """
         Initialize MockInterview with OpenAI API key and optional candidate details.
         
         :param api_key: OpenAI API key
+        :param candidate_details: ResumeProfile (only the fields the interviewer needs are sent) or the raw analysis text
+        :param cache: Optional ReportCache reusing interview questions generated for the same profile and job
+        :param resume_skills: Taxonomy skills of the resume text (ResumeAnalyzer.last_resume_skills); matched on the profile when omitted
+        :param job_skills: Taxonomy skills of the job listing (JobScraper.last_job_skills); matched on the listing when omitted
         """
-        # Set the API key for OpenAI
-        os.environ["OPENAI_API_KEY"] = api_key
+        self.model = "gpt-4o-mini"
+        self.candidate_details = render_profile(candidate_details, "for_interview")
+        self.job_listing_data = job_listing_data
+        self.cache = cache
+
+        # Skill coverage computed locally, so the model gets the overlap and gaps instead of working them out
+        self.skill_gap = skill_gap(
+            resume_skills if resume_skills is not None else extract_skills(self.candidate_details),
+            job_skills if job_skills is not None else extract_skills(str(job_listing_data)),
+        )
+        self.skill_hints = format_skill_gap(self.skill_gap)
 
-        # Create a LangChain ChatOpenAI model
-        self.llm = ChatOpenAI(
-            model="gpt-4o-mini", 
+        # Shared LangChain ChatOpenAI model from the process-wide client pool
+        self.llm = get_chat_model(
+            api_key,
+            model=self.model,
             temperature=0.7,  # Slightly creative responses
             streaming=True
         )
 
-        # System prompt as a LangChain message template
-        self.system_prompt = f"""
+        # Static instructions: identical for every interview, so they form a cacheable prompt prefix
+        self.system_prompt = """
         You are an experienced technical interviewer conducting a technical interview.
-    
-        Candidate Profile:
-        {candidate_details}
-        
-        Job Requirements and Description:
-        {job_listing_data}
+        The candidate profile and the job requirements and description are provided after these instructions.
         
         As a technical interviewer, you should:
         1. Focus on the technical skills required for the position and the candidate's relevant experience
@@ -75,11 +92,23 @@ class MockInterview:
         Remember to:
         - Stay within the scope of the job requirements
         - Focus on technologies mentioned in both the resume and job listing
+        - Use the skill coverage summary, when given, to probe matched skills in depth and to ask how the candidate would close the missing ones
         - Test both breadth and depth of technical knowledge
         - Simulate a realistic interview environment
         - After the last question, instead of answering the question, please provide a detailed report and analysis of the technical accuracy and completeness of the interview responses and provide constructive feeback along with observations and suggestions for improvement.
         """
 
+        # Per-interview data goes after the static prefix and is shared by every call of this interview
+        self.interview_context = f"""
+        Candidate Profile:
+        {self.candidate_details}
+        
+        Job Requirements and Description:
+        {job_listing_data}
+
+        {self.skill_hints}
+        """
+
         self.start_interview_prompt = """
         Based on the previously provided candidate profile and job listing, generate an appropriate initial technical interview question. 
         The question should:
@@ -90,30 +119,46 @@ class MockInterview:
         
         Format the response as a natural conversation opener from a technical interviewer."""
     
+    def _start_interview_messages(self) -> list:
+        # Add system messages first, then the request for the opening question
+        return [
+            SystemMessage(content=self.system_prompt),
+            SystemMessage(content=self.interview_context),
+            HumanMessage(content=self.start_interview_prompt),
+        ]
+
     def start_interview(self):
         # Initialize the interview with the first question
-         # Convert input messages to LangChain message objects
-        chat_messages = []
-        
-        # Add system message first
-        chat_messages.append(SystemMessage(content=self.system_prompt))
-        chat_messages.append(HumanMessage(content=self.start_interview_prompt))
+        return invoke_content(self.llm, self._start_interview_messages(), agent="MockInterview", method="start_interview")
 
-        response = self.llm.invoke(chat_messages)
-        return response.content
+    def stream_start_interview(self) -> Generator[str, None, None]:
+        """
+        Streaming variant of start_interview, so the opener can be generated in the background and buffered.
 
-    def mock_interview_chat(self, messages: List[Dict[str, str]]) -> Generator[str, None, None]:
+        :return: Generator yielding chunks of the interviewer's opening message
         """
-        Generate a streaming mock interview coaching response.
-        
-        :param messages: List of message dictionaries with 'role' and 'content' keys
-        :return: Generator yielding response chunks
+        yield from stream_content(self.llm, self._start_interview_messages(), agent="MockInterview", method="stream_start_interview")
+
+    async def astart_interview(self) -> str:
         """
+        Async counterpart of start_interview.
+
+        :return: Opening message of the interviewer
+        """
+        return await ainvoke_content(self.llm, self._start_interview_messages(), agent="MockInterview", method="astart_interview")
+
+    def _build_chat_messages(self, messages: List[Dict[str, str]], history: ConversationWindow = None) -> list:
         # Convert input messages to LangChain message objects
         chat_messages = []
         
-        # Add system message first
+        # Add the static system prompt first, then the candidate and job details
         chat_messages.append(SystemMessage(content=self.system_prompt))
+        chat_messages.append(SystemMessage(content=self.interview_context))
+
+        # Earlier turns that no longer fit the token budget are represented by their summary
+        summary_message = history.summary_message() if history is not None else None
+        if summary_message is not None:
+            chat_messages.append(summary_message)
         
         # Convert user messages
         for msg in messages:
@@ -121,21 +166,47 @@ class MockInterview:
                 chat_messages.append(HumanMessage(content=msg['content']))
             elif msg['role'] == 'assistant':
                 chat_messages.append(AIMessage(content=msg['content']))
+        return chat_messages
 
-        # Stream the response
-        for chunk in self.llm.stream(chat_messages):
-            if chunk and chunk.content:
-                yield chunk.content
-    
-    def generate_interview_questions(self) -> str:
+    def mock_interview_chat(self, messages: List[Dict[str, str]], history: ConversationWindow = None) -> Generator[str, None, None]:
         """
-        Generate a comprehensive interview questions based on candidate profile and job listing data.
+        Generate a streaming mock interview coaching response.
         
-        :return: Detailed interview questions
+        :param messages: List of message dictionaries with 'role' and 'content' keys
+        :param history: Optional ConversationWindow keeping the prompt within a token budget
+        :return: Generator yielding response chunks
+        """
+        # Stream the response
+        if history is not None:
+            _, messages = history.window(messages, self.llm)
+        chat_messages = self._build_chat_messages(messages, history)
+        if history is not None:
+            history.record_prompt(chat_messages)
+
+        yield from stream_content(self.llm, chat_messages, agent="MockInterview", method="mock_interview_chat")
+
+    async def astream_mock_interview_chat(self, messages: List[Dict[str, str]], history: ConversationWindow = None) -> AsyncGenerator[str, None]:
         """
+        Async counterpart of mock_interview_chat.
+
+        :param messages: List of message dictionaries with 'role' and 'content' keys
+        :param history: Optional ConversationWindow keeping the prompt within a token budget
+        :return: Async generator yielding response chunks
+        """
+        if history is not None:
+            _, messages = await history.awindow(messages, self.llm)
+        chat_messages = self._build_chat_messages(messages, history)
+        if history is not None:
+            history.record_prompt(chat_messages)
+
+        async for chunk in astream_content(self.llm, chat_messages, agent="MockInterview", method="astream_mock_interview_chat"):
+            yield chunk
+    
+    def _interview_questions_messages(self) -> list:
         # Create the messages list, including the system message with the formatted profile
-        profile_messages = [
+        return [
             SystemMessage(content=self.system_prompt),
+            SystemMessage(content=self.interview_context),
             HumanMessage(content="""
             Based on the candidate's profile and the provided job listing details, 
             create a tailored list of interview questions that assess their technical skills, professional experience, cultural fit, and alignment with the company’s values. 
@@ -146,13 +217,32 @@ class MockInterview:
             """)
         ]
 
+    def generate_interview_questions(self, regenerate: bool = False) -> str:
+        """
+        Generate a comprehensive interview questions based on candidate profile and job listing data.
+        
+        :param regenerate: Ignore cached interview questions and generate new ones
+        :return: Detailed interview questions
+        """
         #Stream the recommendation and yield it incrementally
-        for chunk in self.llm.stream(profile_messages):
-            if chunk and chunk.content:
-                yield chunk.content
+        generate = lambda: stream_content(self.llm, self._interview_questions_messages(), agent="MockInterview", method="generate_interview_questions")
+        if self.cache is None:
+            yield from generate()
+            return
+        yield from self.cache.stream(self._interview_questions_cache_key(), generate, regenerate=regenerate)
 
-        # response = self.llm.invoke(profile_messages)
-        # return response.content
+    async def astream_interview_questions(self, regenerate: bool = False) -> AsyncGenerator[str, None]:
+        """
+        Async counterpart of generate_interview_questions.
 
-    
+        :param regenerate: Ignore cached interview questions and generate new ones
+        :return: Async generator yielding interview question chunks
+        """
+        generate = lambda: astream_content(self.llm, self._interview_questions_messages(), agent="MockInterview", method="astream_interview_questions")
+        chunks = generate() if self.cache is None else self.cache.astream(self._interview_questions_cache_key(), generate, regenerate=regenerate)
+        async for chunk in chunks:
+            yield chunk
 
+    def _interview_questions_cache_key(self) -> str:
+        return report_cache_key("interview_questions", str(self.candidate_details) + self.skill_hints, str(self.job_listing_data),
+                                self.PROMPT_VERSION, self.model)
@@ -0,0 +1,199 @@
+import dataclasses
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+def _data_size(value: Any, seen: Set[int]) -> int:
+    # Strings, numbers, plain containers and dataclasses count; other objects are referenced, not owned
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, (str, bytes, bytearray, int, float, bool)) or value is None:
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_data_size(key, seen) + _data_size(item, seen) for key, item in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(_data_size(item, seen) for item in value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return sys.getsizeof(value) + sum(_data_size(getattr(value, field.name), seen) for field in dataclasses.fields(value))
+    return 0
+
+
+def approximate_size(value: Any) -> int:
+    """
+    Approximate bytes kept resident by caching a value.
+
+    An object's own attributes are counted, but objects it merely references (pooled LLM clients,
+    shared caches) are not, since they stay resident whether or not the entry is cached.
+
+    :param value: Cached value, e.g. an agent instance
+    :return: Size in bytes
+    """
+    seen: Set[int] = set()
+    attributes = getattr(value, "__dict__", None)
+    if attributes is not None and not dataclasses.is_dataclass(value):
+        seen.add(id(value))
+        return sys.getsizeof(value) + _data_size(attributes, seen)
+    return _data_size(value, seen)
+
+
+class _Entry:
+    def __init__(self, value: Any, size: int, sessions: Set[Hashable]):
+        self.value = value
+        self.size = size
+        self.sessions = sessions
+        self.created_at = time.monotonic()
+        self.accessed_at = self.created_at
+
+
+class ObjectCache:
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: float = None,
+                 sizeof: Callable[[Any], int] = approximate_size):
+        """
+        Thread-safe in-process cache of live objects (e.g. agents), bounded by entry count and resident bytes.
+
+        Entries are evicted least recently used first when either limit is exceeded, expire after
+        ttl_seconds without use, and are released when every session that used them has gone.
+        Entries stored without a session are only evicted by the limits and the TTL.
+
+        :param max_entries: Entries kept before the least recently used is evicted
+        :param max_bytes: Approximate resident bytes kept before the least recently used is evicted
+        :param ttl_seconds: Seconds an entry may go unused before it expires; None disables expiry
+        :param sizeof: Function estimating the resident size of a value
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.sizeof = sizeof
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._resident_bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "oversized": 0,
+                          "evicted_lru": 0, "evicted_ttl": 0, "released_sessions": 0, "released_entries": 0}
+
+    def _remove(self, key: Hashable, reason: str) -> None:
+        # Called with the lock held
+        entry = self._entries.pop(key)
+        self._resident_bytes -= entry.size
+        self._counters[reason] += 1
+
+    def _expire(self, now: float) -> None:
+        if self.ttl_seconds is None:
+            return
+        expired = [key for key, entry in self._entries.items() if now - entry.accessed_at > self.ttl_seconds]
+        for key in expired:
+            self._remove(key, "evicted_ttl")
+
+    def _enforce_limits(self) -> None:
+        while self._entries and (len(self._entries) > self.max_entries or self._resident_bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)), "evicted_lru")
+
+    def get(self, key: Hashable, session: Hashable = None) -> Optional[Any]:
+        """
+        Look an object up, refreshing its recency and recording the session as one of its users.
+
+        :return: The cached object, or None when absent or expired
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds is not None and now - entry.accessed_at > self.ttl_seconds:
+                self._remove(key, "evicted_ttl")
+                entry = None
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            entry.accessed_at = now
+            if session is not None:
+                entry.sessions.add(session)
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return entry.value
+
+    def put(self, key: Hashable, value: Any, session: Hashable = None, size: int = None) -> Any:
+        """
+        Store an object, evicting others as needed. An object cached concurrently under the same key wins.
+
+        :param session: Session using the object; None keeps it until evicted by the limits or TTL
+        :param size: Resident bytes of the object (estimated with sizeof when not given)
+        :return: The cached object (the value given, or the one already cached)
+        """
+        size = self.sizeof(value) if size is None else size
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if session is not None:
+                    entry.sessions.add(session)
+                return entry.value
+            if size > self.max_bytes:
+                self._counters["oversized"] += 1
+                logger.warning("Not caching %s: %d bytes exceed the %d byte limit", type(value).__name__, size, self.max_bytes)
+                return value
+            self._expire(time.monotonic())
+            self._entries[key] = _Entry(value, size, {session} if session is not None else set())
+            self._resident_bytes += size
+            self._enforce_limits()
+            return value
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any], session: Hashable = None) -> Any:
+        """
+        Return the cached object for a key, creating and caching it on a miss.
+
+        :param factory: Callable creating the object
+        :param session: Session using the object
+        """
+        value = self.get(key, session)
+        if value is None:
+            value = self.put(key, factory(), session)
+        return value
+
+    def release_session(self, session: Hashable) -> int:
+        """
+        Forget a session (e.g. after its browser disconnected); objects no other session uses are dropped.
+
+        :return: Number of entries dropped
+        """
+        with self._lock:
+            released = [key for key, entry in self._entries.items() if session in entry.sessions]
+            dropped = 0
+            for key in released:
+                entry = self._entries[key]
+                entry.sessions.discard(session)
+                if not entry.sessions:
+                    self._remove(key, "released_entries")
+                    dropped += 1
+            self._counters["released_sessions"] += 1
+        return dropped
+
+    def sessions(self) -> Set[Hashable]:
+        """
+        Sessions currently holding at least one entry.
+        """
+        with self._lock:
+            return {session for entry in self._entries.values() for session in entry.sessions}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._resident_bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Cache counters for this process.
+
+        :return: Dictionary with entries, resident_bytes, the limits, hits, misses, hit_ratio and eviction counts
+        """
+        with self._lock:
+            self._expire(time.monotonic())
+            stats = dict(self._counters, entries=len(self._entries), resident_bytes=self._resident_bytes,
+                         max_entries=self.max_entries, max_bytes=self.max_bytes,
+                         sessions=len({session for entry in self._entries.values() for session in entry.sessions}))
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
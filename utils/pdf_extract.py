@@ -0,0 +1,237 @@
+import importlib.util
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Generator, List, Optional, Tuple
+
+from decouple import config
+
+logger = logging.getLogger(__name__)
+
+# Uploads larger than this are rejected before parsing
+MAX_PDF_BYTES = 10 * 1024 * 1024
+
+# Only the first pages of longer documents are extracted; a resume rarely needs more
+MAX_PDF_PAGES = 50
+
+# Documents with at least this many pages are split across worker processes
+PARALLEL_MIN_PAGES = 16
+
+
+class PyPDF2Backend:
+    name = "pypdf2"
+
+    def open(self, data: bytes):
+        from PyPDF2 import PdfReader
+        return PdfReader(io.BytesIO(data))
+
+    def page_count(self, document) -> int:
+        return len(document.pages)
+
+    def extract_page(self, document, index: int) -> str:
+        return document.pages[index].extract_text() or ""
+
+
+class PyMuPDFBackend:
+    name = "pymupdf"
+
+    def open(self, data: bytes):
+        import fitz
+        return fitz.open(stream=data, filetype="pdf")
+
+    def page_count(self, document) -> int:
+        return document.page_count
+
+    def extract_page(self, document, index: int) -> str:
+        return document.load_page(index).get_text()
+
+
+# Registered extraction backends, fastest first; "auto" picks the first installed one
+BACKENDS = {
+    PyMuPDFBackend.name: (PyMuPDFBackend, "fitz"),
+    PyPDF2Backend.name: (PyPDF2Backend, "PyPDF2"),
+}
+
+
+def available_backends() -> List[str]:
+    return [name for name, (_, module) in BACKENDS.items() if importlib.util.find_spec(module) is not None]
+
+
+def get_backend(name: str = None):
+    """
+    Resolve a PDF text extraction backend.
+
+    :param name: Backend name ("pymupdf", "pypdf2" or "auto"); defaults to JOBBUDDY_PDF_BACKEND
+    :return: Backend instance
+    """
+    name = (name or config("JOBBUDDY_PDF_BACKEND", default="auto")).lower()
+    if name == "auto":
+        installed = available_backends()
+        if not installed:
+            raise ValueError("No PDF extraction backend is installed.")
+        name = installed[0]
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown PDF extraction backend: {name}")
+    return BACKENDS[name][0]()
+
+
+@dataclass
+class PageText:
+    index: int
+    text: str
+    seconds: float
+
+
+@dataclass
+class PdfExtraction:
+    backend: str
+    total_pages: int
+    pages: List[PageText] = field(default_factory=list)
+    seconds: float = 0.0
+    parallel: bool = False
+    error: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        return "\n".join(page.text for page in self.pages)
+
+    @property
+    def truncated(self) -> bool:
+        return len(self.pages) < self.total_pages
+
+    def page_timings(self) -> Dict[int, float]:
+        return {page.index + 1: page.seconds for page in self.pages}
+
+
+def _extract_page_range(backend_name: str, data: bytes, start: int, stop: int) -> List[PageText]:
+    # Runs in a worker process, which opens the document once for its whole page range
+    backend = get_backend(backend_name)
+    document = backend.open(data)
+    pages = []
+    for index in range(start, stop):
+        started = time.perf_counter()
+        text = backend.extract_page(document, index)
+        pages.append(PageText(index, text, time.perf_counter() - started))
+    return pages
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _process_pool() -> Tuple[ProcessPoolExecutor, int]:
+    # One pool per process, created on first use and shared by every session
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None:
+            _pool_workers = max(1, config("JOBBUDDY_PDF_WORKERS", default=min(4, os.cpu_count() or 1), cast=int))
+            # Workers are spawned, not forked: a fork of Streamlit's multithreaded server copies locks
+            # other threads may hold at that moment, and the child can deadlock on them
+            _pool = ProcessPoolExecutor(max_workers=_pool_workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool, _pool_workers
+
+
+def read_pdf_bytes(source, max_bytes: int = MAX_PDF_BYTES) -> bytes:
+    """
+    Read a PDF from a path, raw bytes or a file-like object, enforcing the size limit.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        data = bytes(source)
+    elif isinstance(source, (str, os.PathLike)):
+        if os.path.getsize(source) > max_bytes:
+            raise ValueError(f"PDF is larger than the {max_bytes / (1024 * 1024):g} MB limit.")
+        with open(source, "rb") as pdf_file:
+            data = pdf_file.read()
+    elif hasattr(source, "getvalue"):
+        data = source.getvalue()
+    else:
+        source.seek(0)
+        data = source.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise ValueError(f"PDF is larger than the {max_bytes / (1024 * 1024):g} MB limit.")
+    return data
+
+
+def iter_pdf_pages(data: bytes, backend=None, max_pages: int = MAX_PDF_PAGES,
+                   parallel_min_pages: int = PARALLEL_MIN_PAGES, stats: PdfExtraction = None) -> Generator[PageText, None, None]:
+    """
+    Extract the text of a PDF page by page, in page order.
+
+    Short documents are extracted in the calling process; long ones are split into one contiguous
+    page range per worker of a shared process pool, and pages are yielded as soon as their range is done.
+
+    :param data: PDF file contents
+    :param backend: Backend instance or name (see get_backend)
+    :param max_pages: Pages extracted at most
+    :param parallel_min_pages: Page count from which the process pool is used (0 disables it)
+    :param stats: Optional PdfExtraction filled in while extracting
+    :return: Generator yielding PageText objects
+    """
+    backend = backend if backend is not None and not isinstance(backend, str) else get_backend(backend)
+    started = time.perf_counter()
+    document = backend.open(data)
+    total_pages = backend.page_count(document)
+    page_limit = min(total_pages, max_pages)
+    parallel = bool(parallel_min_pages) and page_limit >= parallel_min_pages
+    if stats is not None:
+        stats.backend, stats.total_pages, stats.parallel = backend.name, total_pages, parallel
+
+    if parallel:
+        pool, workers = _process_pool()
+        pages_per_worker = -(-page_limit // workers)
+        ranges = [(start, min(start + pages_per_worker, page_limit)) for start in range(0, page_limit, pages_per_worker)]
+        futures = [pool.submit(_extract_page_range, backend.name, data, start, stop) for start, stop in ranges]
+        pages = (page for future in futures for page in future.result())
+    else:
+        pages = _iter_local_pages(backend, document, page_limit)
+
+    for page in pages:
+        if stats is not None:
+            stats.pages.append(page)
+            stats.seconds = time.perf_counter() - started
+        yield page
+
+
+def _iter_local_pages(backend, document, page_limit: int) -> Generator[PageText, None, None]:
+    for index in range(page_limit):
+        page_started = time.perf_counter()
+        text = backend.extract_page(document, index)
+        yield PageText(index, text, time.perf_counter() - page_started)
+
+
+def extract_pdf_text(source, backend=None, max_pages: int = MAX_PDF_PAGES, max_bytes: int = MAX_PDF_BYTES,
+                     parallel_min_pages: int = PARALLEL_MIN_PAGES) -> PdfExtraction:
+    """
+    Extract the text of a PDF with per-page timings.
+
+    Unreadable documents do not raise: the returned extraction holds the pages read so far and the error.
+    Exceeding the byte limit raises ValueError, like an unsupported file type.
+
+    :param source: Path, bytes or file-like object with the PDF
+    :return: PdfExtraction with the pages, their timings and the joined text
+    """
+    data = read_pdf_bytes(source, max_bytes)
+    extraction = PdfExtraction(backend="", total_pages=0)
+    try:
+        for _ in iter_pdf_pages(data, backend, max_pages, parallel_min_pages, stats=extraction):
+            pass
+    except Exception as e:
+        extraction.error = str(e)
+        logger.warning("Error reading PDF after %d pages: %s", len(extraction.pages), e)
+
+    slowest = max(extraction.pages, key=lambda page: page.seconds, default=None)
+    logger.info(
+        "Extracted %d/%d PDF pages with %s in %.3fs%s (slowest: page %s, %.3fs)",
+        len(extraction.pages), extraction.total_pages, extraction.backend or "no backend", extraction.seconds,
+        " across worker processes" if extraction.parallel else "",
+        slowest.index + 1 if slowest else "-", slowest.seconds if slowest else 0.0,
+    )
+    if extraction.truncated and not extraction.error:
+        logger.warning("PDF has %d pages; only the first %d were extracted", extraction.total_pages, len(extraction.pages))
+    return extraction
@@ -0,0 +1,215 @@
+import contextvars
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Generator, Hashable, Iterable, Optional
+
+from utils.rate_limiter import BACKGROUND, admission, current_priority
+from utils.telemetry import current_session
+
+logger = logging.getLogger(__name__)
+
+
+class PrefetchCancelled(RuntimeError):
+    # Raised to a reader of a generation cancelled before it attached; the caller should generate afresh
+    pass
+
+
+class BufferedStream:
+    def __init__(self, key: Hashable):
+        """
+        Chunks of a generation running in the background, buffered so any number of readers can replay them.
+
+        :param key: Identifier of the generation within its user
+        """
+        self.key = key
+        self.chunks = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._cancelled = False
+        self._readers = 0
+        self._condition = threading.Condition()
+
+    def _run(self, generate: Callable[[], Iterable[str]]) -> None:
+        generator = None
+        try:
+            generator = generate()
+            for chunk in generator:
+                with self._condition:
+                    if self._cancelled:
+                        break
+                    self.chunks.append(chunk)
+                    self._condition.notify_all()
+        except Exception as error:
+            logger.warning("Prefetch of %s failed: %s", self.key, error)
+            self.error = error
+        finally:
+            # Closing the generator stops the underlying LLM stream when cancelled early
+            close = getattr(generator, "close", None) if generator is not None else None
+            if close is not None:
+                close()
+            with self._condition:
+                self.done = True
+                self.finished_at = time.time()
+                self._condition.notify_all()
+
+    def cancel(self) -> bool:
+        """
+        Stop the generation unless a reader is following it; an attached reader always gets the full response.
+
+        :return: Whether the generation was cancelled
+        """
+        with self._condition:
+            if self._readers:
+                return False
+            self._cancelled = True
+            self._condition.notify_all()
+            return True
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    @property
+    def running(self) -> bool:
+        return not self.done
+
+    def attach(self) -> Generator[str, None, None]:
+        """
+        Yield the chunks buffered so far, then follow the generation until it finishes.
+
+        :return: Generator yielding response chunks, raising the generation's error if it failed
+            and PrefetchCancelled if it was cancelled before this reader attached
+        """
+        with self._condition:
+            if self._cancelled:
+                raise PrefetchCancelled(f"Prefetch of {self.key} was cancelled")
+            self._readers += 1
+        try:
+            position = 0
+            while True:
+                with self._condition:
+                    while position >= len(self.chunks) and not self.done:
+                        self._condition.wait()
+                    pending = self.chunks[position:]
+                    finished = self.done
+                position += len(pending)
+                yield from pending
+                if finished and position >= len(self.chunks):
+                    break
+        finally:
+            with self._condition:
+                self._readers -= 1
+        if self.error is not None:
+            raise self.error
+
+    def result(self) -> str:
+        """
+        Wait for the generation to finish.
+
+        :return: The complete response text
+        """
+        return "".join(self.attach())
+
+
+class PrefetchScheduler:
+    def __init__(self, max_workers: int = 4, max_per_user: int = 2, max_users: int = 1000):
+        """
+        Starts likely-needed generations in the background so pages can attach to them instead of starting new calls.
+
+        :param max_workers: Generations running at the same time across all users
+        :param max_per_user: Speculative generations kept per user; a new one is skipped while all of them are still running
+        :param max_users: Users tracked before the least recently active one is dropped
+        """
+        self.max_per_user = max_per_user
+        self.max_users = max_users
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._users: "OrderedDict[Hashable, OrderedDict[Hashable, BufferedStream]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"started": 0, "attached": 0, "skipped": 0, "cancelled": 0}
+
+    def _user_streams(self, user: Hashable) -> "OrderedDict[Hashable, BufferedStream]":
+        streams = self._users.setdefault(user, OrderedDict())
+        self._users.move_to_end(user)
+        while len(self._users) > self.max_users:
+            _, dropped = self._users.popitem(last=False)
+            for stream in dropped.values():
+                # Generations a page is still reading run on until they finish
+                stream.cancel()
+        return streams
+
+    def prefetch(self, user: Hashable, key: Hashable, generate: Callable[[], Iterable[str]]) -> Optional[BufferedStream]:
+        """
+        Start a generation in the background unless it is already running or finished for this user.
+
+        :param user: Owner of the generation (e.g. the Streamlit session id)
+        :param key: Identifier of the generation; include a hash of its inputs so changed inputs start a new one
+        :param generate: Callable returning the streaming generator to run
+        :return: The buffered stream, or None when the user's cap is reached
+        """
+        with self._lock:
+            streams = self._user_streams(user)
+            if key in streams:
+                return streams[key]
+
+            # Make room by forgetting the oldest finished generation; never cancel running work for speculation
+            if len(streams) >= self.max_per_user:
+                finished = next((old_key for old_key, stream in streams.items() if stream.done), None)
+                if finished is None:
+                    self._counters["skipped"] += 1
+                    return None
+                del streams[finished]
+
+            stream = streams[key] = BufferedStream(key)
+            self._counters["started"] += 1
+
+        # Run with a copy of the caller's context so telemetry stays tagged with the user's session,
+        # queued behind interactive calls until a page attaches to it
+        context = contextvars.copy_context()
+        context.run(current_priority.set, BACKGROUND)
+        self._executor.submit(context.run, stream._run, generate)
+        return stream
+
+    def attach(self, user: Hashable, key: Hashable) -> Optional[BufferedStream]:
+        """
+        Look up an in-flight or finished generation.
+
+        :return: The buffered stream, or None when it was never prefetched (or failed)
+        """
+        with self._lock:
+            stream = self._users.get(user, {}).get(key)
+            if stream is None or stream.error is not None or stream.cancelled:
+                return None
+            self._counters["attached"] += 1
+        # The user now waits on it, so a call still queued for the rate limit moves up with the chat turns
+        admission.promote(current_session.get())
+        return stream
+
+    def discard(self, user: Hashable, key: Hashable = None) -> None:
+        """
+        Forget one generation of a user, or all of them when no key is given. Generations no page is
+        reading are cancelled; one a reader is attached to runs on so that reader gets the full response.
+        """
+        with self._lock:
+            streams = self._users.get(user, {})
+            keys = [key] if key is not None else list(streams)
+            for old_key in keys:
+                stream = streams.pop(old_key, None)
+                if stream is not None and stream.running and stream.cancel():
+                    self._counters["cancelled"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Scheduler counters for this process.
+
+        :return: Dictionary with started, attached, skipped, cancelled, running and users
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats["running"] = sum(stream.running for streams in self._users.values() for stream in streams.values())
+            stats["users"] = len(self._users)
+        return stats
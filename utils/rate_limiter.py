@@ -0,0 +1,324 @@
+import asyncio
+import contextvars
+import itertools
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional
+
+from decouple import config
+
+from utils.llm_pool import key_fingerprint
+from utils.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Priorities, lowest value first: chat turns the user is waiting on, speculative prefetches, bulk jobs
+INTERACTIVE, BACKGROUND, BATCH = 0, 1, 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background", BATCH: "batch"}
+
+# Output tokens assumed for a call whose client sets no max_tokens
+DEFAULT_OUTPUT_TOKENS = 512
+# Tokens the chat format adds around every message
+MESSAGE_OVERHEAD_TOKENS = 4
+# Seconds an async waiter sleeps between admission checks (sync waiters are notified instead)
+ASYNC_POLL_INTERVAL = 0.05
+# Pause of an API key after a 429 without a Retry-After header
+RATE_LIMITED_PAUSE = 1.0
+# Number of recent queue waits per priority kept for percentile estimates
+WAIT_SAMPLE_WINDOW = 2048
+
+# Priority of the LLM calls made in the current context
+current_priority = contextvars.ContextVar("jobbuddy_priority", default=INTERACTIVE)
+
+
+def set_priority(priority: int) -> None:
+    current_priority.set(priority)
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        """
+        Budget refilled continuously at per_minute / 60 units per second, holding at most one minute's worth.
+
+        :param per_minute: Allowed units per minute
+        """
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        # A call larger than the whole budget only waits for a full bucket
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return missing / self.rate if missing > 0 else 0.0
+
+    def take(self, amount: float) -> None:
+        self.level -= amount
+
+    def give_back(self, amount: float) -> None:
+        # Negative amounts charge usage above the estimate; the debt delays the next calls
+        self.level = min(self.capacity, self.level + amount)
+
+
+class Ticket:
+    def __init__(self, key: str, priority: int, sequence: int, tokens: int, session: str):
+        """
+        One LLM call waiting for, or holding, its admission.
+        """
+        self.key = key
+        self.priority = priority
+        self.sequence = sequence
+        self.tokens = tokens
+        self.session = session
+        self.enqueued_at = time.monotonic()
+        self.wait = 0.0
+
+    @property
+    def order(self):
+        return self.priority, self.sequence
+
+
+class _KeyState:
+    def __init__(self, requests_per_minute: Optional[float], tokens_per_minute: Optional[float]):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.waiting: List[Ticket] = []
+        self.paused_until = 0.0
+        self.rate_limited = 0
+
+
+class AdmissionScheduler:
+    def __init__(self, requests_per_minute: float = None, tokens_per_minute: float = None,
+                 max_wait: float = 120.0, max_keys: int = 1024):
+        """
+        Admits LLM calls per API key within requests-per-minute and tokens-per-minute budgets.
+
+        Every call estimates its token cost up front (prompt plus the output allowance) and waits
+        in a per-key queue until both token buckets can pay for it. The queue is served by
+        priority, then arrival, so chat turns overtake prefetches and bulk jobs. Actual usage is
+        settled when the call finishes, and a 429 pauses the key for the server's Retry-After.
+
+        :param requests_per_minute: Request budget per API key; None disables it
+        :param tokens_per_minute: Token budget per API key; None disables it
+        :param max_wait: Seconds a call may queue before TimeoutError is raised
+        :param max_keys: API keys tracked before idle ones are forgotten
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_wait = max_wait
+        self.max_keys = max_keys
+        self._condition = threading.Condition()
+        self._keys: "OrderedDict[str, _KeyState]" = OrderedDict()
+        self._sequence = itertools.count()
+        self._waits = {priority: deque(maxlen=WAIT_SAMPLE_WINDOW) for priority in PRIORITY_NAMES}
+        self._counters = {priority: {"admitted": 0, "timeouts": 0} for priority in PRIORITY_NAMES}
+        self._tokens = {"estimated": 0, "actual": 0}
+
+    def estimate(self, llm, messages: list) -> int:
+        """
+        Token cost charged for a call before it is made.
+
+        :return: Estimated prompt tokens plus the client's max_tokens (or DEFAULT_OUTPUT_TOKENS)
+        """
+        prompt_tokens = sum(estimate_tokens(str(getattr(message, "content", message))) + MESSAGE_OVERHEAD_TOKENS
+                            for message in messages)
+        return prompt_tokens + (getattr(llm, "max_tokens", None) or DEFAULT_OUTPUT_TOKENS)
+
+    def _key_state(self, key: str) -> _KeyState:
+        state = self._keys.get(key)
+        if state is None:
+            state = self._keys[key] = _KeyState(self.requests_per_minute, self.tokens_per_minute)
+            # Keys with queued calls are kept, and so is the new key: its caller queues on it next
+            idle = [old_key for old_key, old_state in self._keys.items() if old_key != key and not old_state.waiting]
+            for old_key in idle[:max(0, len(self._keys) - self.max_keys)]:
+                del self._keys[old_key]
+        self._keys.move_to_end(key)
+        return state
+
+    def _ticket(self, llm, messages: list, session: str) -> Ticket:
+        secret = getattr(llm, "openai_api_key", None)
+        api_key = secret.get_secret_value() if hasattr(secret, "get_secret_value") else str(secret or "")
+        return Ticket(key_fingerprint(api_key), current_priority.get(), next(self._sequence),
+                      self.estimate(llm, messages), session)
+
+    def _try_admit(self, state: _KeyState, ticket: Ticket) -> float:
+        """
+        Admit the ticket when it is first in line and both budgets can pay for it. Called with the lock held.
+
+        :return: 0.0 when admitted, otherwise seconds until it is worth checking again
+        """
+        now = time.monotonic()
+        wait = max(0.0, state.paused_until - now)
+        if state.requests is not None:
+            wait = max(wait, state.requests.wait_time(1, now))
+        if state.tokens is not None:
+            wait = max(wait, state.tokens.wait_time(ticket.tokens, now))
+        if min(state.waiting, key=lambda waiting: waiting.order) is not ticket:
+            return max(wait, ASYNC_POLL_INTERVAL)
+        if wait > 0:
+            return wait
+
+        if state.requests is not None:
+            state.requests.take(1)
+        if state.tokens is not None:
+            state.tokens.take(ticket.tokens)
+        state.waiting.remove(ticket)
+        ticket.wait = now - ticket.enqueued_at
+        self._waits[ticket.priority].append(ticket.wait)
+        self._counters[ticket.priority]["admitted"] += 1
+        self._tokens["estimated"] += ticket.tokens
+        self._condition.notify_all()
+        return 0.0
+
+    def _give_up(self, state: _KeyState, ticket: Ticket, timed_out: bool) -> None:
+        # Called with the lock held when a waiter times out or is cancelled
+        if ticket in state.waiting:
+            state.waiting.remove(ticket)
+            self._condition.notify_all()
+        if timed_out:
+            self._counters[ticket.priority]["timeouts"] += 1
+
+    def _timeout_error(self, ticket: Ticket) -> TimeoutError:
+        return TimeoutError(f"LLM call waited more than {self.max_wait:g}s for the rate limit of its API key "
+                            f"({PRIORITY_NAMES[ticket.priority]} priority)")
+
+    def acquire(self, llm, messages: list, session: str = "-") -> Ticket:
+        """
+        Block until the call may be sent.
+
+        :param llm: ChatOpenAI client that will make the call (its API key selects the budgets)
+        :param messages: Messages that will be sent
+        :param session: Session the call belongs to, so it can be promoted later
+        :return: Admission ticket to hand to release() once the call finishes
+        """
+        ticket = self._ticket(llm, messages, session)
+        deadline = ticket.enqueued_at + self.max_wait
+        with self._condition:
+            state = self._key_state(ticket.key)
+            state.waiting.append(ticket)
+            try:
+                while (wait := self._try_admit(state, ticket)) > 0:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._give_up(state, ticket, timed_out=True)
+                        raise self._timeout_error(ticket)
+                    self._condition.wait(min(wait, remaining))
+            except BaseException:
+                self._give_up(state, ticket, timed_out=False)
+                raise
+        return ticket
+
+    async def aacquire(self, llm, messages: list, session: str = "-") -> Ticket:
+        """
+        Async counterpart of acquire; waits without blocking the event loop.
+        """
+        ticket = self._ticket(llm, messages, session)
+        deadline = ticket.enqueued_at + self.max_wait
+        with self._condition:
+            state = self._key_state(ticket.key)
+            state.waiting.append(ticket)
+        try:
+            while True:
+                with self._condition:
+                    wait = self._try_admit(state, ticket)
+                    if wait <= 0:
+                        return ticket
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._give_up(state, ticket, timed_out=True)
+                        raise self._timeout_error(ticket)
+                await asyncio.sleep(min(wait, remaining, ASYNC_POLL_INTERVAL))
+        except BaseException:
+            with self._condition:
+                self._give_up(state, ticket, timed_out=False)
+            raise
+
+    def release(self, ticket: Ticket, usage: Optional[Dict] = None, error: BaseException = None) -> None:
+        """
+        Settle a finished call: refund or charge the difference to the estimate, and pause the key after a 429.
+
+        :param usage: Token usage reported by the API; without it the estimate stands
+        :param error: Exception the call raised, if any
+        """
+        with self._condition:
+            state = self._key_state(ticket.key)
+            if usage:
+                actual = usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+                self._tokens["actual"] += actual
+                if state.tokens is not None:
+                    state.tokens.give_back(ticket.tokens - actual)
+            if error is not None and getattr(error, "status_code", None) == 429:
+                pause = RATE_LIMITED_PAUSE
+                response = getattr(error, "response", None)
+                try:
+                    pause = float(response.headers.get("Retry-After"))
+                except (AttributeError, TypeError, ValueError):
+                    pass
+                state.paused_until = max(state.paused_until, time.monotonic() + pause)
+                state.rate_limited += 1
+                logger.warning("Rate limited by the API; pausing key %s for %.1fs", ticket.key[:8], pause)
+            self._condition.notify_all()
+
+    def promote(self, session: str, priority: int = INTERACTIVE) -> int:
+        """
+        Raise the priority of a session's queued calls, e.g. when the user attaches to a prefetch.
+
+        :return: Number of calls promoted
+        """
+        promoted = 0
+        with self._condition:
+            for state in self._keys.values():
+                for ticket in state.waiting:
+                    if ticket.session == session and ticket.priority > priority:
+                        ticket.priority = priority
+                        promoted += 1
+            if promoted:
+                self._condition.notify_all()
+        return promoted
+
+    def stats(self) -> Dict:
+        """
+        Queue depth, admissions and queue wait percentiles per priority, plus budget state per API key.
+        """
+        with self._condition:
+            queued = {priority: 0 for priority in PRIORITY_NAMES}
+            keys = {}
+            now = time.monotonic()
+            for key, state in self._keys.items():
+                for ticket in state.waiting:
+                    queued[ticket.priority] += 1
+                keys[key[:8]] = {
+                    "queued": len(state.waiting),
+                    "requests_available": math.floor(state.requests.level) if state.requests is not None else None,
+                    "tokens_available": math.floor(state.tokens.level) if state.tokens is not None else None,
+                    "paused_seconds": round(max(0.0, state.paused_until - now), 2),
+                    "rate_limited": state.rate_limited,
+                }
+            priorities = {}
+            for priority, name in PRIORITY_NAMES.items():
+                waits = sorted(self._waits[priority])
+                priorities[name] = dict(
+                    self._counters[priority],
+                    queued=queued[priority],
+                    wait_p50=round(waits[len(waits) // 2], 4) if waits else 0.0,
+                    wait_p95=round(waits[min(len(waits) - 1, math.ceil(0.95 * len(waits)) - 1)], 4) if waits else 0.0,
+                    wait_max=round(waits[-1], 4) if waits else 0.0,
+                )
+            return {"queue_depth": sum(queued.values()), "priorities": priorities, "keys": keys,
+                    "estimated_tokens": self._tokens["estimated"], "actual_tokens": self._tokens["actual"]}
+
+
+# Process-wide scheduler every agent goes through (via the call helpers in utils.telemetry)
+admission = AdmissionScheduler(
+    requests_per_minute=config("JOBBUDDY_RPM_LIMIT", default=500, cast=float) or None,
+    tokens_per_minute=config("JOBBUDDY_TPM_LIMIT", default=200000, cast=float) or None,
+    max_wait=config("JOBBUDDY_ADMISSION_TIMEOUT", default=120.0, cast=float),
+)
@@ -0,0 +1,196 @@
+import asyncio
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from typing import AsyncGenerator, AsyncIterable, Callable, Dict, Generator, Iterable, Optional
+
+from utils.storage import cache_path, connect
+
+logger = logging.getLogger(__name__)
+
+# Words per replayed chunk: small enough for st.write_stream to render progressively
+REPLAY_CHUNK_WORDS = 8
+
+# Disk tier bounds: reports older than the age limit, or beyond the entry limit (oldest first), are pruned on put
+DEFAULT_MAX_DISK_ENTRIES = 5000
+DEFAULT_MAX_AGE_SECONDS = 30 * 24 * 60 * 60
+
+
+def report_cache_key(kind: str, profile: str, job_listing: str, prompt_version: str, model: str) -> str:
+    """
+    Content address of a generated report.
+
+    :param kind: Report type, e.g. "career_recommendation" or "interview_questions"
+    :param profile: Candidate profile the report is generated from
+    :param job_listing: Job listing the report is generated from ("" when not applicable)
+    :param prompt_version: Version of the report prompt; bumping it invalidates old reports
+    :param model: Model that generates the report
+    :return: Hex digest identifying the report
+    """
+    profile_hash = hashlib.sha256(profile.encode("utf-8")).hexdigest()
+    job_hash = hashlib.sha256(job_listing.encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{kind}:{profile_hash}:{job_hash}:{prompt_version}:{model}".encode("utf-8")).hexdigest()
+
+
+def replay_chunks(report: str, words_per_chunk: int = REPLAY_CHUNK_WORDS) -> Generator[str, None, None]:
+    """
+    Split a stored report back into stream-sized chunks, keeping the original whitespace.
+    """
+    words = re.findall(r"\S+\s*|\s+", report)
+    for start in range(0, len(words), words_per_chunk):
+        yield "".join(words[start:start + words_per_chunk])
+
+
+class ReportCache:
+    def __init__(self, path: str = None, max_memory_entries: int = 128, max_disk_entries: int = DEFAULT_MAX_DISK_ENTRIES,
+                 max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS):
+        """
+        Two-tier cache of generated reports: an in-process LRU in front of a SQLite file.
+
+        :param path: SQLite database file (defaults to reports.sqlite3 in the cache directory)
+        :param max_memory_entries: Reports kept in memory before the least recently used is evicted
+        :param max_disk_entries: Reports kept on disk before the oldest are pruned
+        :param max_age_seconds: Age after which a stored report is no longer served and is pruned
+        """
+        self.path = path or cache_path("reports.sqlite3")
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.max_age_seconds = max_age_seconds
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "regenerations": 0}
+
+        with closing(connect(self.path)) as connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS reports (
+                    cache_key TEXT PRIMARY KEY,
+                    report TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )""")
+            connection.execute("CREATE INDEX IF NOT EXISTS reports_created_at ON reports (created_at)")
+
+    def _remember(self, cache_key: str, report: str) -> None:
+        with self._lock:
+            self._memory[cache_key] = report
+            self._memory.move_to_end(cache_key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, cache_key: str) -> Optional[str]:
+        """
+        Look a report up in memory first, then on disk (promoting disk hits into memory).
+        """
+        with self._lock:
+            report = self._memory.get(cache_key)
+            if report is not None:
+                self._memory.move_to_end(cache_key)
+                self._counters["memory_hits"] += 1
+                return report
+
+        with closing(connect(self.path)) as connection:
+            row = connection.execute(
+                "SELECT report FROM reports WHERE cache_key = ? AND created_at >= ?",
+                (cache_key, time.time() - self.max_age_seconds),
+            ).fetchone()
+        if row is None:
+            with self._lock:
+                self._counters["misses"] += 1
+            return None
+        with self._lock:
+            self._counters["disk_hits"] += 1
+        self._remember(cache_key, row["report"])
+        return row["report"]
+
+    def put(self, cache_key: str, report: str) -> None:
+        """
+        Store a report in both tiers and prune the disk tier.
+
+        An empty report is not stored: replaying it would show an empty analysis until it is regenerated.
+        """
+        if not report or not report.strip():
+            logger.warning("Not caching empty report %s", cache_key)
+            return
+
+        self._remember(cache_key, report)
+        now = time.time()
+        with closing(connect(self.path)) as connection:
+            connection.execute("INSERT OR REPLACE INTO reports VALUES (?, ?, ?)", (cache_key, report, now))
+            self._prune(connection, now)
+
+    def _prune(self, connection, now: float) -> None:
+        # Drop expired reports, then the oldest ones beyond the entry limit
+        connection.execute("DELETE FROM reports WHERE created_at < ?", (now - self.max_age_seconds,))
+        connection.execute(
+            "DELETE FROM reports WHERE cache_key IN (SELECT cache_key FROM reports ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,),
+        )
+
+    def _lookup(self, cache_key: str, regenerate: bool) -> Optional[str]:
+        if regenerate:
+            with self._lock:
+                self._counters["regenerations"] += 1
+            return None
+        return self.get(cache_key)
+
+    def stream(self, cache_key: str, generate: Callable[[], Iterable[str]], regenerate: bool = False) -> Generator[str, None, None]:
+        """
+        Yield a cached report in chunks, or stream a fresh one and store it once it completes.
+
+        :param cache_key: Key from report_cache_key
+        :param generate: Callable returning the streaming generator that produces the report
+        :param regenerate: Skip the lookup and overwrite the stored report
+        :return: Generator yielding report chunks
+        """
+        report = self._lookup(cache_key, regenerate)
+        if report is not None:
+            yield from replay_chunks(report)
+            return
+
+        # Only a fully streamed report is stored; an interrupted or failed stream leaves the cache untouched
+        chunks = []
+        for chunk in generate():
+            chunks.append(chunk)
+            yield chunk
+        self.put(cache_key, "".join(chunks))
+
+    async def astream(self, cache_key: str, generate: Callable[[], AsyncIterable[str]], regenerate: bool = False) -> AsyncGenerator[str, None]:
+        """
+        Async counterpart of stream.
+
+        :param cache_key: Key from report_cache_key
+        :param generate: Callable returning the async generator that produces the report
+        :param regenerate: Skip the lookup and overwrite the stored report
+        :return: Async generator yielding report chunks
+        """
+        # SQLite access runs in a worker thread so the event loop keeps serving other sessions
+        report = await asyncio.to_thread(self._lookup, cache_key, regenerate)
+        if report is not None:
+            for chunk in replay_chunks(report):
+                yield chunk
+            return
+
+        chunks = []
+        async for chunk in generate():
+            chunks.append(chunk)
+            yield chunk
+        await asyncio.to_thread(self.put, cache_key, "".join(chunks))
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Cache counters for this process.
+
+        :return: Dictionary with memory_hits, disk_hits, misses, regenerations, memory_entries, entries and hit_ratio
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_entries"] = len(self._memory)
+        with closing(connect(self.path)) as connection:
+            stats["entries"] = connection.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_ratio"] = hits / lookups if lookups else 0.0
+        return stats
@@ -1,22 +1,93 @@
-import os
-from langchain_openai import ChatOpenAI
-from langchain.schema import HumanMessage, SystemMessage
-from PyPDF2 import PdfReader
-import docx
+import asyncio
+import contextvars
+import json
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from langchain_core.messages import HumanMessage, SystemMessage
+from utils.llm_pool import get_chat_model
+from typing import Any, AsyncGenerator, Dict, Generator, Tuple
+from utils.telemetry import invoke_content, ainvoke_content, stream_content, astream_content, telemetry
+
+from utils.json_utils import is_valid_json, strip_code_fence
+from utils.json_stream import JSONSectionStream
+from utils.resume_cache import ResumeAnalysisCache, resume_cache_key, resume_digest_cache_key
+from utils.pdf_extract import PdfExtraction, extract_pdf_text
+from utils.docx_extract import DocxExtraction, extract_docx_text
+from utils.resume_profile import repair_json
+from utils.skills import Skill, extract_skills
+
+logger = logging.getLogger(__name__)
+
+# Independent parts of the fan-out analysis: instructions and the exact keys each one returns
+ANALYSIS_PARTS = {
+    "extraction": (
+        """Extract the facts stated in the resume: contact information (name, email, phone, LinkedIn),
+            a short professional summary, technical and soft skills, work experience (title, company, duration
+            and key achievements), education, certifications, projects, areas of expertise and career highlights.""",
+        ["Contact Information", "Professional Summary", "Skills", "Work Experience", "Education",
+         "Certifications", "Projects", "Areas of Expertise", "Career Highlights"],
+    ),
+    "critique": (
+        """Review the resume as a career advisor: list its strengths and the areas for improvement.""",
+        ["Strengths of the Resume", "Areas for Improvement"],
+    ),
+    "ats": (
+        """Assess how well the resume passes Applicant Tracking Systems: give a compatibility score
+            from 0 to 100 and suggest improvements for ATS optimization.""",
+        ["ATS Compatibility Score", "Suggested Improvements for ATS Optimization"],
+    ),
+}
+
+# Output order of the merged analysis, matching the single-call prompt
+ANALYSIS_SECTIONS = [key for _, keys in ANALYSIS_PARTS.values() for key in keys]
+
+
+def _parse_part(content: str, keys: list) -> Dict[str, Any]:
+    try:
+        data, _ = json.JSONDecoder(strict=False).raw_decode(strip_code_fence(content))
+    except ValueError:
+        data, _ = json.JSONDecoder(strict=False).raw_decode(repair_json(content))
+    return {key: data[key] for key in keys if isinstance(data, dict) and key in data}
+
 
 class ResumeAnalyzer:
-    def __init__(self, api_key: str, resume_path:str):
-        # Set the API key for OpenAI
-        os.environ["OPENAI_API_KEY"] = api_key
+    # Bump whenever the analysis prompt changes so cached analyses are not reused
+    PROMPT_VERSION = "1"
 
-        # Create a LangChain ChatOpenAI model
-        self.llm = ChatOpenAI(
-            model="gpt-4o-mini", 
+    def __init__(self, api_key: str, resume_path:str, cache: ResumeAnalysisCache = None, mode: str = "single",
+                 part_timeout: float = 60.0):
+        """
+        :param mode: "single" for one analysis call, "fan_out" for concurrent extraction, critique and ATS calls
+        :param part_timeout: Seconds each fan-out part may take, counted from its own start, before the
+                             analysis continues without it
+        """
+        if mode not in ("single", "fan_out"):
+            raise ValueError(f"Unsupported analysis mode: {mode}")
+        self.mode = mode
+        self.part_timeout = part_timeout
+
+        # Per-part timings and errors of the last fan-out analysis
+        self.last_fan_out: Dict[str, Dict[str, Any]] = {}
+        # Shared LangChain ChatOpenAI model from the process-wide client pool
+        self.model = "gpt-4o-mini"
+        self.llm = get_chat_model(
+            api_key,
+            model=self.model,
             temperature=0.7,  # Slightly creative responses
             streaming=True
         )
 
         self.resume = resume_path
+        self.cache = cache
+        self.last_pdf_extraction: PdfExtraction = None
+        self.last_docx_extraction: DocxExtraction = None
+        # Text and taxonomy skills of the last analysed resume (restored from the cache on a hit)
+        self.last_resume_text: str = None
+        self.last_resume_skills: Dict[Skill, int] = None
+
+        # Full analysis text of the last stream_analysis / astream_analysis run
+        self.last_analysis: str = None
 
         self.system_prompt = SystemMessage(content="""You are an expert resume analyzer. Analyze the provided resume text and extract the following information:
             1. Contact Information (name, email, phone, LinkedIn)
@@ -38,37 +109,69 @@ class ResumeAnalyzer:
             Format the response as a JSON object. No json in the beginning.""")
     
     def _extract_text_from_pdf(self, file_path): 
-        text = ""
-        try:
-            pdf_reader = PdfReader(file_path)
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-        except Exception as e:
-            print(f"Error reading PDF: {e}")
-        return text
+        # Page-level extraction with size/page limits; long documents are split across worker processes
+        extraction = extract_pdf_text(file_path)
+        self.last_pdf_extraction = extraction
+        telemetry.record(
+            "extract", "ResumeAnalyzer", "extract_text_from_pdf", extraction.backend or "-", extraction.seconds,
+            ok=extraction.error is None, pages=len(extraction.pages), total_pages=extraction.total_pages,
+            page_seconds=[round(page.seconds, 4) for page in extraction.pages],
+        )
+        return extraction.text
     
     def _extract_text_from_docx(self, file_path):
-        text = ""
-        try:
-            doc = docx.Document(file_path)
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-        except Exception as e:
-            print(f"Error reading DOCX: {e}")
-        return text
+        # Streams the document XML from the zip, so tables, text boxes, headers and footers are included
+        extraction = extract_docx_text(file_path)
+        self.last_docx_extraction = extraction
+        telemetry.record(
+            "extract", "ResumeAnalyzer", "extract_text_from_docx", "xml-stream", extraction.seconds,
+            ok=extraction.error is None, blocks=len(extraction.blocks), parts=extraction.parts,
+        )
+        return extraction.text
     
-    def _extract_text(self, file_name, file_path) -> str:
+    def _file_type(self, file_name) -> str:
         if '.pdf' in file_name.name.lower():
-            return self._extract_text_from_pdf(file_path)
+            return "pdf"
         elif '.docx' in file_name.name.lower():
-            return self._extract_text_from_docx(file_path)
+            return "docx"
         else:
             raise ValueError("Unsupported file format. Please provide PDF or DOCX file.")
-    
-    def analyze_resume(self, file_name, uploaded_file):
-        resume_text = self._extract_text(file_name=file_name, file_path=uploaded_file)
 
-        profile_messages = [
+    def _extract_text(self, file_name, file_path) -> str:
+        if self._file_type(file_name) == "pdf":
+            text = self._extract_text_from_pdf(file_path)
+        else:
+            text = self._extract_text_from_docx(file_path)
+        # Local taxonomy match on the raw text; takes milliseconds and gives the agents normalized skills
+        self.last_resume_text = text
+        self.last_resume_skills = extract_skills(text)
+        return text
+
+    def _restore_skills(self, cache_key: str, file_name, uploaded_file) -> None:
+        # Skills are matched again on the text cached with the analysis, so they follow the current taxonomy
+        resume_text = self.cache.get_text(cache_key)
+        if resume_text is None:
+            # Analyses cached before the text was stored: extract it once and keep it
+            self.cache.put_text(cache_key, self._extract_text(file_name, uploaded_file))
+            return
+        self.last_resume_text = resume_text
+        self.last_resume_skills = extract_skills(resume_text)
+
+    def _prompt_version(self) -> str:
+        return self.PROMPT_VERSION if self.mode == "single" else f"{self.PROMPT_VERSION}-{self.mode}"
+
+    def _cache_key(self, file_name, uploaded_file) -> str:
+        # Identical bytes analysed with the same prompt and model give the same analysis
+        return resume_cache_key(uploaded_file.getvalue(), self._file_type(file_name), self._prompt_version(), self.model)
+
+    def cache_key_for_digest(self, file_digest: str, file_type: str) -> str:
+        """
+        Cache key of a file known by its SHA-256, e.g. one extracted in another process.
+        """
+        return resume_digest_cache_key(file_digest, file_type, self._prompt_version(), self.model)
+
+    def _build_messages(self, resume_text: str):
+        return [
             self.system_prompt,
             HumanMessage(content=f"""
             Analyze the following professional profile and provide a summary:
@@ -78,7 +181,238 @@ class ResumeAnalyzer:
             """)
         ]
 
-        analysis_summary = self.llm.invoke(profile_messages)
-        return analysis_summary.content
+    def analyze_resume(self, file_name, uploaded_file):
+        if self.cache is None:
+            return self._analyze_resume(file_name, uploaded_file)
+
+        cache_key = self._cache_key(file_name, uploaded_file)
+        analysis = self.cache.get(cache_key)
+        if analysis is None:
+            analysis = self._analyze_resume(file_name, uploaded_file)
+            if is_valid_json(analysis) and self.is_complete():
+                self.cache.put(cache_key, analysis, self.last_resume_text)
+        else:
+            self._restore_skills(cache_key, file_name, uploaded_file)
+        return analysis
+
+    def _analyze_resume(self, file_name, uploaded_file):
+        resume_text = self._extract_text(file_name=file_name, file_path=uploaded_file)
+        if self.mode == "fan_out":
+            return self._merge_parts(dict(self._iter_fan_out_sections(resume_text)))
+        return invoke_content(self.llm, self._build_messages(resume_text), agent="ResumeAnalyzer", method="analyze_resume")
+
+    async def aanalyze_resume(self, file_name, uploaded_file):
+        """
+        Async counterpart of analyze_resume.
+
+        Text extraction and cache access run in worker threads and the model is awaited,
+        so the event loop stays free to serve other sessions or run independent steps
+        (such as fetching a job listing) concurrently.
+        """
+        if self.cache is None:
+            return await self._aanalyze_resume(file_name, uploaded_file)
+
+        cache_key = self._cache_key(file_name, uploaded_file)
+        analysis = await asyncio.to_thread(self.cache.get, cache_key)
+        if analysis is None:
+            analysis = await self._aanalyze_resume(file_name, uploaded_file)
+            if is_valid_json(analysis) and self.is_complete():
+                await asyncio.to_thread(self.cache.put, cache_key, analysis, self.last_resume_text)
+        else:
+            await asyncio.to_thread(self._restore_skills, cache_key, file_name, uploaded_file)
+        return analysis
+
+    async def _aanalyze_resume(self, file_name, uploaded_file):
+        resume_text = await asyncio.to_thread(self._extract_text, file_name, uploaded_file)
+        return await self.aanalyze_text(resume_text)
+
+    async def aanalyze_text(self, resume_text: str) -> str:
+        """
+        Analyze resume text that was already extracted (e.g. by the bulk pipeline), without caching.
+
+        :param resume_text: Plain text of the resume
+        :return: Analysis as a JSON string
+        """
+        if self.mode == "fan_out":
+            return await self._afan_out_analysis(resume_text)
+        return await ainvoke_content(self.llm, self._build_messages(resume_text), agent="ResumeAnalyzer", method="aanalyze_resume")
+
+    def is_complete(self) -> bool:
+        # A fan-out analysis missing a part is returned to the caller but never cached
+        return self.mode == "single" or all(outcome["ok"] for outcome in self.last_fan_out.values())
+
+    def _cached_sections(self, cache_key: str, file_name, uploaded_file):
+        analysis = self.cache.get(cache_key) if self.cache is not None else None
+        if analysis is None:
+            return None
+        self._restore_skills(cache_key, file_name, uploaded_file)
+        self.last_analysis = analysis
+        parser = JSONSectionStream()
+        return parser.feed(strip_code_fence(analysis)) + parser.close()
+
+    def _finish_stream(self, cache_key: str, chunks: list) -> None:
+        self.last_analysis = "".join(chunks)
+        if self.cache is not None and is_valid_json(self.last_analysis) and self.is_complete():
+            self.cache.put(cache_key, self.last_analysis, self.last_resume_text)
+
+    def stream_analysis(self, file_name, uploaded_file) -> Generator[Tuple[str, Any], None, None]:
+        """
+        Stream the resume analysis, yielding each top-level section as soon as the model closes it.
+
+        The complete analysis text is available in last_analysis once the generator is exhausted,
+        and is cached like analyze_resume.
+
+        :return: Generator yielding (section name, parsed value) pairs
+        """
+        cache_key = self._cache_key(file_name, uploaded_file)
+        cached = self._cached_sections(cache_key, file_name, uploaded_file)
+        if cached is not None:
+            yield from cached
+            return
+
+        resume_text = self._extract_text(file_name=file_name, file_path=uploaded_file)
+        if self.mode == "fan_out":
+            # Sections arrive part by part, as soon as each concurrent call finishes
+            sections = {}
+            for section, value in self._iter_fan_out_sections(resume_text):
+                sections[section] = value
+                yield section, value
+            self._finish_stream(cache_key, [self._merge_parts(sections)])
+            return
+
+        parser, chunks = JSONSectionStream(), []
+        for chunk in stream_content(self.llm, self._build_messages(resume_text), agent="ResumeAnalyzer", method="stream_analysis"):
+            chunks.append(chunk)
+            yield from parser.feed(chunk)
+        yield from parser.close()
+        self._finish_stream(cache_key, chunks)
+
+    async def astream_analysis(self, file_name, uploaded_file) -> AsyncGenerator[Tuple[str, Any], None]:
+        """
+        Async counterpart of stream_analysis.
+
+        :return: Async generator yielding (section name, parsed value) pairs
+        """
+        cache_key = self._cache_key(file_name, uploaded_file)
+        cached = await asyncio.to_thread(self._cached_sections, cache_key, file_name, uploaded_file)
+        if cached is not None:
+            for section in cached:
+                yield section
+            return
+
+        resume_text = await asyncio.to_thread(self._extract_text, file_name, uploaded_file)
+        if self.mode == "fan_out":
+            analysis = await self._afan_out_analysis(resume_text)
+            for section in json.loads(analysis).items():
+                yield section
+            await asyncio.to_thread(self._finish_stream, cache_key, [analysis])
+            return
+
+        parser, chunks = JSONSectionStream(), []
+        async for chunk in astream_content(self.llm, self._build_messages(resume_text), agent="ResumeAnalyzer", method="astream_analysis"):
+            chunks.append(chunk)
+            for section in parser.feed(chunk):
+                yield section
+        for section in parser.close():
+            yield section
+        await asyncio.to_thread(self._finish_stream, cache_key, chunks)
+
+    def _part_messages(self, part: str, resume_text: str) -> list:
+        instructions, keys = ANALYSIS_PARTS[part]
+        return [
+            SystemMessage(content=f"""You are an expert resume analyzer. {instructions}
+
+            Return a JSON object with exactly these keys: {json.dumps(keys)}. No json in the beginning."""),
+            HumanMessage(content=f"""
+            Resume:
+            {resume_text}
+            """),
+        ]
+
+    def _merge_parts(self, sections: Dict[str, Any]) -> str:
+        # Same schema and order as the single-call analysis; sections of failed parts are left out
+        return json.dumps({key: sections[key] for key in ANALYSIS_SECTIONS if key in sections}, indent=4, ensure_ascii=False)
+
+    def _run_part(self, part: str, resume_text: str) -> Dict[str, Any]:
+        content = invoke_content(self.llm, self._part_messages(part, resume_text), agent="ResumeAnalyzer", method=f"analysis_{part}")
+        return _parse_part(content, ANALYSIS_PARTS[part][1])
+
+    def _iter_fan_out_sections(self, resume_text: str) -> Generator[Tuple[str, Any], None, None]:
+        """
+        Run the analysis parts concurrently and yield their sections as each part finishes.
+
+        A part that fails or runs longer than part_timeout since it started is skipped, so the analysis
+        is returned with the sections that did complete; the outcome of every part is kept in last_fan_out.
+        """
+        self.last_fan_out = {}
+        starts: Dict[str, float] = {}
+
+        def run_part(part: str) -> Dict[str, Any]:
+            starts[part] = time.perf_counter()
+            return self._run_part(part, resume_text)
+
+        executor = ThreadPoolExecutor(max_workers=len(ANALYSIS_PARTS), thread_name_prefix="resume-analysis")
+        futures = {
+            # Each part runs in a copy of the caller's context so telemetry keeps the session tag
+            executor.submit(contextvars.copy_context().run, run_part, part): part
+            for part in ANALYSIS_PARTS
+        }
+        pending = set(futures)
+        try:
+            while pending:
+                # Wake up when a part finishes or the earliest running part reaches its own deadline
+                now = time.perf_counter()
+                deadline = min(starts.get(futures[future], now) + self.part_timeout for future in pending)
+                done, pending = wait(pending, timeout=max(0.0, deadline - now), return_when=FIRST_COMPLETED)
+                for future in [future for future in futures if future in done]:
+                    part = futures[future]
+                    seconds = time.perf_counter() - starts.get(part, now)
+                    try:
+                        sections = future.result()
+                    except Exception as e:
+                        logger.warning("Resume analysis part %s failed: %s", part, e)
+                        self.last_fan_out[part] = {"ok": False, "seconds": seconds, "error": str(e)}
+                        continue
+                    self.last_fan_out[part] = {"ok": True, "seconds": seconds}
+                    yield from sections.items()
+
+                now = time.perf_counter()
+                for future in [future for future in pending if futures[future] in starts
+                               and now - starts[futures[future]] >= self.part_timeout]:
+                    part = futures[future]
+                    pending.discard(future)
+                    logger.warning("Resume analysis part %s timed out after %.0fs", part, self.part_timeout)
+                    self.last_fan_out[part] = {"ok": False, "seconds": now - starts[part], "error": "timeout"}
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if not any(outcome["ok"] for outcome in self.last_fan_out.values()):
+            raise RuntimeError(f"Every resume analysis part failed: {self.last_fan_out}")
+
+    async def _arun_part(self, part: str, resume_text: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            content = await asyncio.wait_for(
+                ainvoke_content(self.llm, self._part_messages(part, resume_text), agent="ResumeAnalyzer", method=f"aanalysis_{part}"),
+                timeout=self.part_timeout,
+            )
+            sections = _parse_part(content, ANALYSIS_PARTS[part][1])
+        except Exception as e:
+            error = "timeout" if isinstance(e, asyncio.TimeoutError) else str(e)
+            logger.warning("Resume analysis part %s failed: %s", part, error)
+            self.last_fan_out[part] = {"ok": False, "seconds": time.perf_counter() - started, "error": error}
+            return {}
+        self.last_fan_out[part] = {"ok": True, "seconds": time.perf_counter() - started}
+        return sections
 
+    async def _afan_out_analysis(self, resume_text: str) -> str:
+        """
+        Async counterpart of the fan-out analysis: the parts are awaited together with asyncio.gather.
 
+        :return: Merged analysis as a JSON string
+        """
+        self.last_fan_out = {}
+        results = await asyncio.gather(*(self._arun_part(part, resume_text) for part in ANALYSIS_PARTS))
+        if not any(outcome["ok"] for outcome in self.last_fan_out.values()):
+            raise RuntimeError(f"Every resume analysis part failed: {self.last_fan_out}")
+        return self._merge_parts({key: value for sections in results for key, value in sections.items()})
@@ -0,0 +1,104 @@
+import hashlib
+import threading
+import time
+from contextlib import closing
+from typing import Dict, Optional
+
+from utils.storage import cache_path, connect
+
+
+def resume_cache_key(file_bytes: bytes, file_type: str, prompt_version: str, model: str) -> str:
+    """
+    Content address of a resume analysis.
+
+    :param file_bytes: Raw bytes of the uploaded resume
+    :param file_type: File extension the text is extracted with ("pdf" or "docx")
+    :param prompt_version: Version of the analysis prompt; bumping it invalidates old analyses
+    :param model: Model that produces the analysis
+    :return: Hex digest identifying the analysis
+    """
+    return resume_digest_cache_key(hashlib.sha256(file_bytes).hexdigest(), file_type, prompt_version, model)
+
+
+def resume_digest_cache_key(file_digest: str, file_type: str, prompt_version: str, model: str) -> str:
+    # Same key as resume_cache_key, for callers that already hold the SHA-256 of the file
+    return hashlib.sha256(f"{file_digest}:{file_type}:{prompt_version}:{model}".encode("utf-8")).hexdigest()
+
+
+class ResumeAnalysisCache:
+    def __init__(self, path: str = None):
+        """
+        Persistent cache of resume analyses keyed on the file content and analysis version.
+
+        The extracted resume text is kept with each analysis, so skills can be matched again
+        on a cache hit without re-reading the file.
+
+        The cache is a SQLite file, so every process of a replica reuses analyses across restarts.
+
+        :param path: SQLite database file (defaults to resume_analyses.sqlite3 in the cache directory)
+        """
+        self.path = path or cache_path("resume_analyses.sqlite3")
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0}
+
+        with closing(connect(self.path)) as connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS resume_analyses (
+                    cache_key TEXT PRIMARY KEY,
+                    analysis TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    resume_text TEXT
+                )""")
+            # Caches created before the resume text was stored
+            columns = {row["name"] for row in connection.execute("PRAGMA table_info(resume_analyses)")}
+            if "resume_text" not in columns:
+                connection.execute("ALTER TABLE resume_analyses ADD COLUMN resume_text TEXT")
+
+    def get(self, cache_key: str) -> Optional[str]:
+        with closing(connect(self.path)) as connection:
+            row = connection.execute(
+                "SELECT analysis FROM resume_analyses WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+        with self._lock:
+            self._counters["hits" if row else "misses"] += 1
+        return row["analysis"] if row else None
+
+    def get_text(self, cache_key: str) -> Optional[str]:
+        """
+        Resume text the cached analysis was made from.
+
+        :return: The text, or None when the entry is absent or was cached without it
+        """
+        with closing(connect(self.path)) as connection:
+            row = connection.execute(
+                "SELECT resume_text FROM resume_analyses WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+        return row["resume_text"] if row else None
+
+    def put(self, cache_key: str, analysis: str, resume_text: str = None) -> None:
+        with closing(connect(self.path)) as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO resume_analyses (cache_key, analysis, created_at, resume_text) VALUES (?, ?, ?, ?)",
+                (cache_key, analysis, time.time(), resume_text)
+            )
+
+    def put_text(self, cache_key: str, resume_text: str) -> None:
+        # Backfills the text of an analysis cached without it
+        with closing(connect(self.path)) as connection:
+            connection.execute(
+                "UPDATE resume_analyses SET resume_text = ? WHERE cache_key = ?", (resume_text, cache_key)
+            )
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Cache counters for this process.
+
+        :return: Dictionary with hits, misses, entries and hit_ratio
+        """
+        with self._lock:
+            stats = dict(self._counters)
+        with closing(connect(self.path)) as connection:
+            stats["entries"] = connection.execute("SELECT COUNT(*) FROM resume_analyses").fetchone()[0]
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
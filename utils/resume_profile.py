@@ -0,0 +1,358 @@
+import json
+import logging
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.json_utils import strip_code_fence
+
+logger = logging.getLogger(__name__)
+
+# Achievements kept per role in prompt projections; the rest rarely changes the advice
+MAX_ACHIEVEMENTS_PER_ROLE = 3
+
+
+@dataclass(frozen=True, slots=True)
+class WorkExperience:
+    title: str = ""
+    company: str = ""
+    duration: str = ""
+    achievements: Tuple[str, ...] = ()
+
+    def heading(self) -> str:
+        role = " at ".join(part for part in (self.title, self.company) if part)
+        return f"{role} ({self.duration})" if self.duration else role
+
+
+@dataclass(frozen=True, slots=True)
+class Education:
+    degree: str = ""
+    institution: str = ""
+    year: str = ""
+
+    def line(self) -> str:
+        text = ", ".join(part for part in (self.degree, self.institution) if part)
+        return f"{text} ({self.year})" if self.year else text
+
+
+@dataclass(frozen=True, slots=True)
+class ResumeProfile:
+    name: str = ""
+    email: str = ""
+    phone: str = ""
+    linkedin: str = ""
+    summary: str = ""
+    technical_skills: Tuple[str, ...] = ()
+    soft_skills: Tuple[str, ...] = ()
+    experience: Tuple[WorkExperience, ...] = ()
+    education: Tuple[Education, ...] = ()
+    certifications: Tuple[str, ...] = ()
+    projects: Tuple[str, ...] = ()
+    expertise: Tuple[str, ...] = ()
+    highlights: Tuple[str, ...] = ()
+    strengths: Tuple[str, ...] = ()
+    improvements: Tuple[str, ...] = ()
+    ats_score: Optional[int] = None
+    ats_suggestions: Tuple[str, ...] = ()
+    # Raw analysis text, kept only when it could not be parsed so no information is lost
+    unparsed: str = ""
+    extra: Dict[str, Any] = field(default_factory=dict, compare=False)
+
+    @property
+    def display_name(self) -> str:
+        return self.name or "there"
+
+    @property
+    def skills(self) -> Tuple[str, ...]:
+        return self.technical_skills + self.soft_skills
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def _render(self, sections) -> str:
+        if self.unparsed:
+            return self.unparsed
+        lines = []
+        for title, value in sections:
+            if not value:
+                continue
+            if isinstance(value, str):
+                lines.append(f"{title}: {value}")
+            else:
+                lines.append(f"{title}:")
+                lines.extend(f"- {item}" for item in value)
+        return "\n".join(lines)
+
+    def _experience_lines(self, max_achievements: int) -> Tuple[str, ...]:
+        lines = []
+        for role in self.experience:
+            achievements = role.achievements[:max_achievements]
+            lines.append(role.heading() + (f": {'; '.join(achievements)}" if achievements else ""))
+        return tuple(lines)
+
+    def for_career_coach(self) -> str:
+        """
+        Compact profile for the career coach: background and goals, without the resume critique or ATS notes.
+        """
+        return self._render([
+            ("Name", self.name),
+            ("Summary", self.summary),
+            ("Technical skills", ", ".join(self.technical_skills)),
+            ("Soft skills", ", ".join(self.soft_skills)),
+            ("Experience", self._experience_lines(MAX_ACHIEVEMENTS_PER_ROLE)),
+            ("Education", tuple(education.line() for education in self.education)),
+            ("Certifications", ", ".join(self.certifications)),
+            ("Areas of expertise", ", ".join(self.expertise)),
+            ("Career highlights", self.highlights),
+        ])
+
+    def for_interview(self) -> str:
+        """
+        Compact profile for the interviewer: what the candidate claims to know and has built.
+        """
+        return self._render([
+            ("Name", self.name),
+            ("Summary", self.summary),
+            ("Technical skills", ", ".join(self.technical_skills)),
+            ("Soft skills", ", ".join(self.soft_skills)),
+            ("Experience", self._experience_lines(MAX_ACHIEVEMENTS_PER_ROLE)),
+            ("Projects", self.projects),
+            ("Certifications", ", ".join(self.certifications)),
+            ("Education", ", ".join(education.line() for education in self.education)),
+        ])
+
+    def for_resume_review(self) -> str:
+        """
+        The critique part of the analysis: strengths, improvements and ATS notes.
+        """
+        return self._render([
+            ("Strengths", self.strengths),
+            ("Areas for improvement", self.improvements),
+            ("ATS compatibility score", "" if self.ats_score is None else str(self.ats_score)),
+            ("ATS suggestions", self.ats_suggestions),
+        ])
+
+
+def _split_strings(text: str) -> Tuple[List[Tuple[str, bool]], bool]:
+    """
+    Split JSON-like text into string literals and the text between them.
+
+    Strings delimited by smart quotes are rewritten with straight quotes (escaping straight quotes
+    inside them); smart quotes inside straight-quoted strings are content and left alone.
+
+    :return: List of (segment, is_string) pieces, and whether the last string is left open
+    """
+    pieces, current, in_string, smart, escaped = [], [], False, False, False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+                current.append(char)
+            elif char == "\\":
+                escaped = True
+                current.append(char)
+            elif char in ("“”" if smart else '"'):
+                current.append('"')
+                pieces.append(("".join(current), True))
+                current, in_string = [], False
+            elif char == '"':
+                current.append('\\"')
+            else:
+                current.append(char)
+        elif char in '"“”':
+            if current:
+                pieces.append(("".join(current), False))
+            current, in_string, smart = ['"'], True, char != '"'
+        else:
+            current.append(char)
+    if current:
+        pieces.append(("".join(current), in_string))
+    return pieces, in_string
+
+
+def repair_json(text: str) -> str:
+    """
+    Best-effort fix of common defects in model-written JSON.
+
+    Handles code fences and text around the object, smart-quoted strings, trailing commas,
+    Python literals and output cut off before the closing brackets. Everything except the
+    closing of a cut-off string only touches the text outside string values.
+
+    :param text: Raw model output
+    :return: Text that is more likely to parse as JSON
+    """
+    text = strip_code_fence(text)
+    start = text.find("{")
+    if start > 0:
+        text = text[start:]
+
+    pieces, in_string = _split_strings(text)
+    stack, repaired = [], []
+    for segment, is_string in pieces:
+        if not is_string:
+            segment = re.sub(r"\bTrue\b", "true", re.sub(r"\bFalse\b", "false", re.sub(r"\bNone\b", "null", segment)))
+            segment = re.sub(r",\s*([}\]])", r"\1", segment)
+            # Track the brackets left open by a truncated response
+            for char in segment:
+                if char in "{[":
+                    stack.append("}" if char == "{" else "]")
+                elif char in "}]" and stack:
+                    stack.pop()
+        repaired.append(segment)
+    text = "".join(repaired)
+
+    if in_string:
+        text += '"'
+    # A key cut off before its value is dropped
+    if stack and stack[-1] == "}" and re.search(r'[{,]\s*"(?:[^"\\]|\\.)*"\s*$', text):
+        text = re.sub(r'(?:,\s*)?"(?:[^"\\]|\\.)*"\s*$', "", text)
+    text = re.sub(r",\s*$", "", text.rstrip())
+    if text.endswith(":"):
+        text += " null"
+    return text + "".join(reversed(stack))
+
+
+def _key(name: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+def _get(data: Any, *names: str) -> Any:
+    # Model output varies in key spelling ("Key Achievements", "key_achievements", ...)
+    if not isinstance(data, dict):
+        return None
+    keys = {_key(key): value for key, value in data.items()}
+    for name in names:
+        value = keys.get(_key(name))
+        if value not in (None, "", [], {}):
+            return value
+    return None
+
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return "; ".join(_text(item) for item in value if item)
+    if isinstance(value, dict):
+        return ", ".join(_text(item) for item in value.values() if item)
+    return re.sub(r"\s+", " ", str(value)).strip()
+
+
+def _items(value: Any) -> Tuple[str, ...]:
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        return tuple(item.strip() for item in re.split(r"[\n;]|,(?![^()]*\))", value) if item.strip())
+    if isinstance(value, dict):
+        return tuple(item for entry in value.values() for item in _items(entry))
+    return tuple(text for text in (_text(item) for item in value) if text)
+
+
+def _experience(value: Any) -> Tuple[WorkExperience, ...]:
+    roles = []
+    for entry in value if isinstance(value, list) else ([value] if value else []):
+        if isinstance(entry, dict):
+            roles.append(WorkExperience(
+                title=_text(_get(entry, "Title", "Position", "Role", "Job Title")),
+                company=_text(_get(entry, "Company", "Organization", "Employer")),
+                duration=_text(_get(entry, "Duration", "Dates", "Period", "Years")),
+                achievements=_items(_get(entry, "Key Achievements", "Achievements", "Responsibilities", "Highlights")),
+            ))
+        elif entry:
+            roles.append(WorkExperience(title=_text(entry)))
+    return tuple(roles)
+
+
+def _education(value: Any) -> Tuple[Education, ...]:
+    entries = []
+    for entry in value if isinstance(value, list) else ([value] if value else []):
+        if isinstance(entry, dict):
+            entries.append(Education(
+                degree=_text(_get(entry, "Degree", "Qualification", "Program")),
+                institution=_text(_get(entry, "Institution", "School", "University")),
+                year=_text(_get(entry, "Year", "Graduation Year", "Duration", "Dates")),
+            ))
+        elif entry:
+            entries.append(Education(degree=_text(entry)))
+    return tuple(entries)
+
+
+def _score(value: Any) -> Optional[int]:
+    match = re.search(r"\d+", str(value)) if value is not None else None
+    return min(100, int(match.group())) if match else None
+
+
+KNOWN_SECTIONS = {_key(name) for name in (
+    "Contact Information", "Professional Summary", "Summary", "Skills", "Work Experience", "Experience",
+    "Education", "Certifications", "Projects", "Areas of Expertise", "Career Highlights",
+    "Strengths of the Resume", "Strengths", "Areas for Improvement", "ATS Compatibility Score",
+    "Suggested Improvements for ATS Optimization", "ATS Suggestions",
+)}
+
+
+def profile_from_dict(data: Dict[str, Any]) -> ResumeProfile:
+    """
+    Build a ResumeProfile from the analysis dictionary, tolerating the usual variations in key names and shapes.
+    """
+    contact = _get(data, "Contact Information", "Contact") or {}
+    skills = _get(data, "Skills")
+    if isinstance(skills, dict):
+        technical = _items(_get(skills, "Technical Skills", "Technical", "Hard Skills"))
+        soft = _items(_get(skills, "Soft Skills", "Soft"))
+        if not technical and not soft:
+            technical = _items(skills)
+    else:
+        technical, soft = _items(skills), ()
+
+    return ResumeProfile(
+        name=_text(_get(contact, "Name", "Full Name") or _get(data, "Name")),
+        email=_text(_get(contact, "Email", "E-mail")),
+        phone=_text(_get(contact, "Phone", "Phone Number")),
+        linkedin=_text(_get(contact, "LinkedIn", "Linkedin Profile")),
+        summary=_text(_get(data, "Professional Summary", "Summary")),
+        technical_skills=technical,
+        soft_skills=soft,
+        experience=_experience(_get(data, "Work Experience", "Experience")),
+        education=_education(_get(data, "Education")),
+        certifications=_items(_get(data, "Certifications")),
+        projects=_items(_get(data, "Projects")),
+        expertise=_items(_get(data, "Areas of Expertise", "Expertise")),
+        highlights=_items(_get(data, "Career Highlights", "Highlights")),
+        strengths=_items(_get(data, "Strengths of the Resume", "Strengths")),
+        improvements=_items(_get(data, "Areas for Improvement", "Improvements")),
+        ats_score=_score(_get(data, "ATS Compatibility Score", "ATS Score")),
+        ats_suggestions=_items(_get(data, "Suggested Improvements for ATS Optimization", "ATS Suggestions")),
+        extra={key: value for key, value in data.items() if _key(key) not in KNOWN_SECTIONS},
+    )
+
+
+def parse_resume_profile(analysis: str) -> ResumeProfile:
+    """
+    Parse the resume analysis returned by ResumeAnalyzer, repairing malformed JSON when needed.
+
+    :param analysis: JSON string produced by the model
+    :return: ResumeProfile; when even the repaired text does not parse, a profile holding the raw text
+    """
+    decoder = json.JSONDecoder(strict=False)
+    for candidate in (strip_code_fence(analysis), repair_json(analysis)):
+        try:
+            # raw_decode ignores any commentary the model adds after the object
+            data, _ = decoder.raw_decode(candidate)
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            return profile_from_dict(data)
+    logger.warning("Resume analysis is not valid JSON; using the raw text as the profile")
+    return ResumeProfile(unparsed=analysis.strip())
+
+
+def render_profile(profile: Any, projection: str) -> str:
+    """
+    Render the part of a profile an agent needs; plain strings (older callers) pass through unchanged.
+
+    :param profile: ResumeProfile or the raw analysis string
+    :param projection: Name of a ResumeProfile projection, e.g. "for_career_coach"
+    """
+    if isinstance(profile, ResumeProfile):
+        return getattr(profile, projection)()
+    return str(profile)
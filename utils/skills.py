@@ -0,0 +1,244 @@
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Pattern, Tuple, Union
+
+from decouple import config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(__file__), "skill_taxonomy.json")
+
+# Mentions of one skill counted when weighting a job's requirements; repetition beyond this adds nothing
+MAX_MENTION_WEIGHT = 3
+# Skills listed per line in prompt hints
+MAX_HINT_SKILLS = 15
+
+
+@dataclass(frozen=True, slots=True)
+class Skill:
+    name: str
+    category: str
+
+    @property
+    def technical(self) -> bool:
+        return self.category != "soft"
+
+
+@dataclass(frozen=True, slots=True)
+class SkillGap:
+    matched: Tuple[Skill, ...]
+    missing: Tuple[Skill, ...]
+    extra: Tuple[Skill, ...]
+    # Share of the job's skills (weighted by how often the posting mentions them) found in the resume
+    coverage: Optional[float]
+
+
+def _normalize(text: str) -> str:
+    text = re.sub(r"\s+", " ", text.replace("‐", "-").replace("–", "-").replace("—", "-"))
+    return text
+
+
+def _lower(text: str) -> str:
+    # Matching relies on character offsets, so the lowered text must keep the original length
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(char if len(char.lower()) != 1 else char.lower() for char in text)
+
+
+def _variants(alias: str) -> set:
+    # Spelling variants of one alias: "machine-learning", "machine learning", "node.js"/"nodejs"
+    return {
+        alias,
+        alias.replace("-", " "),
+        alias.replace(" ", "-"),
+        re.sub(r"(?<=\w)\.(?=\w)", "", alias),
+    }
+
+
+class SkillMatcher:
+    def __init__(self, taxonomy: Dict[str, Dict[str, List[Union[str, Dict[str, str]]]]]):
+        """
+        Aho-Corasick automaton over every alias of a skill taxonomy.
+
+        The taxonomy maps a category (e.g. "language", "soft") to canonical skill names and their aliases.
+        Aliases are matched case-insensitively on word boundaries; an alias written as "=Go" is matched
+        case-sensitively, and when the canonical name itself is listed that way it is not added in lowercase.
+        An alias that is also an ordinary word can be given as {"alias": "=Go", "unless_followed_by": regex};
+        a mention is then skipped when the regex matches the text right after it (e.g. "Go-to-market").
+
+        :param taxonomy: Dictionary of category -> {canonical name: [aliases]}
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Per state: (pattern length, exact pattern or None when case-insensitive, skill, context guard)
+        self._output: List[List[Tuple[int, Optional[str], Skill, Optional[Pattern]]]] = [[]]
+        self.skills: Dict[str, Skill] = {}
+
+        for category, skills in taxonomy.items():
+            for name, aliases in skills.items():
+                skill = Skill(name, category)
+                self.skills[name] = skill
+                guarded = [(alias, None) if isinstance(alias, str) else (alias["alias"], re.compile(alias["unless_followed_by"]))
+                           for alias in aliases]
+                exact = {alias[1:]: guard for alias, guard in guarded if alias.startswith("=")}
+                loose = {alias: guard for alias, guard in guarded if not alias.startswith("=")}
+                if name not in exact:
+                    loose.setdefault(name, None)
+                for alias, guard in loose.items():
+                    for variant in _variants(_normalize(alias.strip())):
+                        self._add(_lower(variant), None, skill, guard)
+                for alias, guard in exact.items():
+                    self._add(_lower(alias), alias, skill, guard)
+        self._link()
+
+    def _add(self, pattern: str, exact: Optional[str], skill: Skill, guard: Optional[Pattern] = None) -> None:
+        if not pattern:
+            return
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((len(pattern), exact, skill, guard))
+
+    def _link(self) -> None:
+        # Breadth-first pass setting failure links; each state also reports the patterns of its suffix states
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state].extend(self._output[self._fail[next_state]])
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, Skill]]:
+        """
+        Find every skill mention, keeping the leftmost-longest match where aliases overlap
+        (so "React Native" is not also reported as "React").
+
+        :param text: Resume or job posting text
+        :return: Iterator of (start, end, skill) over the normalized text
+        """
+        text = _normalize(text)
+        lowered = _lower(text)
+        candidates = []
+        state = 0
+        for index, char in enumerate(lowered):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, exact, skill, guard in self._output[state]:
+                start, end = index - length + 1, index + 1
+                if exact is not None and text[start:end] != exact:
+                    continue
+                if guard is not None and guard.match(text, end):
+                    continue
+                if lowered[start].isalnum() and start > 0 and lowered[start - 1].isalnum():
+                    continue
+                if lowered[index].isalnum() and end < len(lowered) and lowered[end].isalnum():
+                    continue
+                candidates.append((start, end, skill))
+
+        candidates.sort(key=lambda match: (match[0], match[0] - match[1]))
+        covered = 0
+        for start, end, skill in candidates:
+            if start >= covered:
+                covered = end
+                yield start, end, skill
+
+    def extract(self, text: str) -> Dict[Skill, int]:
+        """
+        Normalized skills mentioned in a text.
+
+        :param text: Resume or job posting text
+        :return: Dictionary of skill -> number of mentions, in order of first mention
+        """
+        counts: Dict[Skill, int] = {}
+        for _, _, skill in self.iter_matches(text or ""):
+            counts[skill] = counts.get(skill, 0) + 1
+        return counts
+
+
+def load_taxonomy(path: str = None) -> Dict[str, Dict[str, List[str]]]:
+    with open(path or DEFAULT_TAXONOMY_PATH, encoding="utf-8") as taxonomy_file:
+        return json.load(taxonomy_file)
+
+
+@lru_cache(maxsize=1)
+def get_skill_matcher() -> SkillMatcher:
+    """
+    Process-wide matcher for the taxonomy in JOBBUDDY_SKILL_TAXONOMY (the bundled one by default),
+    compiled once and shared by every session.
+    """
+    return SkillMatcher(load_taxonomy(config("JOBBUDDY_SKILL_TAXONOMY", default=None) or None))
+
+
+def extract_skills(text: str) -> Dict[Skill, int]:
+    return get_skill_matcher().extract(text)
+
+
+def skill_gap(resume_skills: Dict[Skill, int], job_skills: Dict[Skill, int]) -> SkillGap:
+    """
+    Compare the skills of a resume with those of a job posting.
+
+    :param resume_skills: Result of extract_skills on the resume
+    :param job_skills: Result of extract_skills on the job posting
+    :return: SkillGap; coverage is None when the posting names no known skill
+    """
+    matched = tuple(skill for skill in job_skills if skill in resume_skills)
+    # Skills the posting stresses most come first in the gap list
+    missing = tuple(sorted((skill for skill in job_skills if skill not in resume_skills), key=lambda skill: -job_skills[skill]))
+    extra = tuple(skill for skill in resume_skills if skill not in job_skills)
+
+    weights = {skill: min(count, MAX_MENTION_WEIGHT) for skill, count in job_skills.items()}
+    total = sum(weights.values())
+    coverage = sum(weights[skill] for skill in matched) / total if total else None
+    return SkillGap(matched=matched, missing=missing, extra=extra, coverage=coverage)
+
+
+def _skill_list(skills, with_category: bool = False) -> str:
+    names = [f"{skill.name} ({skill.category})" if with_category else skill.name for skill in skills[:MAX_HINT_SKILLS]]
+    if len(skills) > MAX_HINT_SKILLS:
+        names.append(f"+{len(skills) - MAX_HINT_SKILLS} more")
+    return ", ".join(names) or "none"
+
+
+def format_skill_inventory(skills: Dict[Skill, int]) -> str:
+    """
+    Compact, category-grouped list of a candidate's skills for prompts.
+    """
+    by_category: Dict[str, List[Skill]] = {}
+    for skill in skills:
+        by_category.setdefault(skill.category, []).append(skill)
+    if not by_category:
+        return ""
+    lines = ["Skills found in the resume (normalized):"]
+    lines.extend(f"- {category}: {_skill_list(category_skills)}" for category, category_skills in by_category.items())
+    return "\n".join(lines)
+
+
+def format_skill_gap(gap: SkillGap) -> str:
+    """
+    Compact summary of a SkillGap for prompts: coverage, shared skills and the job's skills missing from the resume.
+    """
+    if gap.coverage is None:
+        return ""
+    return "\n".join([
+        f"Skill coverage of the job requirements: {gap.coverage:.0%}",
+        f"- Matched: {_skill_list(gap.matched)}",
+        f"- Missing from the resume: {_skill_list(gap.missing, with_category=True)}",
+        f"- Other candidate skills: {_skill_list(gap.extra)}",
+    ])
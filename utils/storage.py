@@ -0,0 +1,36 @@
+import os
+import sqlite3
+from decouple import config
+
+# Directory holding the on-disk caches: local disk, one per replica. SQLite locking is not reliable
+# on network filesystems, so it must not be a volume mounted by several hosts
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "jobbuddy")
+
+
+def cache_path(filename: str) -> str:
+    """
+    Resolve the path of a cache file inside the configured cache directory.
+
+    :param filename: Name of the cache file
+    :return: Absolute path, with the directory created if needed
+    """
+    cache_dir = os.path.expanduser(config("JOBBUDDY_CACHE_DIR", default=DEFAULT_CACHE_DIR))
+    os.makedirs(cache_dir, exist_ok=True)
+    return os.path.join(cache_dir, filename)
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """
+    Open a SQLite connection that is safe to share between processes.
+
+    WAL journaling lets readers proceed while another process on the same host writes, and the busy
+    timeout makes concurrent writers wait instead of failing with "database is locked".
+
+    :param path: Path of the database file
+    :return: Connection in autocommit mode with rows returned as sqlite3.Row
+    """
+    connection = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
@@ -0,0 +1,366 @@
+import html
+import json
+import logging
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, Tag
+
+from utils.resume_profile import repair_json
+
+logger = logging.getLogger(__name__)
+
+# Fields of a parsed job listing, in the order the LLM parser returns them
+JOB_FIELDS = [
+    "Position Name",
+    "Position Overview",
+    "About the Role",
+    "Key Responsibilities",
+    "Required Skills & Experience",
+    "Highly Valued Experience",
+    "Soft Skills",
+    "Benefits",
+]
+
+# Raw model output kept in a listing when the missing fields could not be parsed from it
+UNPARSED_OUTPUT_FIELD = "Unparsed Model Output"
+
+# Without these the structured data is not enough to replace the model
+REQUIRED_FIELDS = ("Position Name", "Key Responsibilities", "Required Skills & Experience")
+
+LIST_FIELDS = {"Key Responsibilities", "Required Skills & Experience", "Soft Skills"}
+
+# Section headings of a job description mapped to fields; the first matching pattern wins
+SECTION_PATTERNS = [
+    ("Soft Skills", re.compile(r"soft skills?", re.IGNORECASE)),
+    ("Highly Valued Experience", re.compile(r"nice[- ]to[- ]have|preferred|bonus|desirable|highly valued|plus", re.IGNORECASE)),
+    ("Benefits", re.compile(r"benefit|perks|what we offer|we offer|compensation|why join", re.IGNORECASE)),
+    ("Key Responsibilities", re.compile(r"responsibilit|what you('| wi)ll do|duties|day[- ]to[- ]day|your role|in this role", re.IGNORECASE)),
+    ("Required Skills & Experience", re.compile(r"requirement|qualification|what you bring|must[- ]have|you have|skills|experience|who you are|about you", re.IGNORECASE)),
+    ("About the Role", re.compile(r"about the (role|job|position)|the role|role overview|the opportunity", re.IGNORECASE)),
+    ("Position Overview", re.compile(r"overview|summary", re.IGNORECASE)),
+]
+
+# Schema.org JobPosting properties that map directly onto fields
+PROPERTY_FIELDS = [
+    ("responsibilities", "Key Responsibilities"),
+    ("qualifications", "Required Skills & Experience"),
+    ("skills", "Required Skills & Experience"),
+    ("experienceRequirements", "Required Skills & Experience"),
+    ("educationRequirements", "Required Skills & Experience"),
+    ("jobBenefits", "Benefits"),
+]
+
+HEADING_TAGS = ["h1", "h2", "h3", "h4", "h5", "h6"]
+BULLET = re.compile(r"^\s*(?:[-*•·▪◦]|\d+[.)])\s+")
+
+
+def _clean(text: str) -> str:
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def _is_job_posting(item: Any) -> bool:
+    types = item.get("@type") if isinstance(item, dict) else None
+    types = types if isinstance(types, list) else [types]
+    return any(isinstance(value, str) and value.split("/")[-1] == "JobPosting" for value in types)
+
+
+def _walk_json_ld(data: Any):
+    if isinstance(data, list):
+        for item in data:
+            yield from _walk_json_ld(item)
+    elif isinstance(data, dict):
+        if _is_job_posting(data):
+            yield data
+        for key in ("@graph", "mainEntity", "itemListElement"):
+            if key in data:
+                yield from _walk_json_ld(data[key])
+
+
+def _json_ld_postings(soup: BeautifulSoup) -> List[Dict]:
+    postings = []
+    for script in soup.find_all("script", type=re.compile(r"application/ld\+json", re.IGNORECASE)):
+        try:
+            data = json.loads(script.string or script.get_text() or "", strict=False)
+        except ValueError:
+            continue
+        postings.extend(_walk_json_ld(data))
+    return postings
+
+
+def _microdata_value(element: Tag) -> Any:
+    if element.has_attr("content"):
+        return element["content"]
+    if element.name in ("a", "link") and element.has_attr("href"):
+        return element["href"]
+    if element.has_attr("itemscope"):
+        names = element.find(attrs={"itemprop": "name"})
+        return _clean(names.get_text(" ")) if names else _clean(element.get_text(" "))
+    # Keep the markup so lists inside the property survive
+    return element.decode_contents()
+
+
+def _microdata_posting(soup: BeautifulSoup) -> Optional[Dict]:
+    scope = soup.find(attrs={"itemtype": re.compile(r"schema\.org/JobPosting", re.IGNORECASE)})
+    if scope is None:
+        return None
+    posting = {"@type": "JobPosting"}
+    for element in scope.find_all(attrs={"itemprop": True}):
+        for name in element["itemprop"].split():
+            posting.setdefault(name, _microdata_value(element))
+    return posting
+
+
+def find_job_posting(soup: BeautifulSoup) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Locate schema.org JobPosting data embedded in a page.
+
+    :param soup: Parsed page (unpruned: JSON-LD lives in script tags)
+    :return: Tuple of (posting dictionary or None, source "json-ld" / "microdata" / None)
+    """
+    postings = _json_ld_postings(soup)
+    if postings:
+        # Pages listing several postings put the main one first
+        return postings[0], "json-ld"
+    posting = _microdata_posting(soup)
+    if posting is not None:
+        return posting, "microdata"
+    return None, None
+
+
+def _text_items(value: Any) -> List[str]:
+    """
+    Flatten a property value (text, HTML, list or DefinedTerm-like objects) into list items.
+    """
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [item for entry in value for item in _text_items(entry)]
+    if isinstance(value, dict):
+        return _text_items(value.get("name") or value.get("description") or value.get("value"))
+    text = str(value)
+    if "<" in text and ">" in text:
+        fragment = BeautifulSoup(text, "html.parser")
+        items = [_clean(li.get_text(" ")) for li in fragment.find_all("li")]
+        if items:
+            return [item for item in items if item]
+        text = fragment.get_text("\n")
+    lines = [_clean(BULLET.sub("", line)) for line in text.splitlines()]
+    return [line for line in lines if line]
+
+
+def _field_for_heading(heading: str) -> Optional[str]:
+    for field, pattern in SECTION_PATTERNS:
+        if pattern.search(heading):
+            return field
+    return None
+
+
+def _description_blocks(description: str) -> List[Tuple[str, str]]:
+    """
+    Split a description into ("heading" | "text" | "item", text) blocks in document order.
+    """
+    if "<" not in description or ">" not in description:
+        blocks = []
+        for line in description.splitlines():
+            text = _clean(line)
+            if not text:
+                continue
+            if BULLET.match(line):
+                blocks.append(("item", _clean(BULLET.sub("", line))))
+            elif text.endswith(":") and len(text) < 80:
+                blocks.append(("heading", text.rstrip(":")))
+            else:
+                blocks.append(("text", text))
+        return blocks
+
+    fragment = BeautifulSoup(description, "html.parser")
+    blocks = []
+    for node in fragment.find_all(HEADING_TAGS + ["p", "li", "div"]):
+        if node.name in ("p", "div") and node.find(HEADING_TAGS + ["p", "li", "div", "ul", "ol"]):
+            continue  # Only the innermost blocks carry text of their own
+        if node.find_parent("li") is not None:
+            continue
+        text = _clean(node.get_text(" "))
+        if not text:
+            continue
+        if node.name in HEADING_TAGS:
+            blocks.append(("heading", text.rstrip(":")))
+            continue
+        if node.name == "li":
+            blocks.append(("item", text))
+            continue
+
+        # "<p><strong>Benefits:</strong> ...</p>" and "<p><b>Requirements</b></p>" introduce sections
+        lead = node.find(["strong", "b"])
+        lead_text = _clean(lead.get_text(" ")) if lead is not None else ""
+        if lead_text and text.startswith(lead_text) and len(lead_text) < 80 and (lead_text.endswith(":") or lead_text == text):
+            blocks.append(("heading", lead_text.rstrip(":")))
+            rest = _clean(text[len(lead_text):])
+            if rest:
+                blocks.append(("text", rest))
+        elif text.endswith(":") and len(text) < 80:
+            blocks.append(("heading", text.rstrip(":")))
+        else:
+            blocks.append(("text", text))
+    return blocks
+
+
+def _description_sections(description: str) -> Dict[str, List[str]]:
+    sections: Dict[str, List[str]] = {}
+    field = "Position Overview"  # Text before the first heading introduces the position
+    for kind, text in _description_blocks(description):
+        if kind == "heading":
+            field = _field_for_heading(text)
+            continue
+        if field is not None:
+            sections.setdefault(field, []).append(text)
+    return sections
+
+
+def _location(posting: Dict) -> str:
+    if str(posting.get("jobLocationType", "")).upper() == "TELECOMMUTE":
+        return "Remote"
+    locations = posting.get("jobLocation")
+    location = locations[0] if isinstance(locations, list) and locations else locations
+    if isinstance(location, dict):
+        address = location.get("address", location)
+        if isinstance(address, dict):
+            parts = [address.get(key) for key in ("addressLocality", "addressRegion", "addressCountry")]
+            return ", ".join(part if isinstance(part, str) else (part or {}).get("name", "") for part in parts if part)
+        return str(address)
+    return str(location or "")
+
+
+def _overview_line(posting: Dict) -> str:
+    # Factual one-liner used when the description has no introduction
+    organization = posting.get("hiringOrganization")
+    organization = organization.get("name") if isinstance(organization, dict) else organization
+    employment = posting.get("employmentType")
+    employment = ", ".join(employment) if isinstance(employment, list) else employment
+    employment = str(employment).replace("_", " ").title() if employment else ""
+    details = ", ".join(part for part in (employment, _location(posting)) if part)
+    line = _clean(str(posting.get("title") or ""))
+    if organization:
+        line += f" at {_clean(str(organization))}"
+    return f"{line} ({details})" if details else line
+
+
+def _field_value(field: str, items: List[str]) -> Any:
+    if field in LIST_FIELDS:
+        return items
+    if field in ("Position Overview", "About the Role") or len(items) == 1:
+        return " ".join(items)
+    return items
+
+
+def map_job_posting(posting: Dict) -> Dict[str, Any]:
+    """
+    Map a schema.org JobPosting onto the job listing fields.
+
+    :param posting: JobPosting dictionary (from JSON-LD or microdata)
+    :return: Dictionary with every field of JOB_FIELDS; fields not found are empty
+    """
+    fields: Dict[str, Any] = {field: ([] if field in LIST_FIELDS else "") for field in JOB_FIELDS}
+    fields["Position Name"] = _clean(str(posting.get("title") or posting.get("name") or ""))
+
+    # Explicit properties first, then sections found under headings of the description
+    for prop, field in PROPERTY_FIELDS:
+        items = _text_items(posting.get(prop))
+        if items and not fields[field]:
+            fields[field] = _field_value(field, items)
+    # Some boards store the description as escaped HTML
+    description = str(posting.get("description") or "")
+    if "&lt;" in description:
+        description = html.unescape(description)
+    for field, items in _description_sections(description).items():
+        if items and not fields[field]:
+            fields[field] = _field_value(field, items)
+
+    if not fields["Position Overview"] and fields["Position Name"]:
+        fields["Position Overview"] = _overview_line(posting)
+    return fields
+
+
+def missing_fields(fields: Optional[Dict[str, Any]]) -> List[str]:
+    """
+    Fields the model still has to extract.
+
+    Optional sections that a posting simply does not have stay empty, as the model would
+    leave them; only when a required field is missing are all empty fields requested.
+
+    :param fields: Fields from map_job_posting, or None when the page has no structured data
+    :return: Field names to extract with the model (empty when the structured data is enough)
+    """
+    if not fields:
+        return list(JOB_FIELDS)
+    if all(fields.get(field) for field in REQUIRED_FIELDS):
+        return []
+    return [field for field in JOB_FIELDS if not fields.get(field)]
+
+
+def format_job_fields(fields: Dict[str, Any]) -> str:
+    listing = {field: fields.get(field, "") for field in JOB_FIELDS}
+    if fields.get(UNPARSED_OUTPUT_FIELD):
+        listing[UNPARSED_OUTPUT_FIELD] = fields[UNPARSED_OUTPUT_FIELD]
+    return json.dumps(listing, indent=4, ensure_ascii=False)
+
+
+def merge_job_fields(fields: Optional[Dict[str, Any]], model_output: str) -> str:
+    """
+    Fill the fields missing from the structured data with the model's output.
+
+    :param fields: Fields from map_job_posting, or None
+    :param model_output: JSON returned by the model
+    :return: Parsed job listing as a JSON string (the model output unchanged when there is no structured data)
+    """
+    if not fields:
+        return model_output
+    try:
+        extracted = json.loads(repair_json(model_output))
+    except ValueError:
+        extracted = None
+    merged = dict(fields)
+    if isinstance(extracted, dict):
+        for field in JOB_FIELDS:
+            if not merged.get(field) and extracted.get(field):
+                merged[field] = extracted[field]
+    else:
+        # Keep what the model wrote so the missing fields can still be read (and the listing is not cached)
+        logger.warning("Could not parse the model output for the missing job fields: %.200s", model_output)
+        merged[UNPARSED_OUTPUT_FIELD] = model_output
+    return format_job_fields(merged)
+
+
+class FastPathStats:
+    def __init__(self):
+        """
+        Counters of how often structured data replaced (or reduced) the model call.
+
+        Outcomes: "full" (no model call), "partial" (model asked for missing fields only)
+        and "none" (no structured data on the page).
+        """
+        self._lock = threading.Lock()
+        self._counters = {"full": 0, "partial": 0, "none": 0}
+        self._sources: Dict[str, int] = {}
+
+    def record(self, outcome: str, source: Optional[str] = None) -> None:
+        with self._lock:
+            self._counters[outcome] += 1
+            if source:
+                self._sources[source] = self._sources.get(source, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        :return: Dictionary with full, partial, none, sources and hit_ratio (share of parses without a model call)
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats["sources"] = dict(self._sources)
+        parses = stats["full"] + stats["partial"] + stats["none"]
+        stats["hit_ratio"] = stats["full"] / parses if parses else 0.0
+        return stats
+
+
+fast_path_stats = FastPathStats()
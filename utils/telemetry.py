@@ -0,0 +1,369 @@
+import contextvars
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import AsyncGenerator, Dict, Generator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from decouple import config
+
+from utils.rate_limiter import PRIORITY_NAMES, admission
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 60.0)
+
+# Number of recent samples per series kept for percentile estimates
+SAMPLE_WINDOW = 2048
+
+# Streamlit session (or batch job) the current call belongs to
+current_session = contextvars.ContextVar("jobbuddy_session", default="-")
+
+
+def set_session(session_id: str) -> None:
+    current_session.set(session_id or "-")
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class _Histogram:
+    def __init__(self):
+        self.bucket_counts = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=SAMPLE_WINDOW)
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.bucket_counts[index] += 1
+                break
+        self.count += 1
+        self.total += value
+        self.samples.append(value)
+
+    def quantiles(self) -> Dict[str, float]:
+        ordered = sorted(self.samples)
+        return {"p50": _percentile(ordered, 0.50), "p95": _percentile(ordered, 0.95), "p99": _percentile(ordered, 0.99)}
+
+
+class Telemetry:
+    def __init__(self, jsonl_path: str = None, recent_records: int = 500):
+        """
+        Thread-safe latency and token metrics for every LLM and HTTP call made by the agents.
+
+        Each call is recorded with its kind ("llm", "http" or "extract"), agent, method, model and
+        session. Latencies feed per-series histograms (Prometheus text export) and a window of
+        recent samples used for p50/p95/p99. When a JSON lines path is configured every record
+        is also appended there.
+
+        :param jsonl_path: Optional file receiving one JSON line per call
+        :param recent_records: Number of recent call records kept in memory
+        """
+        self.jsonl_path = jsonl_path
+        self._lock = threading.Lock()
+        self._durations: Dict[Tuple[str, str, str, str], _Histogram] = defaultdict(_Histogram)
+        self._ttft: Dict[Tuple[str, str, str, str], _Histogram] = defaultdict(_Histogram)
+        self._tokens: Dict[Tuple[str, ...], int] = defaultdict(int)
+        self._calls: Dict[Tuple[str, ...], int] = defaultdict(int)
+        self.recent = deque(maxlen=recent_records)
+
+    def record(self, kind: str, agent: str, method: str, model: str, duration: float, ok: bool = True,
+               ttft: float = None, input_tokens: int = 0, cached_input_tokens: int = 0,
+               output_tokens: int = 0, **extra) -> Dict:
+        """
+        Record one finished call.
+
+        :param kind: "llm", "http" or "extract"
+        :param agent: Agent class name
+        :param method: Agent method that made the call
+        :param model: Model name (or host for HTTP calls)
+        :param duration: Wall-clock seconds of the call, including the whole stream
+        :param ok: False when the call raised
+        :param ttft: Seconds until the first streamed token, for streamed calls
+        :return: The stored record
+        """
+        record = {
+            "ts": time.time(), "kind": kind, "agent": agent, "method": method, "model": model,
+            "session": current_session.get(), "ok": ok, "duration": round(duration, 4),
+            "ttft": round(ttft, 4) if ttft is not None else None,
+            "input_tokens": input_tokens, "cached_input_tokens": cached_input_tokens,
+            "output_tokens": output_tokens, **extra,
+        }
+        series = (kind, agent, method, model)
+        with self._lock:
+            self._durations[series].observe(duration)
+            if ttft is not None:
+                self._ttft[series].observe(ttft)
+            self._tokens[series + ("input",)] += input_tokens
+            self._tokens[series + ("cached_input",)] += cached_input_tokens
+            self._tokens[series + ("output",)] += output_tokens
+            self._calls[series + ("ok" if ok else "error",)] += 1
+            self.recent.append(record)
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a", encoding="utf-8") as jsonl_file:
+                    jsonl_file.write(json.dumps(record) + "\n")
+        return record
+
+    def latency_summary(self) -> List[Dict]:
+        """
+        Per-series call counts, p50/p95/p99 latency and time to first token, and token totals.
+        """
+        with self._lock:
+            rows = []
+            for series, histogram in sorted(self._durations.items()):
+                kind, agent, method, model = series
+                row = {"kind": kind, "agent": agent, "method": method, "model": model,
+                       "calls": histogram.count, "mean": histogram.total / histogram.count}
+                row.update({name: value for name, value in histogram.quantiles().items()})
+                if series in self._ttft:
+                    row.update({f"ttft_{name}": value for name, value in self._ttft[series].quantiles().items()})
+                row["input_tokens"] = self._tokens[series + ("input",)]
+                row["cached_input_tokens"] = self._tokens[series + ("cached_input",)]
+                row["output_tokens"] = self._tokens[series + ("output",)]
+                rows.append(row)
+        return rows
+
+    def prometheus_text(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+        """
+        def labels(series, **more):
+            kind, agent, method, model = series[:4]
+            pairs = {"kind": kind, "agent": agent, "method": method, "model": model, **more}
+            return "{" + ",".join(f'{key}="{value}"' for key, value in pairs.items()) + "}"
+
+        lines = []
+        with self._lock:
+            for name, histograms, help_text in (
+                ("jobbuddy_call_duration_seconds", self._durations, "Wall-clock duration of LLM and HTTP calls"),
+                ("jobbuddy_time_to_first_token_seconds", self._ttft, "Time until the first streamed token"),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for series, histogram in sorted(histograms.items()):
+                    cumulative = 0
+                    for bound, count in zip(LATENCY_BUCKETS, histogram.bucket_counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{labels(series, le=bound)} {cumulative}")
+                    lines.append(f"{name}_bucket{labels(series, le='+Inf')} {histogram.count}")
+                    lines.append(f"{name}_sum{labels(series)} {histogram.total}")
+                    lines.append(f"{name}_count{labels(series)} {histogram.count}")
+
+            name = "jobbuddy_call_latency_quantile_seconds"
+            lines += [f"# HELP {name} Latency percentiles over the recent sample window", f"# TYPE {name} gauge"]
+            for series, histogram in sorted(self._durations.items()):
+                for quantile, value in zip(("0.5", "0.95", "0.99"), histogram.quantiles().values()):
+                    lines.append(f"{name}{labels(series, quantile=quantile)} {value}")
+
+            lines += ["# HELP jobbuddy_tokens_total Tokens sent and received", "# TYPE jobbuddy_tokens_total counter"]
+            for series, value in sorted(self._tokens.items()):
+                lines.append(f"jobbuddy_tokens_total{labels(series, direction=series[4])} {value}")
+
+            lines += ["# HELP jobbuddy_calls_total Calls by outcome", "# TYPE jobbuddy_calls_total counter"]
+            for series, value in sorted(self._calls.items()):
+                lines.append(f"jobbuddy_calls_total{labels(series, status=series[4])} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        # For node_exporter's textfile collector: write then rename so scrapes never see a partial file
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as prometheus_file:
+            prometheus_file.write(self.prometheus_text())
+        os.replace(temporary_path, path)
+
+    def recent_jsonl(self) -> str:
+        with self._lock:
+            return "".join(json.dumps(record) + "\n" for record in self.recent)
+
+
+class UsageTracker:
+    def __init__(self):
+        """
+        Thread-safe totals of token usage reported by the API, per agent and method.
+
+        Cached input tokens are the part of the prompt served from the provider's prompt
+        cache; their share shows whether the stable prompt prefixes are being reused.
+        """
+        self._lock = threading.Lock()
+        self._totals: Dict[Tuple[str, str], Dict[str, int]] = defaultdict(
+            lambda: {"calls": 0, "input_tokens": 0, "cached_input_tokens": 0, "output_tokens": 0}
+        )
+
+    def record(self, agent: str, method: str, usage_metadata: dict) -> Dict[str, int]:
+        """
+        Add the usage of one call.
+
+        :param agent: Agent class name
+        :param method: Agent method that made the call
+        :param usage_metadata: LangChain usage_metadata of the response
+        :return: Usage of this call (input, cached input and output tokens)
+        """
+        usage = {
+            "input_tokens": usage_metadata.get("input_tokens", 0),
+            "cached_input_tokens": (usage_metadata.get("input_token_details") or {}).get("cache_read", 0) or 0,
+            "output_tokens": usage_metadata.get("output_tokens", 0),
+        }
+        with self._lock:
+            totals = self._totals[(agent, method)]
+            totals["calls"] += 1
+            for name, value in usage.items():
+                totals[name] += value
+        logger.info(
+            "%s.%s usage: %d input tokens (%d cached, %d uncached), %d output tokens",
+            agent, method, usage["input_tokens"], usage["cached_input_tokens"],
+            usage["input_tokens"] - usage["cached_input_tokens"], usage["output_tokens"],
+        )
+        return usage
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Usage totals keyed on "Agent.method", including the cached share of input tokens.
+        """
+        with self._lock:
+            items = [(key, dict(totals)) for key, totals in self._totals.items()]
+        summary = {}
+        for (agent, method), totals in items:
+            totals["uncached_input_tokens"] = totals["input_tokens"] - totals["cached_input_tokens"]
+            totals["cache_hit_ratio"] = (
+                totals["cached_input_tokens"] / totals["input_tokens"] if totals["input_tokens"] else 0.0
+            )
+            summary[f"{agent}.{method}"] = totals
+        return summary
+
+
+usage_tracker = UsageTracker()
+telemetry = Telemetry(jsonl_path=config("JOBBUDDY_TELEMETRY_JSONL", default=None))
+
+
+def _model_name(llm) -> str:
+    return getattr(llm, "model_name", None) or getattr(llm, "model", None) or "-"
+
+
+def _record_llm_call(llm, agent: str, method: str, started: float, ok: bool, usage: Optional[Dict],
+                     first_token_at: float = None, ticket=None, error: BaseException = None) -> None:
+    # Settle the admission before recording, so the token budget reflects the actual usage
+    if ticket is not None:
+        admission.release(ticket, usage, error)
+    usage = usage or {}
+    telemetry.record(
+        "llm", agent, method, _model_name(llm), time.perf_counter() - started, ok=ok,
+        ttft=first_token_at - started if first_token_at is not None else None,
+        input_tokens=usage.get("input_tokens", 0),
+        cached_input_tokens=usage.get("cached_input_tokens", 0),
+        output_tokens=usage.get("output_tokens", 0),
+        queue_wait=round(ticket.wait, 4) if ticket is not None else None,
+        priority=PRIORITY_NAMES[ticket.priority] if ticket is not None else None,
+    )
+
+
+@contextmanager
+def timed_http(agent: str, method: str, url: str):
+    """
+    Record the duration of an HTTP call made by an agent.
+
+    :param url: Requested URL; only its host is used as a label
+    """
+    started = time.perf_counter()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        telemetry.record("http", agent, method, urlsplit(url).hostname or "-", time.perf_counter() - started, ok=ok)
+
+
+def invoke_content(llm, messages: list, agent: str, method: str) -> str:
+    """
+    Invoke the model once the admission scheduler lets the call through, recording latency and token usage.
+
+    :return: Content of the response
+    """
+    ticket = admission.acquire(llm, messages, current_session.get())
+    started, ok, usage, error = time.perf_counter(), False, None, None
+    try:
+        response = llm.invoke(messages)
+        if response.usage_metadata:
+            usage = usage_tracker.record(agent, method, response.usage_metadata)
+        ok = True
+        return response.content
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        _record_llm_call(llm, agent, method, started, ok, usage, ticket=ticket, error=error)
+
+
+async def ainvoke_content(llm, messages: list, agent: str, method: str) -> str:
+    """
+    Async counterpart of invoke_content.
+    """
+    ticket = await admission.aacquire(llm, messages, current_session.get())
+    started, ok, usage, error = time.perf_counter(), False, None, None
+    try:
+        response = await llm.ainvoke(messages)
+        if response.usage_metadata:
+            usage = usage_tracker.record(agent, method, response.usage_metadata)
+        ok = True
+        return response.content
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        _record_llm_call(llm, agent, method, started, ok, usage, ticket=ticket, error=error)
+
+
+def stream_content(llm, messages: list, agent: str, method: str) -> Generator[str, None, None]:
+    """
+    Stream the model's response once admitted, recording time to first token, total time and token usage.
+
+    :return: Generator yielding response chunks
+    """
+    ticket = admission.acquire(llm, messages, current_session.get())
+    started, ok, usage, first_token_at, error = time.perf_counter(), False, None, None, None
+    try:
+        for chunk in llm.stream(messages):
+            if chunk.usage_metadata:
+                usage = usage_tracker.record(agent, method, chunk.usage_metadata)
+            if chunk and chunk.content:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                yield chunk.content
+        ok = True
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        _record_llm_call(llm, agent, method, started, ok, usage, first_token_at, ticket=ticket, error=error)
+
+
+async def astream_content(llm, messages: list, agent: str, method: str) -> AsyncGenerator[str, None]:
+    """
+    Async counterpart of stream_content.
+    """
+    ticket = await admission.aacquire(llm, messages, current_session.get())
+    started, ok, usage, first_token_at, error = time.perf_counter(), False, None, None, None
+    try:
+        async for chunk in llm.astream(messages):
+            if chunk.usage_metadata:
+                usage = usage_tracker.record(agent, method, chunk.usage_metadata)
+            if chunk and chunk.content:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                yield chunk.content
+        ok = True
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        _record_llm_call(llm, agent, method, started, ok, usage, first_token_at, ticket=ticket, error=error)
@@ -0,0 +1,28 @@
+from functools import lru_cache
+
+# Rough characters-per-token ratio for English prose, used when tiktoken is unavailable
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")  # Encoding used by gpt-4o / gpt-4o-mini
+    except Exception:
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of input tokens a piece of text will cost.
+
+    :param text: Text that will be sent to the model
+    :return: Token count from tiktoken when available, otherwise a character-based estimate
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return max(1, len(text) // CHARS_PER_TOKEN)